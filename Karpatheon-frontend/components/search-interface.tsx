@@ -7,20 +7,15 @@ import { SearchResults } from '@/components/search-results'
 
 export function SearchInterface() {
   const [query, setQuery] = useState('')
+  const [submittedQuery, setSubmittedQuery] = useState('')
   const [isSearching, setIsSearching] = useState(false)
   const [showResults, setShowResults] = useState(false)
 
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault()
     if (query.trim()) {
-      setIsSearching(true)
-      setShowResults(false)
-      
-      // Simulate search delay
-      setTimeout(() => {
-        setIsSearching(false)
-        setShowResults(true)
-      }, 1500)
+      setSubmittedQuery(query.trim())
+      setShowResults(true)
     }
   }
 
@@ -73,7 +68,7 @@ export function SearchInterface() {
       </div>
 
       {/* Search Results */}
-      {showResults && <SearchResults query={query} />}
+      {showResults && <SearchResults query={submittedQuery} onLoadingChange={setIsSearching} />}
 
       {/* Suggestions */}
       {!showResults && (
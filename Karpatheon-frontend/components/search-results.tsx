@@ -1,37 +1,63 @@
 'use client'
 
+import { Fragment, useEffect, useState } from 'react'
 import { Brain, ExternalLink, BookMarked, TrendingUp } from 'lucide-react'
 import { Button } from '@/components/ui/button'
+import { searchAPI, type SearchResult } from '@/lib/api'
 
 interface SearchResultsProps {
   query: string
+  onLoadingChange?: (loading: boolean) => void
 }
 
-export function SearchResults({ query }: SearchResultsProps) {
-  // Mock results - in real app, this would come from API
-  const results = [
-    {
-      title: 'Understanding the Neural Architecture Behind Modern AI Systems',
-      url: 'research.pantheon.ai',
-      snippet: 'Deep dive into transformer architectures and their evolution. This comprehensive analysis explores the mathematical foundations and practical implementations...',
-      relevance: 98,
-      source: 'Research Paper',
-    },
-    {
-      title: 'AI Ethics Framework for Enterprise Leaders',
-      url: 'insights.pantheon.ai',
-      snippet: 'A practical guide for CEOs navigating AI implementation in organizations. Covers governance, risk management, and ethical considerations...',
-      relevance: 95,
-      source: 'Expert Analysis',
-    },
-    {
-      title: 'The Future of Human-AI Collaboration in Creative Industries',
-      url: 'trends.pantheon.ai',
-      snippet: 'Exploring how artificial intelligence is reshaping creative workflows without replacing human ingenuity. Case studies from leading tech companies...',
-      relevance: 92,
-      source: 'Industry Report',
-    },
-  ]
+/** Render text with the API's <mark></mark> highlights, without injecting HTML */
+function Highlighted({ text }: { text: string }) {
+  const parts = text.split(/<\/?mark>/)
+  return (
+    <>
+      {parts.map((part, i) =>
+        i % 2 === 1 ? (
+          <mark key={i} className="rounded bg-primary/20 px-0.5 text-foreground">{part}</mark>
+        ) : (
+          <Fragment key={i}>{part}</Fragment>
+        )
+      )}
+    </>
+  )
+}
+
+export function SearchResults({ query, onLoadingChange }: SearchResultsProps) {
+  const [results, setResults] = useState<SearchResult[]>([])
+  const [total, setTotal] = useState(0)
+  const [error, setError] = useState<string | null>(null)
+
+  useEffect(() => {
+    let cancelled = false
+    onLoadingChange?.(true)
+    setError(null)
+    searchAPI
+      .search(query)
+      .then((response) => {
+        if (cancelled) return
+        setResults(response.results)
+        setTotal(response.total)
+      })
+      .catch((e: Error) => {
+        if (cancelled) return
+        setResults([])
+        setTotal(0)
+        setError(e.message)
+      })
+      .finally(() => {
+        if (!cancelled) onLoadingChange?.(false)
+      })
+    return () => {
+      cancelled = true
+    }
+  }, [query, onLoadingChange])
+
+  // Relevance shown relative to the best match on the page
+  const topScore = results.length ? results[0].score : 1
 
   return (
     <div className="space-y-8">
@@ -62,7 +88,11 @@ export function SearchResults({ query }: SearchResultsProps) {
       {/* Results Count */}
       <div className="flex items-center justify-between">
         <p className="text-sm text-muted-foreground">
-          Found <span className="font-semibold text-foreground">{results.length}</span> highly relevant results
+          {error ?? (
+            <>
+              Found <span className="font-semibold text-foreground">{total}</span> matching notes
+            </>
+          )}
         </p>
         <Button variant="ghost" size="sm" className="text-accent hover:text-accent/80">
           <TrendingUp className="mr-2 h-4 w-4" />
@@ -72,9 +102,9 @@ export function SearchResults({ query }: SearchResultsProps) {
 
       {/* Search Results */}
       <div className="space-y-4">
-        {results.map((result, index) => (
+        {results.map((result) => (
           <article
-            key={index}
+            key={result.file_id}
             className="group rounded-xl border border-border bg-card p-6 transition-all hover:border-primary/50 hover:bg-card/80"
           >
             <div className="space-y-3">
@@ -82,23 +112,25 @@ export function SearchResults({ query }: SearchResultsProps) {
               <div className="flex items-start justify-between gap-4">
                 <div className="flex-1 space-y-1">
                   <div className="flex items-center gap-2">
-                    <span className="text-xs text-muted-foreground">{result.url}</span>
+                    {result.url && (
+                      <span className="text-xs text-muted-foreground">{result.url}</span>
+                    )}
                     <span className="rounded-full bg-primary/10 px-2 py-0.5 text-xs text-primary">
-                      {result.source}
+                      Note
                     </span>
                   </div>
                   <h3 className="font-serif text-xl font-semibold leading-snug text-foreground group-hover:text-primary transition-colors">
-                    {result.title}
+                    <Highlighted text={result.title} />
                   </h3>
                 </div>
                 <div className="flex items-center gap-1 rounded-lg bg-primary/10 px-2 py-1 ring-1 ring-primary/20">
-                  <span className="text-xs font-semibold text-primary">{result.relevance}%</span>
+                  <span className="text-xs font-semibold text-primary">{Math.round((result.score / topScore) * 100)}%</span>
                 </div>
               </div>
 
               {/* Snippet */}
               <p className="text-sm leading-relaxed text-muted-foreground">
-                {result.snippet}
+                <Highlighted text={result.snippet} />
               </p>
 
               {/* Actions */}
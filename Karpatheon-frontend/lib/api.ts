@@ -37,6 +37,17 @@ export const notesAPI = {
     return response.json()
   },
 
+  /**
+   * List one page of notes, newest first. Pass the returned cursor to get the next page.
+   */
+  async listPage(limit: number = 100, cursor?: string): Promise<{ notes: Note[]; nextCursor: string | null }> {
+    const params = new URLSearchParams({ limit: String(limit) })
+    if (cursor) params.set('cursor', cursor)
+    const response = await fetch(`${API_URL}/api/notes?${params}`)
+    if (!response.ok) throw new Error('Failed to fetch notes')
+    return { notes: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') }
+  },
+
   /**
    * Get a single note with full content
    */
@@ -94,3 +105,37 @@ export const notesAPI = {
     }
   }
 }
+
+export type SearchResult = {
+  file_id: string
+  /** Matched terms are wrapped in <mark></mark> */
+  title: string
+  url?: string
+  updated_at?: string
+  /** Body excerpt; matched terms are wrapped in <mark></mark> */
+  snippet: string
+  score: number
+}
+
+export type SearchResponse = {
+  query: string
+  total: number
+  results: SearchResult[]
+  took_ms: number
+}
+
+export const searchAPI = {
+  /**
+   * Full-text search over note titles and bodies.
+   * Supports "exact phrases", prefix* and title:word terms.
+   */
+  async search(query: string, limit: number = 20, offset: number = 0): Promise<SearchResponse> {
+    const params = new URLSearchParams({ q: query, limit: String(limit), offset: String(offset) })
+    const response = await fetch(`${API_URL}/api/search?${params}`)
+    if (!response.ok) {
+      if (response.status === 400) throw new Error('Search query has no searchable terms')
+      throw new Error('Search failed')
+    }
+    return response.json()
+  }
+}
@@ -1,24 +1,43 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, status
 from app.schemas.base import ChatRequest, ChatResponse
+from app.services import metrics
+from app.services.resilience import NOT_RETRYABLE
+from app.services.retrieval import ChunkRetriever
 
 router = APIRouter()
 
 @router.post("/query", response_model=ChatResponse)
+@metrics.timed("chat.query")
 async def chat_query(payload: ChatRequest):
     """
     Main RAG Endpoint.
-    1. Vector Search (Supabase)
+    1. Vector Search (Neo4j, scoped to payload.user_id)
     2. Graph Expansion (Neo4j)
     3. LLM Synthesis
+
+    Without a user_id there is nothing to retrieve from, so sources is empty.
     """
-    # TODO: Implement RAG logic
+    sources = []
+    if payload.user_id:
+        try:
+            hits = await ChunkRetriever().search(payload.user_id, payload.query, file_ids=payload.context_filter)
+        except NOT_RETRYABLE:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Retrieval failed: {str(e)}"
+            )
+        sources = list(dict.fromkeys(hit["file_id"] for hit in hits))
+
     return ChatResponse(
         response=f"I received your query about '{payload.query}' in {payload.mode} mode.",
-        sources=["doc-1", "node-graph-alpha"],
+        sources=sources,
         suggested_actions=["Read more about Docker", "Create a new note"]
     )
 
 @router.post("/synthesis")
+@metrics.timed("chat.synthesis")
 async def daily_synthesis():
     """
     'Morning Brief' style synthesis of recent notes and graph additions.
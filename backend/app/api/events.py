@@ -0,0 +1,48 @@
+"""
+FastAPI endpoints for reading-activity events.
+Location: backend/app/api/events.py
+
+Endpoints:
+- POST /api/events          - Record a batch of client events (buffered, flushed in bulk)
+- GET  /api/events/summary  - Per-day and per-topic rollups for one user
+"""
+
+from fastapi import APIRouter, HTTPException, Query, status
+from app.schemas.events import ActivitySummaryResponse, EventBatchRequest, EventBatchResponse
+from app.services.events import EventBufferFull, get_event_service
+
+router = APIRouter()
+
+
+@router.post("", response_model=EventBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def record_events(request: EventBatchRequest):
+    """
+    Accept a batch of events. They are buffered in memory and written on the
+    next flush; rollups (and /summary) reflect them immediately.
+    """
+    try:
+        result = get_event_service().record(request.user_id, request.events, request.batch_id)
+    except EventBufferFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return EventBatchResponse(**result)
+
+
+@router.get("/summary", response_model=ActivitySummaryResponse)
+async def activity_summary(
+    user_id: str = Query(..., min_length=1),
+    days: int = Query(7, ge=1, le=90),
+    topics: int = Query(10, ge=1, le=50)
+):
+    """Reading time per day (oldest first) and top topics, for the dashboards."""
+    try:
+        summary = await get_event_service().summary(user_id, days=days, topic_limit=topics)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Activity rollups unavailable: {str(e)}"
+        )
+    return ActivitySummaryResponse(**summary)
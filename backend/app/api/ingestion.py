@@ -1,20 +1,76 @@
+import asyncio
+import json
+import re
 import uuid
 import os
+import importlib
+from functools import cached_property
 from fastapi import APIRouter, UploadFile, Form
 from typing import List, Dict, Any
 from app.db.clients import get_supabase, get_neo4j
+from app.db.partitions import shard_for, shard_label
+from app.services import metrics
+from app.services.recommendations import get_recommendation_service
+from app.services.governor import BACKGROUND, GovernedEmbeddings, GovernedLLM, get_governor
+from app.services.resilience import NOT_RETRYABLE, get_resilience
+from app.services.write_coalescer import get_write_coalescer
 
 router = APIRouter()
 
-# --- Changed Imports ---
-from langchain_text_splitters import MarkdownHeaderTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI # Use Gemini for Embeddings
-from langchain_core.prompts import PromptTemplate
+# --- Lazy Imports ---
+# LangChain + Google GenAI take over a second to import, so they load on the
+# first upload (or during the opt-in startup warm-up), not with the app.
+_LAZY_IMPORTS = {
+    "MarkdownHeaderTextSplitter": "langchain_text_splitters",
+    "GoogleGenerativeAIEmbeddings": "langchain_google_genai",  # Use Gemini for Embeddings
+    "ChatGoogleGenerativeAI": "langchain_google_genai",
+    "PromptTemplate": "langchain_core.prompts",
+}
+
+
+def __getattr__(name: str):
+    """Resolve a lazy import on first attribute access and cache it as a module global."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def _lazy(name: str):
+    # Read globals first so test patches of module attributes take effect
+    return globals().get(name) or __getattr__(name)
+
+
+def preload():
+    """Import every lazy dependency now (startup warm-up)."""
+    for name in _LAZY_IMPORTS:
+        _lazy(name)
+
+
+# One model client per process, shared by every upload (keyed by class, so a
+# patched class in tests gets its own instance)
+_shared_clients: Dict[Any, Any] = {}
+
+
+def _shared_client(name: str, **kwargs):
+    cls = _lazy(name)
+    client = _shared_clients.get(cls)
+    if client is None:
+        client = _shared_clients[cls] = cls(**kwargs)
+    return client
 
 # --- Configuration ---
 # Switching to Gemini Embeddings
 EMBEDDING_MODEL = "models/embedding-001" 
 
+# Texts per embedding request; each batch is retried/hedged on its own
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "100"))
+EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+
+MAX_CONCEPTS_PER_CHUNK = 25
+_CYPHER_NAME = re.compile(r"""Concept\s*\{\s*name\s*:\s*(['"])(.+?)\1""")
+
 HEADERS_TO_SPLIT_BY = [
     ("#", "Header1"),
     ("##", "Header2"),
@@ -22,44 +78,83 @@ HEADERS_TO_SPLIT_BY = [
 ]
 
 class IngestionService:
-    def __init__(self):
-        self.supabase = get_supabase()
-        self.neo4j_driver = get_neo4j()
+    def __init__(
+        self, supabase=None, neo4j_driver=None, embeddings=None, llm=None, governor=None, recommendations=None, writer=None
+    ):
+        """Clients default to the shared ones; pass stand-ins to run offline (tests, benchmarks)."""
+        self.supabase = supabase if supabase is not None else get_supabase()
+        self.neo4j_driver = neo4j_driver if neo4j_driver is not None else get_neo4j()
+        # Every model call goes through the process-wide rate governor
+        self.governor = governor if governor is not None else get_governor()
+        # Chunk/concept rows from concurrent uploads share Neo4j transactions
+        self.writer = writer if writer is not None else get_write_coalescer(self.neo4j_driver)
+        self.recommendations = recommendations if recommendations is not None else get_recommendation_service()
+        if embeddings is not None:
+            self.embeddings = embeddings
+        if llm is not None:
+            self.llm = llm
+
+    @cached_property
+    def embeddings(self):
         # Initialize Gemini Embeddings (Requires GOOGLE_API_KEY in .env)
-        self.embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
-        self.llm = ChatGoogleGenerativeAI(temperature=0, model="gemini-1.5-flash")
+        return _shared_client("GoogleGenerativeAIEmbeddings", model=EMBEDDING_MODEL)
+
+    @cached_property
+    def llm(self):
+        return _shared_client("ChatGoogleGenerativeAI", temperature=0, model="gemini-1.5-flash")
 
+    @metrics.timed("ingest.process_file")
     async def process_file(self, user_id: str, file: UploadFile) -> Dict[str, Any]:
         """
         1. Upload Metadata to Supabase.
         2. Chunk Text.
         3. Embed & Write to Neo4j (Vector Index).
         4. Extract Knowledge Graph.
+        5. Fold the file into the related-file kNN graph.
         """
         file_id = str(uuid.uuid4())
 
+        # Turn the upload away (429) before doing any work if the model queues are full
+        self.governor.check("embed", user_id, BACKGROUND)
+
         # 1. Metadata -> Supabase
-        self._save_file_metadata(user_id, file.filename, file_id)
+        with metrics.span("ingest.supabase.save_metadata"):
+            self._save_file_metadata(user_id, file.filename, file_id)
 
         # 2. Text Extraction
-        content = await file.read()
+        with metrics.span("ingest.read_upload"):
+            content = await file.read()
         try:
             text = content.decode("utf-8")
         except UnicodeDecodeError:
             return {"status": "failed", "message": "Invalid UTF-8 encoding"}
 
         # 3. Chunking
-        chunks = self._chunk_text(text, file_id)
+        with metrics.span("ingest.chunk"):
+            chunks = self._chunk_text(text, file_id)
         if not chunks:
             return {"status": "failed", "message": "No text found"}
 
         # 4. Process Chunks (Embed + Write to Neo4j)
-        node_count = await self._ingest_chunks_to_neo4j(chunks, file_id)
+        try:
+            node_count = await self._ingest_chunks_to_neo4j(chunks, file_id, user_id)
+        except NOT_RETRYABLE:
+            # Rate limited or provider down: the client gets 429/503 + Retry-After
+            self._update_file_status(file_id, "failed")
+            raise
 
         # 5. Extract Graph (Optional/Parallel step)
-        graph_count = self._extract_knowledge_graph(chunks, file_id)
+        with metrics.span("ingest.extract_graph"):
+            graph_count = await self._extract_knowledge_graph(chunks, file_id, user_id)
+
+        with metrics.span("ingest.supabase.update_status"):
+            self._update_file_status(file_id, "indexed")
 
-        self._update_file_status(file_id, "indexed")
+        # 6. Recommendations: best effort, the file is already indexed
+        try:
+            await asyncio.to_thread(self.recommendations.update_file, file_id, self.neo4j_driver)
+        except Exception as e:
+            print(f"⚠️  Recommendation update failed for {file_id}: {e}")
 
         return {
             "status": "indexed",
@@ -69,82 +164,112 @@ class IngestionService:
             "graph_nodes_created": graph_count
         }
 
-    async def _ingest_chunks_to_neo4j(self, chunks: List[Dict[str, Any]], file_id: str) -> int:
+    async def _ingest_chunks_to_neo4j(self, chunks: List[Dict[str, Any]], file_id: str, user_id: str = "anonymous") -> int:
         """
         Generates embeddings via Gemini and writes (File)-[:CONTAINS]->(Chunk) to Neo4j.
+        Both nodes are stamped with the owner; chunks also get the owner's shard
+        label, which places them in that shard's vector index.
         """
         # Extract plain text for embedding
         texts = [c['content'] for c in chunks]
         
-        # Generate Embeddings (API Call)
+        # Generate Embeddings (API Calls, one per batch)
+        embeddings = GovernedEmbeddings(self.embeddings, self.governor, user_id, BACKGROUND)
         try:
-            vectors = await self.embeddings.aembed_documents(texts)
+            with metrics.span("ingest.embed"):
+                vectors = await self._embed_batches(texts, embeddings)
+        except NOT_RETRYABLE:
+            raise
         except Exception as e:
             print(f"Embedding failed: {e}")
             raise RuntimeError(f"Gemini Embedding failed: {e}")
 
-        # Write to Neo4j
-        cypher = """
-        UNWIND $batch AS item
-        MERGE (f:File {id: item.file_id})
-        MERGE (c:Chunk {id: item.chunk_id})
-        SET c.content = item.content,
-            c.chunk_index = item.index,
-            c.embedding = item.embedding, 
-            c.metadata = item.metadata
-        MERGE (f)-[:CONTAINS]->(c)
-        """
+        # Write to Neo4j (group-committed with other uploads' rows)
+        label = shard_label(shard_for(user_id))
+        rows = [{
+            "file_id": file_id,
+            "user_id": user_id,
+            "shard_label": label,
+            "chunk_id": str(uuid.uuid4()),
+            "index": i,
+            "content": chunk['content'],
+            "metadata": str(chunk['metadata']), # Store metadata as string or use apoc.convert.toJson
+            "embedding": vectors[i] # List of floats
+        } for i, chunk in enumerate(chunks)]
 
-        batch_data = []
-        for i, chunk in enumerate(chunks):
-            batch_data.append({
-                "file_id": file_id,
-                "chunk_id": str(uuid.uuid4()),
-                "index": i,
-                "content": chunk['content'],
-                "metadata": str(chunk['metadata']), # Store metadata as string or use apoc.convert.toJson
-                "embedding": vectors[i] # List of floats
-            })
-
-        with self.neo4j_driver.session() as session:
-            session.run(cypher, batch=batch_data)
+        with metrics.span("ingest.neo4j.write_chunks"):
+            await self.writer.write(chunks=rows)
         
         return len(chunks)
 
-    def _extract_knowledge_graph(self, chunks: List[Dict[str, Any]], file_id: str) -> int:
+    async def _embed_batches(self, texts: List[str], embeddings) -> List[List[float]]:
+        """
+        Embed in EMBED_BATCH_SIZE batches, a few at a time. Each batch gets its
+        own hedging/retries, so one flaky request doesn't fail the file.
+        """
+        resilience = get_resilience("embed")
+        semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await resilience.call(
+                    lambda: embeddings.client.aembed_documents(batch),
+                    admit=lambda: embeddings.admit(len(batch)),
+                )
+
+        tasks = [
+            asyncio.ensure_future(embed(texts[i:i + EMBED_BATCH_SIZE]))
+            for i in range(0, len(texts), EMBED_BATCH_SIZE)
+        ]
+        try:
+            batches = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return [vector for batch in batches for vector in batch]
+
+    async def _extract_knowledge_graph(self, chunks: List[Dict[str, Any]], file_id: str, user_id: str = "anonymous") -> int:
         """
         Extracts entities and links them to the existing File node.
+        LLM calls are governed (background priority), retried/hedged, and run
+        off the event loop.
         """
-        # (Same logic as before, simplified for brevity)
-        # Using the simplified Prompt approach
+        # The model only names concepts; the MERGEs are ours, so generated text
+        # never runs as Cypher and the rows can share a coalesced write
         processed = 0
-        prompt = PromptTemplate.from_template(
+        names = set()
+        prompt = _lazy("PromptTemplate").from_template(
             """Extract technical concepts from: {text}. 
-            Output Cypher MERGE statements to link nodes to File ID: {file_id}.
-            Use label :Concept and relationship :MENTIONS.
-            Ensure node keys are 'name'. 
-            Example: MERGE (c:Concept {{name: 'Docker'}}) MERGE (f:File {{id: '...'}}) MERGE (f)-[:MENTIONS]->(c)
-            Return ONLY Cypher."""
+            Return ONLY a JSON array of short concept names, e.g. ["Docker", "Kubernetes"]."""
         )
         
         # For MVP, we process only the first 3 chunks to save tokens/time
         # In prod, you'd use a queue
-        with self.neo4j_driver.session() as session:
-            for chunk in chunks[:3]: 
-                try:
-                    fmt = prompt.format(text=chunk['content'][:2000], file_id=file_id)
-                    cypher = self.llm.invoke(fmt).content
-                    # Clean code block format if LLM adds it
-                    cypher = cypher.replace("```cypher", "").replace("```", "")
-                    session.run(cypher)
-                    processed += 1
-                except Exception as e:
-                    print(f"Graph extraction error: {e}")
+        llm = GovernedLLM(self.llm, self.governor, user_id, BACKGROUND)
+        resilience = get_resilience("llm")
+        for chunk in chunks[:3]: 
+            try:
+                fmt = prompt.format(text=chunk['content'][:2000])
+                with metrics.span("ingest.llm.extract"):
+                    answer = (await resilience.call(lambda: llm.send(fmt), admit=llm.admit)).content
+                names.update(_concept_names(answer))
+                processed += 1
+            except Exception as e:
+                print(f"Graph extraction error: {e}")
+
+        if names:
+            try:
+                with metrics.span("ingest.neo4j.write_graph"):
+                    await self.writer.write(concepts=[{"file_id": file_id, "name": name} for name in sorted(names)])
+            except Exception as e:
+                print(f"Graph write error: {e}")
+                return 0
         return processed
 
     # --- Helpers ---
     def _chunk_text(self, text: str, file_id: str) -> List[Dict[str, Any]]:
-        splitter = MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_BY, strip_headers=True)
+        splitter = _lazy("MarkdownHeaderTextSplitter")(headers_to_split_on=HEADERS_TO_SPLIT_BY, strip_headers=True)
         docs = splitter.split_text(text)
         return [{"content": d.page_content, "metadata": d.metadata} for d in docs]
 
@@ -157,6 +282,18 @@ class IngestionService:
     def _update_file_status(self, file_id: str, status: str):
         self.supabase.table('files').update({"status": status}).eq('id', file_id).execute()
 
+def _concept_names(answer: str) -> List[str]:
+    """Concept names from a JSON array answer (or, leniently, Cypher-style {name: '...'} maps)."""
+    answer = answer.replace("```json", "").replace("```cypher", "").replace("```", "").strip()
+    try:
+        parsed = json.loads(answer)
+        if isinstance(parsed, list):
+            return [str(n).strip() for n in parsed if isinstance(n, (str, int, float)) and str(n).strip()][:MAX_CONCEPTS_PER_CHUNK]
+    except ValueError:
+        pass
+    return [m.group(2).strip() for m in _CYPHER_NAME.finditer(answer) if m.group(2).strip()][:MAX_CONCEPTS_PER_CHUNK]
+
+
 # --- Router Endpoint ---
 @router.post("/upload")
 async def upload_file(user_id: str = Form(...), file: UploadFile = Form(...)):
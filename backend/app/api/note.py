@@ -6,23 +6,44 @@ Endpoints:
 - POST   /api/notes          - Create new note
 - GET    /api/notes/{id}     - Retrieve note
 - PUT    /api/notes/{id}     - Update note
+- PATCH  /api/notes/{id}     - Apply a delta against a known version
+- GET    /api/notes/{id}/versions/{n} - Retrieve a past version
 - DELETE /api/notes/{id}     - Delete note
-- GET    /api/notes          - List all notes
+- GET    /api/notes          - List notes (cursor pagination, newest first)
+- POST   /api/notes/batch         - Create many notes
+- POST   /api/notes/batch-get     - Retrieve many notes
+- POST   /api/notes/batch-delete  - Delete many notes
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from typing import List, Literal, Optional
 from app.schemas.note import (
     NoteCreateRequest,
     NoteUpdateRequest,
     NoteResponse,
-    NoteContentResponse
+    NoteContentResponse,
+    NoteBatchCreateRequest,
+    NoteBatchIdsRequest,
+    NoteBatchItem,
+    NoteBatchGetItem,
+    NoteBatchResponse,
+    NoteBatchGetResponse,
+    NotePatchRequest,
+    NoteVersionResponse
 )
 from app.services.note import note_service
+from app.services.note_history import VersionConflictError
+from app.services.note_storage import InvalidKeyError
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
+def _version_id(metadata: dict) -> Optional[str]:
+    """Notes written before version tracking have no version."""
+    version = metadata.get("version")
+    return str(version) if version else None
+
+
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_note(request: NoteCreateRequest):
     """
@@ -44,12 +65,18 @@ async def create_note(request: NoteCreateRequest):
             title=metadata["title"],
             url=metadata.get("url"),
             storage_path=metadata["storage_path"],
-            version_id=None,  # Supabase versioning handles this automatically
+            version_id=_version_id(metadata),
             created_at=metadata["created_at"],
             updated_at=metadata["updated_at"],
-            size_bytes=metadata["size_bytes"]
+            size_bytes=metadata["size_bytes"],
+            stored_bytes=metadata.get("stored_bytes")
         )
     
+    except InvalidKeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -62,6 +89,92 @@ async def create_note(request: NoteCreateRequest):
         )
 
 
+def _batch_error(file_id: str, error: BaseException, item_model):
+    """Map a per-note exception to the status the single-note endpoint would return."""
+    if isinstance(error, InvalidKeyError):
+        code = status.HTTP_400_BAD_REQUEST
+    elif isinstance(error, ValueError):
+        code = status.HTTP_409_CONFLICT
+    elif isinstance(error, FileNotFoundError):
+        code = status.HTTP_404_NOT_FOUND
+    else:
+        code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    return item_model(file_id=file_id, status=code, error=str(error))
+
+
+@router.post("/batch", response_model=NoteBatchResponse)
+async def batch_create_notes(request: NoteBatchCreateRequest):
+    """
+    Create many notes in one request (e.g. syncing an offline vault).
+    
+    Storage writes fan out with bounded concurrency; each note gets its own
+    status (201, 409 or 500) so partial failures can be retried.
+    """
+    results = await note_service.batch_create([note.model_dump() for note in request.notes])
+    
+    items = []
+    for note, result in zip(request.notes, results):
+        if isinstance(result, BaseException):
+            items.append(_batch_error(note.file_id, result, NoteBatchItem))
+        else:
+            items.append(NoteBatchItem(
+                file_id=note.file_id,
+                status=status.HTTP_201_CREATED,
+                note=NoteResponse(**result, version_id=_version_id(result))
+            ))
+    
+    succeeded = sum(1 for item in items if item.error is None)
+    return NoteBatchResponse(results=items, succeeded=succeeded, failed=len(items) - succeeded)
+
+
+@router.post("/batch-get", response_model=NoteBatchGetResponse)
+async def batch_get_notes(request: NoteBatchIdsRequest):
+    """
+    Retrieve many notes (content + metadata) in one request.
+    Each note gets its own status (200, 404 or 500).
+    """
+    results = await note_service.batch_get(request.file_ids)
+    
+    items = []
+    for file_id, result in zip(request.file_ids, results):
+        if isinstance(result, BaseException):
+            items.append(_batch_error(file_id, result, NoteBatchGetItem))
+        else:
+            items.append(NoteBatchGetItem(
+                file_id=file_id,
+                status=status.HTTP_200_OK,
+                note=NoteContentResponse(**result, version_id=_version_id(result))
+            ))
+    
+    succeeded = sum(1 for item in items if item.error is None)
+    return NoteBatchGetResponse(results=items, succeeded=succeeded, failed=len(items) - succeeded)
+
+
+@router.post("/batch-delete", response_model=NoteBatchResponse)
+async def batch_delete_notes(request: NoteBatchIdsRequest):
+    """
+    Delete many notes in one request. Each note gets 204, or 404 if
+    nothing was stored under its file_id.
+    """
+    try:
+        deleted = await note_service.batch_delete(request.file_ids)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete notes: {str(e)}"
+        )
+    
+    items = [
+        NoteBatchItem(file_id=file_id, status=status.HTTP_204_NO_CONTENT)
+        if deleted.get(file_id)
+        else NoteBatchItem(file_id=file_id, status=status.HTTP_404_NOT_FOUND, error="Note not found")
+        for file_id in request.file_ids
+    ]
+    
+    succeeded = sum(1 for item in items if item.error is None)
+    return NoteBatchResponse(results=items, succeeded=succeeded, failed=len(items) - succeeded)
+
+
 @router.get("/{file_id}", response_model=NoteContentResponse)
 async def get_note(file_id: str):
     """
@@ -76,10 +189,11 @@ async def get_note(file_id: str):
             content=data["content"],
             url=data.get("url"),
             storage_path=data["storage_path"],
-            version_id=None,
+            version_id=_version_id(data),
             created_at=data["created_at"],
             updated_at=data["updated_at"],
-            size_bytes=data["size_bytes"]
+            size_bytes=data["size_bytes"],
+            stored_bytes=data.get("stored_bytes")
         )
     
     except FileNotFoundError:
@@ -97,7 +211,7 @@ async def get_note(file_id: str):
 @router.put("/{file_id}", response_model=NoteResponse)
 async def update_note(file_id: str, request: NoteUpdateRequest):
     """
-    Update an existing note. Supabase Storage automatically versions the file.
+    Update an existing note. Content changes create a new version.
     
     You can update the title, content, or both.
     """
@@ -113,12 +227,19 @@ async def update_note(file_id: str, request: NoteUpdateRequest):
             title=metadata["title"],
             url=metadata.get("url"),
             storage_path=metadata["storage_path"],
-            version_id=None,
+            version_id=_version_id(metadata),
             created_at=metadata["created_at"],
             updated_at=metadata["updated_at"],
-            size_bytes=metadata["size_bytes"]
+            size_bytes=metadata["size_bytes"],
+            stored_bytes=metadata.get("stored_bytes")
         )
     
+    except VersionConflictError as e:
+        # Other workers kept taking the next version (see NoteService.update_note)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -131,6 +252,76 @@ async def update_note(file_id: str, request: NoteUpdateRequest):
         )
 
 
+@router.patch("/{file_id}", response_model=NoteResponse)
+async def patch_note(file_id: str, request: NotePatchRequest):
+    """
+    Apply a small edit without resending the whole note.
+    
+    The ops must be made against `base_version`; if the note has moved on
+    since, the request is rejected with 409 and the client should re-fetch.
+    """
+    try:
+        metadata = await note_service.patch_note(
+            file_id=file_id,
+            base_version=request.base_version,
+            ops=[op.model_dump() for op in request.ops],
+            title=request.title
+        )
+        
+        return NoteResponse(
+            file_id=metadata["file_id"],
+            title=metadata["title"],
+            url=metadata.get("url"),
+            storage_path=metadata["storage_path"],
+            version_id=_version_id(metadata),
+            created_at=metadata["created_at"],
+            updated_at=metadata["updated_at"],
+            size_bytes=metadata["size_bytes"],
+            stored_bytes=metadata.get("stored_bytes")
+        )
+    
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(e)
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Note with file_id '{file_id}' not found"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to patch note: {str(e)}"
+        )
+
+
+@router.get("/{file_id}/versions/{version}", response_model=NoteVersionResponse)
+async def get_note_version(file_id: str, version: int):
+    """
+    Retrieve the content of a past version (1 = as created).
+    """
+    try:
+        return NoteVersionResponse(**await note_service.get_note_version(file_id, version))
+    
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version {version} of note '{file_id}' not found"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve note version: {str(e)}"
+        )
+
+
 @router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_note(file_id: str):
     """
@@ -143,6 +334,11 @@ async def delete_note(file_id: str):
         await note_service.delete_note(file_id)
         return None
     
+    except InvalidKeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except FileNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -156,14 +352,28 @@ async def delete_note(file_id: str):
 
 
 @router.get("", response_model=List[NoteResponse])
-async def list_notes(limit: int = 100):
+async def list_notes(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    order: Literal["desc", "asc"] = "desc"
+):
     """
-    List all notes (metadata only, no content).
+    List notes (metadata only, no content), sorted by updated_at.
     
-    Useful for displaying a list of available notes in the UI.
+    Useful for displaying a list of available notes in the UI. When more
+    notes are available, the `X-Next-Cursor` response header holds the
+    cursor to pass for the next page.
     """
     try:
-        notes = await note_service.list_notes(limit=limit)
+        notes, next_cursor = await note_service.list_notes(
+            limit=limit,
+            cursor=cursor,
+            descending=order == "desc"
+        )
+        
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         return [
             NoteResponse(
@@ -171,16 +381,22 @@ async def list_notes(limit: int = 100):
                 title=note["title"],
                 url=note.get("url"),
                 storage_path=note["storage_path"],
-                version_id=None,
+                version_id=_version_id(note),
                 created_at=note["created_at"],
                 updated_at=note["updated_at"],
-                size_bytes=note["size_bytes"]
+                size_bytes=note["size_bytes"],
+                stored_bytes=note.get("stored_bytes")
             )
             for note in notes
         ]
     
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to list notes: {str(e)}"
-        )
\ No newline at end of file
+        )
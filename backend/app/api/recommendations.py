@@ -0,0 +1,46 @@
+"""
+FastAPI endpoints for related-file recommendations.
+Location: backend/app/api/recommendations.py
+
+Both endpoints read the precomputed kNN graph (app/services/recommendations.py);
+neither touches Neo4j or the embedding model.
+
+Endpoints:
+- GET /api/recommendations?user_id=...&seed=...  - Recommendations page
+- GET /api/recommendations/{file_id}             - "Related to what you're reading"
+"""
+
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List
+from app.schemas.recommendations import RecommendationsResponse, Recommendation, RelatedFilesResponse
+from app.services.recommendations import get_recommendation_service
+
+router = APIRouter()
+
+
+@router.get("", response_model=RecommendationsResponse)
+async def recommendations_for_user(
+    user_id: str = Query(..., min_length=1),
+    seed: List[str] = Query([], description="Recently read file ids; defaults to the user's newest files"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Neighbours of the seed files, merged and ranked, excluding the seeds themselves."""
+    ranked = get_recommendation_service().store.for_user(user_id, seed[:20], limit=limit)
+    return RecommendationsResponse(
+        user_id=user_id,
+        recommendations=[Recommendation(file_id=file_id, score=score) for file_id, score in ranked]
+    )
+
+
+@router.get("/{file_id}", response_model=RelatedFilesResponse)
+async def related_files(file_id: str, limit: int = Query(10, ge=1, le=50)):
+    related = get_recommendation_service().store.related(file_id, limit=limit)
+    if related is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No recommendations for file {file_id}"
+        )
+    return RelatedFilesResponse(
+        file_id=file_id,
+        related=[Recommendation(file_id=other, score=score) for other, score in related]
+    )
@@ -1,9 +1,12 @@
 from fastapi import APIRouter
-from app.api import ingestion, chat, graph, note
+from app.api import ingestion, chat, graph, note, search, events, recommendations
 
 api_router = APIRouter()
 
 api_router.include_router(ingestion.router, prefix="/ingestion", tags=["Ingestion"])
 api_router.include_router(chat.router, prefix="/chat", tags=["Chat"])
 api_router.include_router(graph.router, prefix="/graph", tags=["Knowledge Graph"])
-api_router.include_router(note.router, tags=["Notes"])
\ No newline at end of file
+api_router.include_router(note.router, tags=["Notes"])
+api_router.include_router(search.router, prefix="/search", tags=["Search"])
+api_router.include_router(events.router, prefix="/events", tags=["Events"])
+api_router.include_router(recommendations.router, prefix="/recommendations", tags=["Recommendations"])
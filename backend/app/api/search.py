@@ -0,0 +1,51 @@
+"""
+FastAPI endpoint for full-text note search.
+Location: backend/app/api/search.py
+
+Endpoints:
+- GET /api/search?q=...  - Ranked matches over note titles and bodies
+"""
+
+import time
+from fastapi import APIRouter, HTTPException, Query, status
+from app.schemas.search import SearchResponse, SearchResult
+from app.services.note import note_service
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchResponse)
+async def search_notes(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Search notes. Words must all match; use "quotes" for phrases, a trailing
+    * for prefixes and title:word to match titles only.
+    """
+    started = time.perf_counter()
+    try:
+        results, total = await note_service.search_notes(q, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Search failed: {str(e)}"
+        )
+    
+    return SearchResponse(
+        query=q,
+        total=total,
+        results=[SearchResult(**result) for result in results],
+        took_ms=round((time.perf_counter() - started) * 1000, 3)
+    )
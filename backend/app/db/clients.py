@@ -1,16 +1,22 @@
 import os
-from supabase import create_client, Client
-from neo4j import GraphDatabase, Driver
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
+
+# supabase and neo4j are imported on first use: together they add ~0.4s to
+# the app's import time, which every cold start would pay up front.
+if TYPE_CHECKING:
+    from supabase import Client
+    from neo4j import Driver
 
 # Singletons for connection management
-_supabase: Optional[Client] = None
-_neo4j_driver: Optional[Driver] = None
+_supabase: Optional["Client"] = None
+_neo4j_driver: Optional["Driver"] = None
 
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """Initializes and returns the singleton Supabase client."""
     global _supabase
     if _supabase is None:
+        from supabase import create_client
+
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
         if not url or not key:
@@ -19,10 +25,12 @@ def get_supabase() -> Client:
         _supabase = create_client(url, key)
     return _supabase
 
-def get_neo4j() -> Driver:
+def get_neo4j() -> "Driver":
     """Initializes and returns the singleton Neo4j driver."""
     global _neo4j_driver
     if _neo4j_driver is None:
+        from neo4j import GraphDatabase
+
         uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
         user = os.getenv("NEO4J_USER", "neo4j")
         # Use a sensible, explicit default password in case .env is missed
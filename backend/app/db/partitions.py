@@ -0,0 +1,115 @@
+"""
+Per-user partitioning of File/Chunk nodes and their vector indexes.
+Location: backend/app/db/partitions.py
+
+Every File and Chunk carries its owner's `user_id`. Chunks additionally get
+one of CHUNK_SHARDS shard labels (:ChunkShard00, :ChunkShard01, ...) chosen
+by a stable hash of the owner, and each shard label has its own vector index
+(chunk_embedding_s00, ...). A user's chunks therefore always live in one
+shard, so retrieval queries an index holding ~1/CHUNK_SHARDS of the tenant
+base instead of everyone's vectors (see app/services/retrieval.py).
+
+CHUNK_SHARDS is fixed when schema migration 4 runs; changing it later needs
+the shard indexes dropped and the chunks re-labelled with this job.
+
+Chunks written before partitioning have no owner. The backfill job copies
+ownership from the Supabase `files` table, one keyset page at a time:
+    uv run python -m app.db.partitions
+
+Env:
+- CHUNK_SHARDS: number of shard labels / vector indexes (default 16)
+"""
+
+import argparse
+import os
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+from dotenv import load_dotenv
+
+from app.db.clients import get_neo4j, get_supabase
+
+CHUNK_SHARDS = int(os.getenv("CHUNK_SHARDS", "16"))
+SHARD_INDEX_PREFIX = "chunk_embedding_s"
+BACKFILL_BATCH_SIZE = 500
+# PostgREST caps a response (1000 rows by default), so `files` is read in pages
+OWNER_PAGE_SIZE = 1000
+
+
+def shard_for(user_id: str) -> int:
+    """Stable shard of a user (crc32, so it survives restarts and PYTHONHASHSEED)."""
+    return zlib.crc32(user_id.encode("utf-8")) % CHUNK_SHARDS
+
+
+def shard_label(shard: int) -> str:
+    return f"ChunkShard{shard:02d}"
+
+
+def shard_index_name(shard: int) -> str:
+    return f"{SHARD_INDEX_PREFIX}{shard:02d}"
+
+
+def shard_index_names() -> List[str]:
+    return [shard_index_name(shard) for shard in range(CHUNK_SHARDS)]
+
+
+def backfill_owners(session, owners: Dict[str, str]) -> int:
+    """
+    Stamp user_id and the shard label on files/chunks that have none.
+    `owners` maps file_id -> user_id. Returns the number of chunks updated.
+    """
+    by_shard: Dict[int, List[Dict[str, str]]] = defaultdict(list)
+    for file_id, user_id in owners.items():
+        by_shard[shard_for(user_id)].append({"file_id": file_id, "user_id": user_id})
+
+    updated = 0
+    for shard, rows in sorted(by_shard.items()):
+        # Labels cannot be parameters; the shard label is generated, never user input
+        cypher = f"""
+        UNWIND $rows AS row
+        MATCH (f:File {{id: row.file_id}})
+        SET f.user_id = row.user_id
+        WITH f, row
+        MATCH (f)-[:CONTAINS]->(c:Chunk)
+        WHERE c.user_id IS NULL
+        SET c.user_id = row.user_id, c:{shard_label(shard)}
+        RETURN count(c) AS updated
+        """
+        for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+            record = session.run(cypher, rows=rows[start:start + BACKFILL_BATCH_SIZE]).single()
+            updated += record["updated"] if record else 0
+    return updated
+
+
+def load_owners(supabase=None, page_size: int = OWNER_PAGE_SIZE) -> Iterator[Dict[str, str]]:
+    """Yield file_id -> user_id maps, one page of `files` (keyset on id) at a time."""
+    supabase = supabase or get_supabase()
+    after = None
+    while True:
+        query = supabase.table("files").select("id,user_id").order("id").limit(page_size)
+        if after is not None:
+            query = query.gt("id", after)
+        rows = query.execute().data or []
+        # A short page is not the end: the server may cap below page_size
+        if not rows:
+            return
+        after = rows[-1]["id"]
+        yield {row["id"]: row["user_id"] for row in rows if row.get("user_id")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assign owners/shards to chunks ingested before partitioning")
+    parser.parse_args()
+
+    load_dotenv()
+    files = updated = 0
+    with get_neo4j().session() as session:
+        for owners in load_owners():
+            updated += backfill_owners(session, owners)
+            files += len(owners)
+    print(f"✅ Partition backfill: {updated} chunk(s) across {files} file(s)")
+
+
+if __name__ == "__main__":
+    main()
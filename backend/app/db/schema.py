@@ -0,0 +1,231 @@
+"""
+Versioned Neo4j schema migrations.
+Location: backend/app/db/schema.py
+
+Creates the constraints and indexes the ingestion write path relies on:
+- Uniqueness constraints backing every MERGE key (File.id, Chunk.id, Concept.name)
+- Lookup indexes for analytics properties
+- Vector index on Chunk.embedding (v3), replaced by per-shard vector
+  indexes plus user_id indexes in v4 (see app/db/partitions.py)
+
+Applied versions are recorded as (:SchemaMigration {version}) nodes, so each
+migration runs once per database. `bootstrap_schema()` is called from the app
+lifespan at startup. Index state is cached in `last_status` by the bootstrap
+and by `watch_schema()`, so /health does not run SHOW INDEXES on every probe.
+
+Env:
+- NEO4J_SCHEMA_STATUS_SECONDS: how often the cached index status is refreshed (default 60)
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.db.clients import get_neo4j
+from app.db.partitions import CHUNK_SHARDS, shard_index_name, shard_index_names, shard_label
+
+# Gemini models/embedding-001 returns 768-dimensional vectors
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "768"))
+VECTOR_INDEX_NAME = "chunk_embedding"
+
+
+def vector_index_statement(name: str, label: str) -> str:
+    return f"""
+            CREATE VECTOR INDEX {name} IF NOT EXISTS
+            FOR (c:{label}) ON (c.embedding)
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: {EMBEDDING_DIMENSIONS},
+                `vector.similarity_function`: 'cosine'
+            }}}}
+            """
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: List[str]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Uniqueness constraints for ingestion MERGE keys",
+        statements=[
+            "CREATE CONSTRAINT file_id_unique IF NOT EXISTS FOR (f:File) REQUIRE f.id IS UNIQUE",
+            "CREATE CONSTRAINT chunk_id_unique IF NOT EXISTS FOR (c:Chunk) REQUIRE c.id IS UNIQUE",
+            "CREATE CONSTRAINT concept_name_unique IF NOT EXISTS FOR (c:Concept) REQUIRE c.name IS UNIQUE",
+        ],
+    ),
+    Migration(
+        version=2,
+        description="Lookup indexes for graph analytics properties",
+        statements=[
+            "CREATE INDEX file_community IF NOT EXISTS FOR (f:File) ON (f.community)",
+            "CREATE INDEX concept_community IF NOT EXISTS FOR (c:Concept) ON (c.community)",
+        ],
+    ),
+    Migration(
+        version=3,
+        description="Vector index on Chunk.embedding",
+        statements=[vector_index_statement(VECTOR_INDEX_NAME, "Chunk")],
+    ),
+    Migration(
+        version=4,
+        description="Per-user partitioning: user_id indexes and sharded vector indexes",
+        statements=[
+            "CREATE INDEX file_user_id IF NOT EXISTS FOR (f:File) ON (f.user_id)",
+            "CREATE INDEX chunk_user_id IF NOT EXISTS FOR (c:Chunk) ON (c.user_id)",
+            *[vector_index_statement(shard_index_name(s), shard_label(s)) for s in range(CHUNK_SHARDS)],
+            # Every chunk lives in exactly one shard index now; keeping the
+            # global index would embed-index each vector twice.
+            f"DROP INDEX {VECTOR_INDEX_NAME} IF EXISTS",
+        ],
+    ),
+]
+
+# Every index/constraint name the migrations above are expected to leave behind
+EXPECTED_INDEXES = [
+    "file_id_unique",
+    "chunk_id_unique",
+    "concept_name_unique",
+    "file_community",
+    "concept_community",
+    "file_user_id",
+    "chunk_user_id",
+    *shard_index_names(),
+]
+
+# Result of the last bootstrap run, reported on /health
+last_report: Optional[Dict[str, Any]] = None
+# Last index check (indexes, problems, checked_at or error), served by /health
+last_status: Optional[Dict[str, Any]] = None
+
+
+def applied_versions(session) -> List[int]:
+    result = session.run("MATCH (m:SchemaMigration) RETURN m.version AS version")
+    return sorted(record["version"] for record in result)
+
+
+def apply_migrations(session, migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Apply pending migrations in version order. Stops at the first failure so a
+    later migration never runs on top of a missing earlier one.
+    """
+    done = set(applied_versions(session))
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        # Schema statements cannot share a transaction with writes; run each
+        # in its own auto-commit transaction.
+        for statement in migration.statements:
+            session.run(statement)
+        session.run(
+            "MERGE (m:SchemaMigration {version: $version}) "
+            "SET m.description = $description, m.applied_at = $applied_at",
+            version=migration.version,
+            description=migration.description,
+            applied_at=datetime.now(timezone.utc).isoformat(),
+        )
+        applied.append(migration.version)
+        print(f"✅ Applied Neo4j schema migration {migration.version}: {migration.description}")
+    return applied
+
+
+def index_status(session) -> Dict[str, Dict[str, Any]]:
+    """State and population progress of every index, keyed by name."""
+    result = session.run(
+        "SHOW INDEXES YIELD name, type, state, populationPercent, options"
+    )
+    status = {}
+    for record in result:
+        entry = {
+            "type": record["type"],
+            "state": record["state"],
+            "population_percent": record["populationPercent"],
+        }
+        if record["type"] == "VECTOR":
+            config = (record["options"] or {}).get("indexConfig", {})
+            entry["dimensions"] = config.get("vector.dimensions")
+        status[record["name"]] = entry
+    return status
+
+
+def verify_schema(status: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Return a list of problems with the live schema (empty when healthy)."""
+    problems = []
+    for name in EXPECTED_INDEXES:
+        if name not in status:
+            problems.append(f"missing index or constraint: {name}")
+        elif status[name]["state"] == "FAILED":
+            problems.append(f"index {name} is in FAILED state")
+
+    for name in shard_index_names():
+        vector = status.get(name)
+        if vector and vector.get("dimensions") not in (None, EMBEDDING_DIMENSIONS):
+            problems.append(
+                f"{name} has {vector['dimensions']} dimensions, "
+                f"expected {EMBEDDING_DIMENSIONS} (drop the index to recreate it)"
+            )
+    return problems
+
+
+def bootstrap_schema(driver=None) -> Dict[str, Any]:
+    """
+    Apply pending migrations and verify the result. Never raises: a database
+    that is unreachable at startup is reported on /health instead.
+    """
+    global last_report
+    try:
+        driver = driver or get_neo4j()
+        with driver.session() as session:
+            applied = apply_migrations(session)
+            status = index_status(session)
+            versions = applied_versions(session)
+        problems = verify_schema(status)
+        _record_status(status, problems)
+        last_report = {
+            "schema_version": max(versions, default=0),
+            "applied": applied,
+            "problems": problems,
+        }
+        for problem in problems:
+            print(f"⚠️  Neo4j schema: {problem}")
+    except Exception as e:
+        print(f"⚠️  Neo4j schema bootstrap failed: {e}")
+        last_report = {"schema_version": None, "applied": [], "problems": [str(e)]}
+    return last_report
+
+
+def _record_status(indexes: Dict[str, Dict[str, Any]], problems: List[str]) -> Dict[str, Any]:
+    global last_status
+    last_status = {
+        "indexes": indexes,
+        "problems": problems,
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+    }
+    return last_status
+
+
+def refresh_status(driver=None) -> Dict[str, Any]:
+    """Query the live index state into last_status. Never raises."""
+    global last_status
+    try:
+        driver = driver or get_neo4j()
+        with driver.session() as session:
+            indexes = index_status(session)
+        return _record_status(indexes, verify_schema(indexes))
+    except Exception as e:
+        last_status = {"error": str(e), "checked_at": datetime.now(timezone.utc).isoformat()}
+        return last_status
+
+
+async def watch_schema(interval: Optional[float] = None):
+    """Keep last_status current (vector indexes populate after startup); runs for the app's lifetime."""
+    interval = interval or float(os.getenv("NEO4J_SCHEMA_STATUS_SECONDS", "60"))
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(refresh_status)
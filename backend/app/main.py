@@ -1,14 +1,94 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+from app.api import ingestion
 from app.api.router import api_router
+from app.db import schema
+from app.db.clients import get_neo4j, get_supabase
+from app.services import metrics
+from app.services.governor import GovernorRejected, get_governor
+from app.services.resilience import CircuitOpenError, resilience_stats
+from app.services.write_coalescer import coalescer_stats
+from app.services.note import get_note_service, note_service_initialized, watch_search
+from app.services.events import event_service_initialized, get_event_service
+from app.services.recommendations import get_recommendation_service, recommendation_service_initialized, watch_store
 
 load_dotenv()
 
+# Heavy clients and imports are created on first use. APP_WARMUP opts in to
+# building them during startup instead ("all" or a comma-separated subset),
+# so the first requests after a cold start don't pay for it.
+WARMUP_STEPS = {
+    "notes": get_note_service,
+    "ingestion": ingestion.preload,
+    "supabase": get_supabase,
+    "neo4j": lambda: get_neo4j().verify_connectivity(),
+    "recommendations": get_recommendation_service,
+}
+
+
+def warm_up(steps: list[str]) -> dict:
+    """Run warm-up steps; failures are logged, never raised. Returns seconds per step."""
+    timings = {}
+    for step in steps:
+        started = time.perf_counter()
+        try:
+            WARMUP_STEPS[step]()
+            timings[step] = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            timings[step] = None
+            print(f"⚠️  Warm-up step '{step}' failed: {e}")
+    print(f"✅ Warm-up finished: {timings}")
+    return timings
+
+
+def warmup_steps() -> list[str]:
+    setting = os.getenv("APP_WARMUP", "").strip().lower()
+    if setting in ("", "false", "none"):
+        return []
+    if setting in ("all", "true"):
+        return list(WARMUP_STEPS)
+    return [step.strip() for step in setting.split(",") if step.strip() in WARMUP_STEPS]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create/verify Neo4j constraints and indexes before serving traffic.
+    # Failures are logged and surfaced on /health rather than blocking startup.
+    if os.getenv("NEO4J_SCHEMA_BOOTSTRAP", "true").lower() == "true":
+        await asyncio.to_thread(schema.bootstrap_schema)
+    steps = warmup_steps()
+    if steps:
+        await asyncio.to_thread(warm_up, steps)
+    # Activity events are buffered in memory; flush periodically and on shutdown
+    flusher = asyncio.create_task(get_event_service().run())
+    # The recommendation store file is written by its rebuild job; pick up new ones
+    watcher = asyncio.create_task(watch_store())
+    # The note search index is node-local; catch up with other workers' writes
+    search_sync = asyncio.create_task(watch_search())
+    # /health serves this cached index status instead of querying Neo4j per probe
+    schema_watch = asyncio.create_task(schema.watch_schema())
+    try:
+        yield
+    finally:
+        flusher.cancel()
+        watcher.cancel()
+        search_sync.cancel()
+        schema_watch.cancel()
+        if event_service_initialized():
+            await get_event_service().flush()
+
+
 app = FastAPI(
     title="Real MVP API",
     description="Hybrid RAG (Vector + Graph) Platform",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration - Allow frontend to access API
@@ -22,16 +102,83 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include the V1 router (includes notes router via router.py)
 app.include_router(api_router, prefix="/api")
 
 
+@app.exception_handler(GovernorRejected)
+async def governor_rejected(request: Request, exc: GovernorRejected):
+    """Model capacity exhausted: tell the client when to come back."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "resource": exc.resource},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open(request: Request, exc: CircuitOpenError):
+    """Model provider failing: fail fast until the breaker's probe succeeds."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "resource": exc.resource},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @app.get("/")
 def root():
     return {"status": "ok", "system": "online", "app": "Karpathy V1"}
 
 @app.get("/health")
-def health_check():
-    return {"status": "ok", "system": "online"}
+def health_check(deep: bool = False):
+    """Liveness plus cached Neo4j index status; ?deep=true queries the indexes live."""
+    # Don't build the note service just to report on it
+    note_cache = get_note_service().cache.stats() if note_service_initialized() else None
+    health = {"status": "ok", "system": "online", "note_cache": note_cache}
+    status = schema.last_status
+    if deep or status is None:
+        status = schema.refresh_status()
+    if "error" in status:
+        health["status"] = "degraded"
+        health["neo4j"] = {"error": status["error"], "checked_at": status["checked_at"]}
+    else:
+        health["neo4j"] = {
+            "schema_version": (schema.last_report or {}).get("schema_version"),
+            **status,
+        }
+    return health
+
+
+# Monotonic keys of each stats() dict; the rest (waiting, buffered, pending_rows, ...) are levels
+CACHE_COUNTERS = ("hits", "misses", "revalidated", "stale", "evictions")
+GOVERNOR_COUNTERS = ("admitted", "rejected")
+MODEL_COUNTERS = ("calls", "retried", "hedged", "hedge_wins", "breaker_trips")
+EVENT_COUNTERS = ("received", "rejected", "duplicates", "flushes", "flush_failures", "flushed_events", "dropped")
+COALESCER_COUNTERS = ("writes", "batches", "rows", "isolated_retries")
+RECOMMENDATION_COUNTERS = ("updates", "reloads")
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Stage latency histograms plus note cache, governor and model call counters, in Prometheus text format."""
+    if not metrics.ENABLED:
+        return Response(status_code=404)
+    extra = []
+    if note_service_initialized():
+        extra = metrics.render_gauges("note_cache", get_note_service().cache.stats(), counters=CACHE_COUNTERS)
+    for resource, stats in get_governor().stats().items():
+        extra += metrics.render_gauges(f"governor_{resource}", stats, counters=GOVERNOR_COUNTERS)
+    for resource, stats in resilience_stats().items():
+        extra += metrics.render_gauges(f"model_{resource}", stats, counters=MODEL_COUNTERS)
+    if event_service_initialized():
+        extra += metrics.render_gauges("events", get_event_service().stats(), counters=EVENT_COUNTERS)
+    extra += metrics.render_gauges("neo4j_write_coalescer", coalescer_stats(), counters=COALESCER_COUNTERS)
+    if recommendation_service_initialized():
+        extra += metrics.render_gauges(
+            "recommendations", get_recommendation_service().stats(), counters=RECOMMENDATION_COUNTERS
+        )
+    return Response(metrics.render(extra), media_type=metrics.CONTENT_TYPE)
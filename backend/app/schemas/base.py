@@ -6,6 +6,7 @@ class ChatRequest(BaseModel):
     query: str
     mode: str = "execution"  # execution, curiosity, learning
     context_filter: Optional[List[str]] = None
+    user_id: Optional[str] = None  # Scopes retrieval to this user's files
 
 class ChatResponse(BaseModel):
     response: str
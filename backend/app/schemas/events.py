@@ -0,0 +1,67 @@
+"""
+Pydantic models for reading-activity events and their rollups.
+Location: backend/app/schemas/events.py
+"""
+
+from datetime import date, datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+MAX_EVENTS_PER_BATCH = 500
+
+
+class ActivityEvent(BaseModel):
+    """One client-side activity sample, e.g. 30s of reading a note."""
+    type: str = Field(..., min_length=1, max_length=50, description="read, focus, highlight, ...")
+    occurred_at: datetime
+    duration_ms: int = Field(0, ge=0, description="Clamped server-side to EVENTS_MAX_DURATION_SECONDS")
+    topic: Optional[str] = Field(None, max_length=200)
+    file_id: Optional[str] = None
+
+
+class EventBatchRequest(BaseModel):
+    """Events buffered by the client and sent together."""
+    user_id: str = Field(..., min_length=1)
+    batch_id: Optional[str] = Field(None, description="Client-generated id; resent batches are ignored")
+    events: List[ActivityEvent] = Field(..., min_length=1, max_length=MAX_EVENTS_PER_BATCH)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "user_id": "550e8400-e29b-41d4-a716-446655440000",
+                "batch_id": "b-1718000000-7",
+                "events": [{
+                    "type": "read",
+                    "occurred_at": "2025-01-01T12:00:00Z",
+                    "duration_ms": 30000,
+                    "topic": "Graph Databases",
+                    "file_id": "550e8400-e29b-41d4-a716-446655440001"
+                }]
+            }
+        }
+
+
+class EventBatchResponse(BaseModel):
+    accepted: int
+    rejected: int = Field(0, description="Events outside the accepted time window")
+    duplicate: bool = False
+
+
+class DailyActivity(BaseModel):
+    day: date
+    seconds: float
+    events: int
+
+
+class TopicActivity(BaseModel):
+    topic: str
+    seconds: float
+    events: int
+
+
+class ActivitySummaryResponse(BaseModel):
+    """Rollups for the time-spent and insights dashboards (includes unflushed events)."""
+    user_id: str
+    days: List[DailyActivity]
+    topics: List[TopicActivity]
+    total_seconds: float
@@ -4,7 +4,7 @@ Location: backend/app/models/note.py
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 
 class NoteCreateRequest(BaseModel):
@@ -48,7 +48,8 @@ class NoteResponse(BaseModel):
     version_id: Optional[str] = Field(None, description="S3 version ID if versioning enabled")
     created_at: str  # ISO datetime string
     updated_at: str  # ISO datetime string
-    size_bytes: int
+    size_bytes: int = Field(..., description="Logical (uncompressed) UTF-8 size")
+    stored_bytes: Optional[int] = Field(None, description="Size at rest after compression")
     
     class Config:
         json_schema_extra = {
@@ -60,7 +61,8 @@ class NoteResponse(BaseModel):
                 "version_id": "v1.0.0",
                 "created_at": "2024-11-23T10:00:00Z",
                 "updated_at": "2024-11-23T10:00:00Z",
-                "size_bytes": 1024
+                "size_bytes": 1024,
+                "stored_bytes": 412
             }
         }
 
@@ -75,4 +77,76 @@ class NoteContentResponse(BaseModel):
     version_id: Optional[str] = None
     created_at: str  # ISO datetime string
     updated_at: str  # ISO datetime string
-    size_bytes: int
\ No newline at end of file
+    size_bytes: int
+    stored_bytes: Optional[int] = None
+
+# --- Batch operations ---
+MAX_BATCH_SIZE = 500
+
+
+class NoteBatchCreateRequest(BaseModel):
+    """Request body for creating many notes in one call."""
+    notes: List[NoteCreateRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class NoteBatchIdsRequest(BaseModel):
+    """Request body for fetching or deleting many notes in one call."""
+    file_ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class NoteBatchItem(BaseModel):
+    """Per-note outcome of a batch create/delete. `status` is an HTTP status code."""
+    file_id: str
+    status: int
+    note: Optional[NoteResponse] = None
+    error: Optional[str] = None
+
+
+class NoteBatchGetItem(BaseModel):
+    """Per-note outcome of a batch fetch."""
+    file_id: str
+    status: int
+    note: Optional[NoteContentResponse] = None
+    error: Optional[str] = None
+
+
+class NoteBatchResponse(BaseModel):
+    results: List[NoteBatchItem]
+    succeeded: int
+    failed: int
+
+
+class NoteBatchGetResponse(BaseModel):
+    results: List[NoteBatchGetItem]
+    succeeded: int
+    failed: int
+
+
+# --- Patches and version history ---
+class NotePatchOp(BaseModel):
+    """Replace base[start:end] with text (offsets are Unicode code points)."""
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+
+class NotePatchRequest(BaseModel):
+    """Request body for a delta update against a known version."""
+    base_version: int = Field(..., ge=0, description="Version the edits were made against")
+    ops: List[NotePatchOp] = Field(..., description="Non-overlapping edits against base_version")
+    title: Optional[str] = Field(None, min_length=1, max_length=500)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "base_version": 3,
+                "ops": [{"start": 12, "end": 17, "text": "networks"}]
+            }
+        }
+
+
+class NoteVersionResponse(BaseModel):
+    """Content of one historical version of a note."""
+    file_id: str
+    version: int
+    content: str
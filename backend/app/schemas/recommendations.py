@@ -0,0 +1,22 @@
+"""
+Pydantic models for the recommendation endpoints.
+Location: backend/app/schemas/recommendations.py
+"""
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class Recommendation(BaseModel):
+    file_id: str
+    score: float = Field(..., description="Blended embedding cosine + concept Jaccard, higher is closer")
+
+
+class RelatedFilesResponse(BaseModel):
+    file_id: str
+    related: List[Recommendation]
+
+
+class RecommendationsResponse(BaseModel):
+    user_id: str
+    recommendations: List[Recommendation]
@@ -0,0 +1,41 @@
+"""
+Pydantic models for the search endpoint.
+Location: backend/app/schemas/search.py
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class SearchResult(BaseModel):
+    """One matching note. `title` and `snippet` wrap matched terms in <mark></mark>."""
+    file_id: str
+    title: str
+    url: Optional[str] = None
+    updated_at: Optional[str] = None
+    snippet: str
+    score: float = Field(..., description="BM25 relevance, higher is better")
+
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[SearchResult]
+    took_ms: float
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "query": "\"gradient descent\" backprop*",
+                "total": 1,
+                "results": [{
+                    "file_id": "550e8400-e29b-41d4-a716-446655440000",
+                    "title": "Introduction to Neural Networks",
+                    "url": "https://en.wikipedia.org/wiki/Neural_network",
+                    "updated_at": "2025-01-01T12:00:00",
+                    "snippet": "…weights are learned with <mark>gradient</mark> <mark>descent</mark> and <mark>backpropagation</mark>…",
+                    "score": 7.42
+                }],
+                "took_ms": 1.8
+            }
+        }
@@ -0,0 +1,345 @@
+"""
+Buffered reading-activity events with incrementally maintained rollups.
+Location: backend/app/services/events.py
+
+POST /api/events hands a client batch to `EventService.record()`, which only
+touches memory:
+- raw events are appended to a buffer (bounded by EVENTS_BUFFER_MAX; when
+  full, batches are refused with EventBufferFull -> 503 + Retry-After)
+- per-user/per-day and per-user/per-topic deltas are added to two dicts, so a
+  batch of 500 events usually becomes a handful of rollup rows
+
+`flush()` runs every EVENTS_FLUSH_INTERVAL_SECONDS (and early once
+EVENTS_FLUSH_SIZE events are waiting). It swaps the buffers out and writes
+them with one `apply_activity_rollups` RPC (an additive upsert, see
+schema.sql) plus chunked bulk inserts into `activity_events`. A failed flush
+merges its deltas back and re-queues only the raw chunks that were not
+inserted, so nothing is counted twice or lost while the process lives.
+Raw events that no longer fit the buffer on re-queue are dropped, logged
+and counted (`dropped`); the rollups still include them.
+
+Dashboards read `activity_daily` / `activity_topics`: O(days) and O(topics)
+rows, never the raw events. `summary()` adds deltas that are not flushed
+yet, so a user sees their own activity immediately.
+
+Days are UTC calendar days.
+
+Env:
+- EVENTS_FLUSH_INTERVAL_SECONDS (5), EVENTS_FLUSH_SIZE (1000), EVENTS_BUFFER_MAX (50000)
+- EVENTS_STORE_RAW (true): also keep raw events in activity_events
+- EVENTS_MAX_AGE_DAYS (7), EVENTS_MAX_DURATION_SECONDS (3600)
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.db.clients import get_supabase
+from app.services import metrics
+
+INSERT_CHUNK_SIZE = 1000
+RECENT_BATCH_IDS = 10000
+# Clocks on clients drift; accept events slightly in the future
+FUTURE_TOLERANCE = timedelta(minutes=5)
+
+
+class EventBufferFull(Exception):
+    """Flushing is not keeping up; the client should resend later."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"event buffer full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _merge(target: Dict[Any, List], source: Dict[Any, List]):
+    for key, delta in source.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = list(delta)
+        else:
+            current[0] += delta[0]
+            current[1] += delta[1]
+            if len(delta) > 2:
+                current[2] = max(current[2], delta[2])
+
+
+class EventService:
+    def __init__(
+        self,
+        supabase=None,
+        flush_interval: float = 5.0,
+        flush_size: int = 1000,
+        buffer_max: int = 50000,
+        store_raw: bool = True,
+        max_age: timedelta = timedelta(days=7),
+        max_duration_ms: int = 3600 * 1000
+    ):
+        self._supabase = supabase
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.buffer_max = buffer_max
+        self.store_raw = store_raw
+        self.max_age = max_age
+        self.max_duration_ms = max_duration_ms
+
+        self._raw: List[Dict[str, Any]] = []
+        # (user_id, day) -> [duration_ms, events]
+        self._daily: Dict[Tuple[str, date], List] = {}
+        # (user_id, topic) -> [duration_ms, events, last_seen]
+        self._topics: Dict[Tuple[str, str], List] = {}
+        # Deltas swapped out by a flush that has not finished yet
+        self._inflight_daily: Dict[Tuple[str, date], List] = {}
+        self._inflight_topics: Dict[Tuple[str, str], List] = {}
+        self._recent_batches: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._early_flush: Optional[asyncio.Task] = None
+
+        self.received = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.flushed_events = 0
+        self.dropped = 0
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            self._supabase = get_supabase()
+        return self._supabase
+
+    # --- Write path ---
+    def record(self, user_id: str, events: List[Any], batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """Buffer one client batch and fold it into the pending rollups (no I/O)."""
+        if batch_id is not None:
+            key = (user_id, batch_id)
+            if key in self._recent_batches:
+                self.duplicates += 1
+                return {"accepted": 0, "rejected": 0, "duplicate": True}
+        if self.store_raw and len(self._raw) + len(events) > self.buffer_max:
+            raise EventBufferFull(max(1, round(self.flush_interval)))
+
+        now = datetime.now(timezone.utc)
+        oldest, newest = now - self.max_age, now + FUTURE_TOLERANCE
+        accepted = 0
+        for event in events:
+            occurred_at = event.occurred_at
+            if occurred_at.tzinfo is None:
+                occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+            if not oldest <= occurred_at <= newest:
+                self.rejected += 1
+                continue
+            occurred_at = occurred_at.astimezone(timezone.utc)
+            duration_ms = min(event.duration_ms, self.max_duration_ms)
+            accepted += 1
+
+            _merge(self._daily, {(user_id, occurred_at.date()): [duration_ms, 1]})
+            if event.topic:
+                _merge(self._topics, {(user_id, event.topic): [duration_ms, 1, occurred_at]})
+            if self.store_raw:
+                self._raw.append({
+                    "user_id": user_id,
+                    "type": event.type,
+                    "topic": event.topic,
+                    "file_id": event.file_id,
+                    "duration_ms": duration_ms,
+                    "occurred_at": occurred_at.isoformat(),
+                })
+
+        if batch_id is not None:
+            self._recent_batches[(user_id, batch_id)] = None
+            if len(self._recent_batches) > RECENT_BATCH_IDS:
+                self._recent_batches.popitem(last=False)
+        self.received += accepted
+
+        if len(self._raw) >= self.flush_size and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.ensure_future(self.flush())
+        return {"accepted": accepted, "rejected": len(events) - accepted, "duplicate": False}
+
+    @metrics.timed("events.flush")
+    async def flush(self) -> int:
+        """Write pending rollups and raw events; returns the number of raw events written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            raw, self._raw = self._raw, []
+            self._inflight_daily, self._daily = self._daily, {}
+            self._inflight_topics, self._topics = self._topics, {}
+            if not raw and not self._inflight_daily and not self._inflight_topics:
+                return 0
+
+            # Rollups first: they are what dashboards read
+            try:
+                if self._inflight_daily or self._inflight_topics:
+                    await asyncio.to_thread(self._write_rollups, self._inflight_daily, self._inflight_topics)
+            except Exception as e:
+                self.flush_failures += 1
+                print(f"⚠️  Event rollup flush failed, will retry: {e}")
+                _merge(self._daily, self._inflight_daily)
+                _merge(self._topics, self._inflight_topics)
+                self._requeue(raw)
+                return 0
+            finally:
+                self._inflight_daily, self._inflight_topics = {}, {}
+
+            written = 0
+            try:
+                for start in range(0, len(raw), INSERT_CHUNK_SIZE):
+                    chunk = raw[start:start + INSERT_CHUNK_SIZE]
+                    await asyncio.to_thread(self._insert_raw, chunk)
+                    written += len(chunk)
+            except Exception as e:
+                self.flush_failures += 1
+                print(f"⚠️  Raw event flush failed after {written} event(s), will retry the rest: {e}")
+                self._requeue(raw[written:])
+            else:
+                self.flushes += 1
+            self.flushed_events += written
+            return written
+
+    def _requeue(self, raw: List[Dict[str, Any]]):
+        """Put unwritten raw events back in front of the buffer, as far as it has room."""
+        room = max(0, self.buffer_max - len(self._raw))
+        self._raw[:0] = raw[:room]
+        if len(raw) > room:
+            self.dropped += len(raw) - room
+            print(f"⚠️  Event buffer full: dropped {len(raw) - room} raw event(s) (rollups keep them)")
+
+    def _write_rollups(self, daily: Dict[Tuple[str, date], List], topics: Dict[Tuple[str, str], List]):
+        self.supabase.rpc("apply_activity_rollups", {
+            "daily": [
+                {"user_id": user_id, "day": day.isoformat(), "duration_ms": ms, "events": count}
+                for (user_id, day), (ms, count) in daily.items()
+            ],
+            "topics": [
+                {"user_id": user_id, "topic": topic, "duration_ms": ms, "events": count, "last_seen": seen.isoformat()}
+                for (user_id, topic), (ms, count, seen) in topics.items()
+            ],
+        }).execute()
+
+    def _insert_raw(self, chunk: List[Dict[str, Any]]):
+        self.supabase.table("activity_events").insert(chunk).execute()
+
+    async def run(self):
+        """Periodic flusher, started from the app lifespan."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️  Event flush loop error: {e}")
+
+    # --- Read path ---
+    def _read_rollups(self, user_id: str, since: date, topic_limit: int, topics: Iterable[str] = ()):
+        daily_rows = self.supabase.table("activity_daily") \
+            .select("day, duration_ms, events") \
+            .eq("user_id", user_id) \
+            .gte("day", since.isoformat()) \
+            .execute().data or []
+        topic_rows = self.supabase.table("activity_topics") \
+            .select("topic, duration_ms, events") \
+            .eq("user_id", user_id) \
+            .order("duration_ms", desc=True) \
+            .limit(topic_limit) \
+            .execute().data or []
+        return daily_rows, topic_rows + self._read_topics(user_id, topics)
+
+    def _read_topics(self, user_id: str, topics: Iterable[str]) -> List[Dict[str, Any]]:
+        """Stored rows of specific topics (those with pending deltas), wherever they rank."""
+        topics = sorted(topics)
+        if not topics:
+            return []
+        return self.supabase.table("activity_topics") \
+            .select("topic, duration_ms, events") \
+            .eq("user_id", user_id) \
+            .in_("topic", topics) \
+            .execute().data or []
+
+    def _pending_topics(self, user_id: str) -> Set[str]:
+        return {topic for pending in (self._inflight_topics, self._topics) for uid, topic in pending if uid == user_id}
+
+    @metrics.timed("events.summary")
+    async def summary(self, user_id: str, days: int = 7, topic_limit: int = 10) -> Dict[str, Any]:
+        """Daily totals for the last `days` UTC days and the top topics, flushed + pending."""
+        today = datetime.now(timezone.utc).date()
+        since = today - timedelta(days=days - 1)
+        # A topic just outside the stored top N can overtake it with pending
+        # deltas, so stored rows of every pending topic are read as well
+        pending_topics = self._pending_topics(user_id)
+        daily_rows, topic_rows = await asyncio.to_thread(self._read_rollups, user_id, since, topic_limit, pending_topics)
+        late_topics = self._pending_topics(user_id) - pending_topics  # First recorded during the read
+        if late_topics:
+            topic_rows = topic_rows + await asyncio.to_thread(self._read_topics, user_id, late_topics)
+
+        # Pending deltas are merged on the event loop, where record() mutates them
+        per_day = {since + timedelta(days=i): [0, 0] for i in range(days)}
+        for row in daily_rows:
+            day = date.fromisoformat(row["day"])
+            if day in per_day:
+                per_day[day] = [row["duration_ms"], row["events"]]
+        per_topic = {row["topic"]: [row["duration_ms"], row["events"]] for row in topic_rows}
+
+        for pending in (self._inflight_daily, self._daily):
+            for (uid, day), (ms, count) in pending.items():
+                if uid == user_id and day in per_day:
+                    per_day[day][0] += ms
+                    per_day[day][1] += count
+        for pending in (self._inflight_topics, self._topics):
+            for (uid, topic), (ms, count, _) in pending.items():
+                if uid == user_id:
+                    current = per_topic.setdefault(topic, [0, 0])
+                    current[0] += ms
+                    current[1] += count
+
+        top = sorted(per_topic.items(), key=lambda item: item[1][0], reverse=True)[:topic_limit]
+        return {
+            "user_id": user_id,
+            "days": [{"day": day, "seconds": ms / 1000, "events": count} for day, (ms, count) in per_day.items()],
+            "topics": [{"topic": topic, "seconds": ms / 1000, "events": count} for topic, (ms, count) in top],
+            "total_seconds": sum(ms for ms, _ in per_day.values()) / 1000,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._raw),
+            "pending_rollups": len(self._daily) + len(self._topics),
+            "received": self.received,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "flushed_events": self.flushed_events,
+            "dropped": self.dropped,
+        }
+
+
+# --- Singleton ---
+_event_service: Optional[EventService] = None
+_event_service_lock = threading.Lock()
+
+
+def create_event_service() -> EventService:
+    return EventService(
+        flush_interval=float(os.getenv("EVENTS_FLUSH_INTERVAL_SECONDS", "5")),
+        flush_size=int(os.getenv("EVENTS_FLUSH_SIZE", "1000")),
+        buffer_max=int(os.getenv("EVENTS_BUFFER_MAX", "50000")),
+        store_raw=os.getenv("EVENTS_STORE_RAW", "true").lower() == "true",
+        max_age=timedelta(days=float(os.getenv("EVENTS_MAX_AGE_DAYS", "7"))),
+        max_duration_ms=int(float(os.getenv("EVENTS_MAX_DURATION_SECONDS", "3600")) * 1000),
+    )
+
+
+def get_event_service() -> EventService:
+    global _event_service
+    if _event_service is None:
+        with _event_service_lock:
+            if _event_service is None:
+                _event_service = create_event_service()
+    return _event_service
+
+
+def event_service_initialized() -> bool:
+    return _event_service is not None
@@ -0,0 +1,341 @@
+"""
+Process-wide governor for LLM and embedding calls.
+Location: backend/app/services/governor.py
+
+Every model call takes tokens from a per-resource token bucket before it is
+sent, so a burst of uploads queues up here instead of tripping the provider
+quota and failing all at once.
+
+- Token buckets: "llm" counts requests, "embed" counts input texts; each has
+  a sustained rate and a burst capacity. With GOVERNOR_BACKEND=redis the
+  buckets live in Redis (shared by every worker; `redis` package needed),
+  falling back to the local bucket if Redis is unreachable.
+- Admission control: waiting calls sit in a bounded queue. A call is rejected
+  with GovernorRejected (HTTP 429 + Retry-After) when the queue, or the
+  caller's share of it, is full, or when its estimated wait exceeds the
+  limit for its priority.
+- Priority and fairness: INTERACTIVE (chat) waiters are served before
+  BACKGROUND (ingestion); within a priority, users take turns round-robin
+  so one user's large upload cannot starve everyone else.
+
+Env:
+- GOVERNOR_BACKEND: local (default) or redis; REDIS_URL (redis://redis:6379/0)
+- GOVERNOR_LLM_PER_MINUTE / GOVERNOR_LLM_BURST: 60 / 10 requests
+- GOVERNOR_EMBED_PER_MINUTE / GOVERNOR_EMBED_BURST: 1500 / 300 texts
+- GOVERNOR_MAX_QUEUE / GOVERNOR_MAX_QUEUE_PER_USER: 100 / 20 waiting calls per resource
+- GOVERNOR_MAX_WAIT_INTERACTIVE / GOVERNOR_MAX_WAIT_BACKGROUND: 10 / 120 seconds
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from app.services import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class GovernorRejected(Exception):
+    """The call was not admitted; retry after `retry_after` seconds."""
+
+    def __init__(self, resource: str, reason: str, retry_after: float):
+        super().__init__(f"{resource} capacity exhausted ({reason}); retry after {retry_after:.0f}s")
+        self.resource = resource
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """In-process token bucket. take() returns 0 when granted, else seconds until it could be."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def take(self, cost: float) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= cost:
+                self._tokens -= cost
+                return 0.0
+            return (cost - self._tokens) / self.rate
+
+
+# Atomic refill + take on a hash {tokens, ts}; Redis' clock keeps workers in step
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket shared through Redis; degrades to a local bucket on errors."""
+
+    def __init__(self, client, key: str, rate: float, capacity: float):
+        self.client = client
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self._script = client.register_script(_REDIS_TAKE)
+        self._fallback = TokenBucket(rate, capacity)
+        self._failing = False
+
+    async def take(self, cost: float) -> float:
+        try:
+            wait = float(await self._script(keys=[self.key], args=[self.rate, self.capacity, cost]))
+            if self._failing:
+                print(f"✅ Governor bucket {self.key} back on Redis")
+                self._failing = False
+            return wait
+        except Exception as e:
+            if not self._failing:
+                print(f"⚠️  Governor bucket {self.key} falling back to local limits: {e}")
+                self._failing = True
+            return await self._fallback.take(cost)
+
+
+@dataclass
+class _Waiter:
+    cost: float
+    priority: int
+    future: asyncio.Future
+
+
+@dataclass
+class _Lane:
+    """Waiters of one resource: per priority, per-user FIFOs visited round-robin."""
+    name: str
+    bucket: Any
+    queues: List["OrderedDict[str, Deque[_Waiter]]"] = field(default_factory=lambda: [OrderedDict(), OrderedDict()])
+    waiting: int = 0
+    waiting_cost: List[float] = field(default_factory=lambda: [0.0, 0.0])  # Per priority
+    per_user: Dict[str, int] = field(default_factory=dict)
+    task: Optional[asyncio.Task] = None
+
+    def next_waiter(self):
+        for queues in self.queues:
+            for user, queue in queues.items():
+                return queues, user, queue
+        return None
+
+
+class Governor:
+    def __init__(
+        self,
+        buckets: Dict[str, Any],
+        max_queue: int = 100,
+        max_queue_per_user: int = 20,
+        max_wait: Optional[Dict[int, float]] = None
+    ):
+        self.lanes = {name: _Lane(name, bucket) for name, bucket in buckets.items()}
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.max_wait = max_wait or {INTERACTIVE: 10.0, BACKGROUND: 120.0}
+        self.admitted = {name: 0 for name in buckets}
+        self.rejected = {name: 0 for name in buckets}
+
+    def _estimate_wait(self, lane: _Lane, cost: float, priority: int) -> float:
+        """Seconds until a new call would be served: queued work at its priority or above, plus its own."""
+        return (sum(lane.waiting_cost[:priority + 1]) + cost) / lane.bucket.rate
+
+    def _reject(self, lane: _Lane, reason: str, retry_after: float):
+        self.rejected[lane.name] += 1
+        raise GovernorRejected(lane.name, reason, retry_after)
+
+    def check(self, resource: str, user: str = "anonymous", priority: int = BACKGROUND, cost: float = 1):
+        """Raise GovernorRejected now if a call would not be admitted (reject before doing work)."""
+        lane = self.lanes[resource]
+        cost = min(cost, lane.bucket.capacity)
+        estimate = self._estimate_wait(lane, cost, priority)
+        if lane.waiting >= self.max_queue:
+            self._reject(lane, "queue full", estimate)
+        if lane.per_user.get(user, 0) >= self.max_queue_per_user:
+            self._reject(lane, "per-user queue full", estimate)
+        if lane.waiting and estimate > self.max_wait[priority]:
+            self._reject(lane, "wait too long", estimate)
+
+    async def acquire(self, resource: str, cost: float = 1, user: str = "anonymous", priority: int = BACKGROUND):
+        """Wait for `cost` tokens of `resource`; GovernorRejected if not admitted."""
+        lane = self.lanes[resource]
+        # A call larger than the bucket would never fit; charge it a full bucket
+        cost = min(cost, lane.bucket.capacity)
+        with metrics.span(f"governor.{resource}.wait"):
+            if not lane.waiting and await lane.bucket.take(cost) == 0:
+                self.admitted[resource] += 1
+                return
+            self.check(resource, user, priority, cost)
+
+            waiter = _Waiter(cost, priority, asyncio.get_running_loop().create_future())
+            lane.queues[priority].setdefault(user, deque()).append(waiter)
+            lane.waiting += 1
+            lane.waiting_cost[priority] += cost
+            lane.per_user[user] = lane.per_user.get(user, 0) + 1
+            loop = asyncio.get_running_loop()
+            if lane.task is None or lane.task.done() or lane.task.get_loop() is not loop:
+                lane.task = loop.create_task(self._dispatch(lane))
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait[priority])
+            except asyncio.TimeoutError:
+                if not waiter.future.done():
+                    waiter.future.cancel()
+                    self._reject(lane, "wait too long", self._estimate_wait(lane, cost, priority))
+            except asyncio.CancelledError:
+                # Caller went away: don't spend tokens on it
+                waiter.future.cancel()
+                raise
+            self.admitted[resource] += 1
+
+    async def _dispatch(self, lane: _Lane):
+        """Grant queued waiters in priority, then round-robin user order, as tokens refill."""
+        while True:
+            entry = lane.next_waiter()
+            if entry is None:
+                return
+            queues, user, queue = entry
+            waiter = queue[0]
+            if not waiter.future.cancelled():
+                wait = await lane.bucket.take(waiter.cost)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                # take() may yield (Redis): the waiter can be cancelled or time out meanwhile
+                if not waiter.future.done():
+                    waiter.future.set_result(None)
+            queue.popleft()
+            lane.waiting -= 1
+            lane.waiting_cost[waiter.priority] -= waiter.cost
+            lane.per_user[user] -= 1
+            if not lane.per_user[user]:
+                del lane.per_user[user]
+            # Rotate: this user goes to the back of its priority's turn order
+            del queues[user]
+            if queue:
+                queues[user] = queue
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "waiting": lane.waiting,
+                "admitted": self.admitted[name],
+                "rejected": self.rejected[name],
+                "rate_per_s": lane.bucket.rate,
+            }
+            for name, lane in self.lanes.items()
+        }
+
+
+# --- Governed clients ---
+class GovernedEmbeddings:
+    """Embeddings client whose calls take one "embed" token per input text."""
+
+    def __init__(self, client, governor: "Governor", user: str, priority: int = BACKGROUND):
+        self.client = client
+        self.governor = governor
+        self.user = user
+        self.priority = priority
+
+    async def admit(self, texts: int = 1):
+        """Wait for governor admission only; the caller then uses `client` directly."""
+        await self.governor.acquire("embed", texts, self.user, self.priority)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await self.admit(len(texts))
+        return await self.client.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await self.admit(1)
+        return await self.client.aembed_query(text)
+
+
+class GovernedLLM:
+    """Chat model whose calls take one "llm" token each; invoke() runs off the event loop."""
+
+    def __init__(self, client, governor: "Governor", user: str, priority: int = BACKGROUND):
+        self.client = client
+        self.governor = governor
+        self.user = user
+        self.priority = priority
+
+    async def admit(self):
+        """Wait for governor admission only; follow with send()."""
+        await self.governor.acquire("llm", 1, self.user, self.priority)
+
+    async def send(self, prompt: Any):
+        """The provider call alone, without admission."""
+        return await asyncio.to_thread(self.client.invoke, prompt)
+
+    async def ainvoke(self, prompt: Any):
+        await self.admit()
+        return await self.send(prompt)
+
+
+# --- Singleton ---
+_governor: Optional[Governor] = None
+_governor_lock = threading.Lock()
+
+
+def _per_second(name: str, default: str) -> float:
+    return float(os.getenv(name, default)) / 60.0
+
+
+def create_governor() -> Governor:
+    limits = {
+        "llm": (_per_second("GOVERNOR_LLM_PER_MINUTE", "60"), float(os.getenv("GOVERNOR_LLM_BURST", "10"))),
+        "embed": (_per_second("GOVERNOR_EMBED_PER_MINUTE", "1500"), float(os.getenv("GOVERNOR_EMBED_BURST", "300"))),
+    }
+    buckets = {name: TokenBucket(rate, capacity) for name, (rate, capacity) in limits.items()}
+    if os.getenv("GOVERNOR_BACKEND", "local").lower() == "redis":
+        try:
+            import redis.asyncio as redis
+
+            client = redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"))
+            buckets = {
+                name: RedisTokenBucket(client, f"governor:{name}", rate, capacity)
+                for name, (rate, capacity) in limits.items()
+            }
+            print("✅ Governor using Redis token buckets")
+        except ImportError:
+            print("⚠️  GOVERNOR_BACKEND=redis but the redis package is not installed, using local limits")
+    return Governor(
+        buckets,
+        max_queue=int(os.getenv("GOVERNOR_MAX_QUEUE", "100")),
+        max_queue_per_user=int(os.getenv("GOVERNOR_MAX_QUEUE_PER_USER", "20")),
+        max_wait={
+            INTERACTIVE: float(os.getenv("GOVERNOR_MAX_WAIT_INTERACTIVE", "10")),
+            BACKGROUND: float(os.getenv("GOVERNOR_MAX_WAIT_BACKGROUND", "120")),
+        },
+    )
+
+
+def get_governor() -> Governor:
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = create_governor()
+    return _governor
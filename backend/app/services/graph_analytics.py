@@ -0,0 +1,329 @@
+"""
+Offline analytics job over the File/Concept/MENTIONS knowledge graph.
+Location: backend/app/services/graph_analytics.py
+
+Computes, in-process with sparse NumPy arithmetic:
+- PageRank                 -> node property `pagerank`
+- Degree centrality        -> node property `degree_centrality`
+- Community labels         -> node property `community`
+
+The graph is bulk-exported from Neo4j in one query, scored in memory and written
+back with batched UNWIND statements.
+
+Incremental mode (the default) only refreshes the communities touched by nodes
+that have never been scored (new files / concepts from ingestion). PageRank is
+still computed globally, but only written back for the refreshed region, so run
+with --full periodically (e.g. nightly) to re-baseline every score.
+
+Usage (cron / scheduled job):
+    uv run python -m app.services.graph_analytics            # incremental
+    uv run python -m app.services.graph_analytics --full     # full refresh
+    uv run python -m app.services.graph_analytics --interval 3600
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.db.clients import get_neo4j
+
+DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-6
+PAGERANK_MAX_ITER = 100
+LABEL_PROPAGATION_MAX_ITER = 20
+WRITE_BATCH_SIZE = 1000
+
+# A node is identified by (label, key): ("File", file_id) or ("Concept", name)
+NodeKey = Tuple[str, str]
+
+EXPORT_QUERY = """
+MATCH (f:File)-[:MENTIONS]->(c:Concept)
+RETURN f.id AS file_id, f.community AS file_community,
+       c.name AS concept, c.community AS concept_community
+"""
+
+WRITE_QUERIES = {
+    "File": """
+    UNWIND $rows AS row
+    MATCH (n:File {id: row.key})
+    SET n.pagerank = row.pagerank,
+        n.degree_centrality = row.degree_centrality,
+        n.community = row.community,
+        n.analytics_updated_at = datetime()
+    """,
+    "Concept": """
+    UNWIND $rows AS row
+    MATCH (n:Concept {name: row.key})
+    SET n.pagerank = row.pagerank,
+        n.degree_centrality = row.degree_centrality,
+        n.community = row.community,
+        n.analytics_updated_at = datetime()
+    """,
+}
+
+
+@dataclass
+class GraphExport:
+    """Undirected File<->Concept graph in COO form."""
+    nodes: List[NodeKey] = field(default_factory=list)
+    src: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    dst: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    # Existing community label per node (-1 when the node was never scored)
+    communities: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    is_file: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+
+def build_graph(records) -> GraphExport:
+    """Build the COO graph from `EXPORT_QUERY` records (or equivalent dicts)."""
+    index: Dict[NodeKey, int] = {}
+    communities: List[int] = []
+    src: List[int] = []
+    dst: List[int] = []
+
+    def node_id(key: NodeKey, community: Optional[int]) -> int:
+        if key not in index:
+            index[key] = len(index)
+            communities.append(-1 if community is None else int(community))
+        return index[key]
+
+    for record in records:
+        f = node_id(("File", record["file_id"]), record["file_community"])
+        c = node_id(("Concept", record["concept"]), record["concept_community"])
+        # MENTIONS is directed in Neo4j but treated as undirected for scoring
+        src.extend((f, c))
+        dst.extend((c, f))
+
+    nodes = list(index)
+    return GraphExport(
+        nodes=nodes,
+        src=np.asarray(src, dtype=np.int64),
+        dst=np.asarray(dst, dtype=np.int64),
+        communities=np.asarray(communities, dtype=np.int64),
+        is_file=np.asarray([label == "File" for label, _ in nodes], dtype=bool),
+    )
+
+
+def pagerank(
+    n: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    damping: float = DAMPING,
+    tol: float = PAGERANK_TOLERANCE,
+    max_iter: int = PAGERANK_MAX_ITER,
+) -> np.ndarray:
+    """Power-iteration PageRank over a COO edge list (src -> dst)."""
+    if n == 0:
+        return np.empty(0)
+    out_degree = np.bincount(src, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    edge_weight = 1.0 / out_degree[src] if len(src) else np.empty(0)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        # Sparse mat-vec: sum of rank[src] / out_degree[src] into dst
+        spread = np.bincount(dst, weights=rank[src] * edge_weight, minlength=n)
+        updated = (1.0 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        delta = np.abs(updated - rank).sum()
+        rank = updated
+        if delta < tol:
+            break
+    return rank
+
+
+def degree_centrality(n: int, src: np.ndarray) -> np.ndarray:
+    """Degree normalised by the maximum possible degree (n - 1)."""
+    if n <= 1:
+        return np.zeros(n)
+    return np.bincount(src, minlength=n) / (n - 1)
+
+
+def _neighbour_mode(
+    nodes: np.ndarray,
+    neighbour_labels: np.ndarray,
+    current: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For each node in `nodes` (one entry per edge), return the most frequent
+    neighbour label. Ties keep the current label if it is among the winners,
+    otherwise the smallest label wins (deterministic).
+    """
+    keys = np.stack([nodes, neighbour_labels], axis=1)
+    pairs, counts = np.unique(keys, axis=0, return_counts=True)
+    # Prefer the current label on ties
+    keep = (current[pairs[:, 0]] == pairs[:, 1]).astype(np.int64)
+    # Sort by node, then count desc, then "is current" desc, then label asc
+    order = np.lexsort((pairs[:, 1], -keep, -counts, pairs[:, 0]))
+    pairs = pairs[order]
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:, 0] != pairs[:-1, 0]
+    return pairs[first, 0], pairs[first, 1]
+
+
+def label_propagation(
+    graph: GraphExport,
+    labels: np.ndarray,
+    movable: np.ndarray,
+    max_iter: int = LABEL_PROPAGATION_MAX_ITER,
+) -> np.ndarray:
+    """
+    Semi-synchronous label propagation for the bipartite File/Concept graph.
+
+    Files and concepts are updated in alternating half-steps (a fully synchronous
+    update oscillates on bipartite graphs). Only nodes flagged in `movable`
+    change label; the others act as fixed anchors.
+    """
+    labels = labels.copy()
+    for _ in range(max_iter):
+        changed = False
+        for side in (graph.is_file, ~graph.is_file):
+            mask = movable[graph.src] & side[graph.src]
+            if not mask.any():
+                continue
+            nodes, best = _neighbour_mode(graph.src[mask], labels[graph.dst[mask]], labels)
+            if np.any(labels[nodes] != best):
+                changed = True
+                labels[nodes] = best
+        if not changed:
+            break
+    return labels
+
+
+def _compact_labels(labels: np.ndarray, previous: np.ndarray, movable: np.ndarray, next_id: int) -> np.ndarray:
+    """
+    Renumber communities produced by propagation. Labels still owned by a fixed
+    (untouched) node keep their id; a re-formed community reuses the previous id
+    most of its members had, and brand-new communities get ids from `next_id`.
+    """
+    result = labels.copy()
+    taken = set(labels[~movable].tolist())
+    mapping: Dict[int, int] = {}
+    for label in np.unique(labels[movable]).tolist():
+        if label in taken:
+            continue
+        members = movable & (labels == label)
+        old_ids, counts = np.unique(previous[members], return_counts=True)
+        for old_id in old_ids[np.argsort(-counts, kind="stable")].tolist():
+            if old_id >= 0 and old_id not in taken:
+                mapping[label] = old_id
+                break
+        else:
+            mapping[label] = next_id
+            next_id += 1
+        taken.add(mapping[label])
+    for label, community in mapping.items():
+        result[movable & (labels == label)] = community
+    return result
+
+
+def select_refresh_region(graph: GraphExport) -> np.ndarray:
+    """
+    Nodes to re-score in incremental mode: never-scored nodes plus every member
+    of a community that one of them is connected to.
+    """
+    dirty = graph.communities < 0
+    if not dirty.any():
+        return dirty
+    touching = dirty[graph.src]
+    affected: Set[int] = set(graph.communities[graph.dst[touching]].tolist())
+    affected.discard(-1)
+    return dirty | np.isin(graph.communities, list(affected))
+
+
+def compute_scores(graph: GraphExport, full: bool = False) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Score the graph. Returns (region mask of nodes to write back, scores).
+
+    Communities outside the region are left untouched; inside it, labels are
+    re-propagated with the surrounding communities as fixed anchors.
+    """
+    n = graph.node_count
+    if full or not (graph.communities >= 0).any():
+        region = np.ones(n, dtype=bool)
+    else:
+        region = select_refresh_region(graph)
+
+    # Region nodes start from a unique provisional label that cannot collide
+    # with any existing community id.
+    next_id = int(graph.communities.max(initial=-1)) + 1
+    if full:
+        next_id = 0
+    initial = np.where(region, np.arange(n) + next_id + n, graph.communities)
+    labels = label_propagation(graph, initial, region)
+    previous = np.full(n, -1) if full else graph.communities
+    communities = _compact_labels(labels, previous, region, next_id)
+
+    scores = {
+        "pagerank": pagerank(n, graph.src, graph.dst),
+        "degree_centrality": degree_centrality(n, graph.src),
+        "community": communities,
+    }
+    return region, scores
+
+
+def write_scores(session, graph: GraphExport, region: np.ndarray, scores: Dict[str, np.ndarray]) -> int:
+    """Write scores for the region back to Neo4j in batched UNWIND statements."""
+    rows_by_label: Dict[str, List[Dict]] = {"File": [], "Concept": []}
+    for i in np.flatnonzero(region):
+        label, key = graph.nodes[i]
+        rows_by_label[label].append({
+            "key": key,
+            "pagerank": float(scores["pagerank"][i]),
+            "degree_centrality": float(scores["degree_centrality"][i]),
+            "community": int(scores["community"][i]),
+        })
+
+    written = 0
+    for label, rows in rows_by_label.items():
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            batch = rows[start:start + WRITE_BATCH_SIZE]
+            session.run(WRITE_QUERIES[label], rows=batch)
+            written += len(batch)
+    return written
+
+
+def run_analytics(full: bool = False, driver=None) -> Dict[str, float]:
+    """Export, score and write back the graph. Returns a small run summary."""
+    driver = driver or get_neo4j()
+    started = time.perf_counter()
+
+    with driver.session() as session:
+        graph = build_graph(session.run(EXPORT_QUERY))
+        if graph.node_count == 0:
+            return {"nodes": 0, "written": 0, "communities": 0, "seconds": 0.0}
+
+        region, scores = compute_scores(graph, full=full)
+        written = write_scores(session, graph, region, scores)
+
+    return {
+        "nodes": graph.node_count,
+        "written": written,
+        "communities": int(len(np.unique(scores["community"]))),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph analytics batch job")
+    parser.add_argument("--full", action="store_true", help="Re-score every node instead of only changed communities")
+    parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    while True:
+        summary = run_analytics(full=args.full)
+        print(f"✅ Graph analytics: {summary}")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Array-backed k-nearest-neighbour graph between files.
+Location: backend/app/services/knn_store.py
+
+Used by app/services/recommendations.py (scoring and maintenance are
+described there). Arrays per store:
+- vectors:   (n, d) float32, L2-normalised mean chunk embedding per file
+- neighbors: (n, k) int32 row numbers, -1 for empty slots
+- scores:    (n, k) float32, unsorted within a row (sorted on read)
+- concepts:  CSR (indptr, indices) into a string vocabulary
+Rows grow by doubling, so incremental inserts are amortised O(1) plus the
+O(files of that user) scoring pass.
+
+Files without an owner (ingested before the partition backfill, see
+app/db/partitions.py) are left out: there is no user to scope them to.
+"""
+
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+BUILD_BLOCK_ROWS = 1024
+
+
+def mean_pool(embeddings: List[List[float]]) -> Optional[np.ndarray]:
+    """L2-normalised mean of a file's chunk vectors (None when there are none)."""
+    if not embeddings:
+        return None
+    vector = np.asarray(embeddings, dtype=np.float32).mean(axis=0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class KnnStore:
+    """Fixed-k neighbour lists in growable NumPy arrays (amortised O(1) appends)."""
+
+    def __init__(self, k: int = 10, concept_weight: float = 0.3, dims: Optional[int] = None):
+        self.k = k
+        self.concept_weight = concept_weight
+        self.dims = dims
+        self.size = 0
+        self.file_ids: List[str] = []
+        self.users: List[str] = []
+        self.concepts: List[np.ndarray] = []   # Sorted concept ids per row
+        self.vocab: Dict[str, int] = {}
+        self.index: Dict[str, int] = {}
+        self.by_user: Dict[str, List[int]] = {}
+        self.vectors = np.empty((0, dims or 0), dtype=np.float32)
+        self.neighbors = np.empty((0, k), dtype=np.int32)
+        self.scores = np.empty((0, k), dtype=np.float32)
+        self.lock = threading.RLock()
+        self.updates = 0
+        self.built_at = 0.0  # Unix time the rebuild that produced this store started reading
+
+    # --- Rows ---
+    def _concept_ids(self, names: Iterable[str]) -> np.ndarray:
+        ids = {self.vocab.setdefault(name, len(self.vocab)) for name in names if name}
+        return np.asarray(sorted(ids), dtype=np.int32)
+
+    def _grow(self, needed: int):
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, 2 * len(self.vectors), 64)
+        for name, fill in (("vectors", 0.0), ("neighbors", -1), ("scores", -np.inf)):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _row(self, file_id: str, user_id: str, vector: np.ndarray, concepts: Iterable[str]) -> Tuple[int, bool]:
+        """Insert or overwrite a file's row; returns (row, is_new)."""
+        if self.dims is None:
+            self.dims = len(vector)
+            self.vectors = np.empty((0, self.dims), dtype=np.float32)
+        if len(vector) != self.dims:
+            raise ValueError(f"embedding has {len(vector)} dimensions, store has {self.dims}")
+        row = self.index.get(file_id)
+        is_new = row is None
+        if is_new:
+            row = self.size
+            self._grow(row + 1)
+            self.size += 1
+            self.file_ids.append(file_id)
+            self.users.append(user_id)
+            self.concepts.append(np.empty(0, dtype=np.int32))
+            self.index[file_id] = row
+            self.by_user.setdefault(user_id, []).append(row)
+        self.vectors[row] = vector
+        self.concepts[row] = self._concept_ids(concepts)
+        return row, is_new
+
+    # --- Scoring ---
+    def _incidence(self, rows: np.ndarray, vocab: np.ndarray) -> np.ndarray:
+        """(len(rows), len(vocab)) 0/1 concept matrix over a local, sorted vocabulary."""
+        matrix = np.zeros((len(rows), len(vocab)), dtype=np.float32)
+        for i, row in enumerate(rows):
+            concept_ids = self.concepts[row]
+            positions = np.searchsorted(vocab, concept_ids)
+            hit = positions < len(vocab)
+            hit[hit] = vocab[positions[hit]] == concept_ids[hit]
+            matrix[i, positions[hit]] = 1.0
+        return matrix
+
+    def _similarity(self, rows: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """(len(rows), len(others)) blended cosine + concept Jaccard."""
+        cosine = self.vectors[rows] @ self.vectors[others].T
+        if self.concept_weight == 0:
+            return cosine
+        # Only concepts of `others` can intersect, so the matrices stay user-sized
+        vocab = np.unique(np.concatenate([self.concepts[o] for o in others] + [np.empty(0, dtype=np.int32)]))
+        other_matrix = self._incidence(others, vocab)
+        intersection = self._incidence(rows, vocab) @ other_matrix.T
+        row_sizes = np.asarray([len(self.concepts[r]) for r in rows], dtype=np.float32)
+        union = row_sizes[:, None] + other_matrix.sum(axis=1)[None, :] - intersection
+        jaccard = np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
+        return (1 - self.concept_weight) * cosine + self.concept_weight * jaccard
+
+    def _set_top_k(self, row: int, candidates: np.ndarray, scores: np.ndarray):
+        keep = min(self.k, len(candidates))
+        self.neighbors[row] = -1
+        self.scores[row] = -np.inf
+        if keep == 0:
+            return
+        top = np.argpartition(-scores, keep - 1)[:keep]
+        self.neighbors[row, :keep] = candidates[top]
+        self.scores[row, :keep] = scores[top]
+
+    # --- Maintenance ---
+    def build(self, files: Iterable[Dict[str, Any]]) -> int:
+        """Replace the store with every owned file in `files` (EXPORT_QUERY rows)."""
+        fresh = KnnStore(self.k, self.concept_weight)
+        for record in files:
+            if not record["user_id"]:
+                continue
+            vector = mean_pool(record["embeddings"])
+            if vector is not None:
+                fresh._row(record["file_id"], record["user_id"], vector, record["concepts"])
+
+        for rows in fresh.by_user.values():
+            rows = np.asarray(rows, dtype=np.int32)
+            for start in range(0, len(rows), BUILD_BLOCK_ROWS):
+                block = rows[start:start + BUILD_BLOCK_ROWS]
+                similarity = fresh._similarity(block, rows)
+                for i, row in enumerate(block):
+                    others = rows != row
+                    fresh._set_top_k(row, rows[others], similarity[i, others])
+
+        with self.lock:
+            updates = self.updates + 1
+            self.__dict__.update({k: v for k, v in fresh.__dict__.items() if k != "lock"})
+            self.updates = updates
+        return self.size
+
+    def upsert(self, file_id: str, user_id: Optional[str], embeddings: List[List[float]], concepts: Iterable[str]) -> bool:
+        """Add or refresh one file and patch its neighbours' lists. False if it has no vectors or owner."""
+        if not user_id:
+            return False
+        vector = mean_pool(embeddings)
+        if vector is None:
+            return False
+        with self.lock:
+            row, _ = self._row(file_id, user_id, vector, concepts)
+            peers = np.asarray([r for r in self.by_user[self.users[row]] if r != row], dtype=np.int32)
+            if len(peers) == 0:
+                self._set_top_k(row, peers, np.empty(0, dtype=np.float32))
+                self.updates += 1
+                return True
+
+            scores = self._similarity(np.asarray([row]), peers)[0]
+            self._set_top_k(row, peers, scores)
+
+            # Reverse edges: refresh existing ones, otherwise evict the weakest
+            # neighbour of every peer this file now beats
+            lists = self.neighbors[peers]
+            has_row = lists == row
+            listed = has_row.any(axis=1)
+            self.scores[peers[listed], has_row[listed].argmax(axis=1)] = scores[listed]
+            weakest = self.scores[peers].argmin(axis=1)
+            beats = ~listed & (scores > self.scores[peers, weakest])
+            self.neighbors[peers[beats], weakest[beats]] = row
+            self.scores[peers[beats], weakest[beats]] = scores[beats]
+            self.updates += 1
+        return True
+
+    # --- Lookups ---
+    def related(self, file_id: str, limit: Optional[int] = None) -> Optional[List[Tuple[str, float]]]:
+        """Neighbours of one file, best first (None if the file is unknown)."""
+        with self.lock:
+            row = self.index.get(file_id)
+            if row is None:
+                return None
+            neighbors, scores = self.neighbors[row], self.scores[row]
+            order = np.argsort(-scores)
+            result = [(self.file_ids[neighbors[i]], float(scores[i])) for i in order if neighbors[i] >= 0]
+        return result[:limit] if limit else result
+
+    def for_user(self, user_id: str, seeds: List[str], limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Merge the neighbour lists of `seeds` (e.g. recently read files), or of
+        the user's newest files when no seed is known. O(len(seeds) * k).
+        """
+        with self.lock:
+            rows = [self.index[s] for s in seeds if s in self.index and self.users[self.index[s]] == user_id]
+            if not rows:
+                rows = self.by_user.get(user_id, [])[-5:]
+            exclude = set(rows)
+            totals: Dict[int, float] = {}
+            for row in rows:
+                for neighbor, score in zip(self.neighbors[row], self.scores[row]):
+                    if neighbor >= 0 and neighbor not in exclude:
+                        totals[int(neighbor)] = totals.get(int(neighbor), 0.0) + float(score)
+            best = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(self.file_ids[row], score) for row, score in best]
+
+    # --- Persistence ---
+    def save(self, path: str):
+        """Write the store atomically as one .npz."""
+        with self.lock:
+            lengths = np.asarray([len(c) for c in self.concepts], dtype=np.int64)
+            arrays = {
+                "file_ids": np.asarray(self.file_ids, dtype=str),
+                "users": np.asarray(self.users, dtype=str),
+                "vectors": self.vectors[:self.size],
+                "neighbors": self.neighbors[:self.size],
+                "scores": self.scores[:self.size],
+                "concept_indptr": np.concatenate(([0], np.cumsum(lengths))),
+                "concept_indices": np.concatenate(self.concepts) if self.concepts else np.empty(0, dtype=np.int32),
+                "vocab": np.asarray(sorted(self.vocab, key=self.vocab.get), dtype=str),
+                "config": np.asarray([self.k, self.concept_weight], dtype=np.float64),
+                "built_at": np.asarray(self.built_at, dtype=np.float64),
+            }
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A unique temp file per save: concurrent savers never share a half-written file
+        fd, tmp = tempfile.mkstemp(prefix=".knn-", suffix=".npz.tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str, k: int = 10, concept_weight: float = 0.3) -> "KnnStore":
+        """Load a saved store; an incompatible one (other k / weight) is ignored."""
+        store = cls(k, concept_weight)
+        if not os.path.exists(path):
+            return store
+        with np.load(path) as data:
+            saved_k, saved_weight = data["config"]
+            if int(saved_k) != k or float(saved_weight) != concept_weight:
+                print(f"⚠️  Recommendation store {path} was built with k={int(saved_k)}, "
+                      f"weight={saved_weight}; ignoring it until the next rebuild")
+                return store
+            store.file_ids = data["file_ids"].tolist()
+            store.users = data["users"].tolist()
+            store.size = len(store.file_ids)
+            store.vectors = data["vectors"].astype(np.float32)
+            store.dims = store.vectors.shape[1] if store.size else None
+            store.neighbors = data["neighbors"].astype(np.int32)
+            store.scores = data["scores"].astype(np.float32)
+            indptr, indices = data["concept_indptr"], data["concept_indices"].astype(np.int32)
+            store.concepts = [indices[indptr[i]:indptr[i + 1]] for i in range(store.size)]
+            store.vocab = {name: i for i, name in enumerate(data["vocab"].tolist())}
+            store.built_at = float(data["built_at"]) if "built_at" in data.files else 0.0
+        store.index = {file_id: row for row, file_id in enumerate(store.file_ids)}
+        for row, user_id in enumerate(store.users):
+            store.by_user.setdefault(user_id, []).append(row)
+        return store
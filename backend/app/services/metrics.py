@@ -0,0 +1,233 @@
+"""
+Lightweight latency instrumentation with Prometheus text exposition.
+Location: backend/app/services/metrics.py
+
+Pipeline stages and external calls are wrapped in spans:
+
+    with metrics.span("ingest.embed"):
+        vectors = await embeddings.aembed_documents(texts)
+
+    @metrics.timed("note.get")
+    async def get_note(...): ...
+
+Each span adds one observation to the `app_stage_duration_seconds` histogram
+(labelled by stage) and, when it raises, increments `app_stage_errors_total`.
+Recording is two perf_counter() calls, a bisect and a few integer adds; the
+text format is only built when /metrics is scraped.
+
+Env:
+- METRICS_ENABLED: false turns every span into a shared no-op (default true)
+"""
+
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Prometheus client defaults, plus a 30s bucket for LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set; buckets are stored non-cumulative."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., +Inf count, sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.bounds) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, *labels: str) -> Optional[Dict[str, Any]]:
+        """Cumulative bucket counts, sum and count for one label set (None if never observed)."""
+        with self._lock:
+            series = self._series.get(labels)
+            series = list(series) if series is not None else None
+        if series is None:
+            return None
+        cumulative, running = {}, 0
+        for bound, count in zip(self.bounds + (float("inf"),), series):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "sum": series[-2], "count": series[-1]}
+
+    def label_sets(self) -> List[Tuple[str, ...]]:
+        with self._lock:
+            return sorted(self._series)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels in self.label_sets():
+            snap = self.snapshot(*labels)
+            for bound, count in snap["buckets"].items():
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(snap['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {snap['count']}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labelnames, labels)} {_number(v)}" for labels, v in items)
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+STAGE_SECONDS = Histogram(
+    "app_stage_duration_seconds", "Latency of pipeline stages and external calls.", ("stage",)
+)
+STAGE_ERRORS = Counter(
+    "app_stage_errors_total", "Pipeline stages and external calls that raised.", ("stage", "error")
+)
+REGISTRY = [STAGE_SECONDS, STAGE_ERRORS]
+
+
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(self.stage, exc_type.__name__)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(stage: str):
+    """Context manager timing one stage (works inside sync and async code)."""
+    return _Span(stage) if ENABLED else _NOOP
+
+
+def timed(stage: str):
+    """Decorator form of span() for sync and async functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def configure(enabled: bool):
+    global ENABLED
+    ENABLED = enabled
+
+
+def reset():
+    for metric in REGISTRY:
+        metric.clear()
+
+
+def render_gauges(prefix: str, values: Dict[str, Any], help: str = "", counters: Iterable[str] = ()) -> List[str]:
+    """Expose a stats() dict (e.g. note cache counters) as metrics named prefix_key.
+
+    Keys listed in counters only ever grow, so they are typed counter and named
+    prefix_key_total (rate() needs that); everything else is a gauge.
+    """
+    counters = set(counters)
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        kind = "counter" if key in counters else "gauge"
+        name = f"{prefix}_{key}_total" if kind == "counter" else f"{prefix}_{key}"
+        lines += [f"# HELP {name} {help or key}", f"# TYPE {name} {kind}", f"{name} {_number(value)}"]
+    return lines
+
+
+def render(extra: Iterable[str] = ()) -> str:
+    """Everything in the registry in Prometheus text format 0.0.4."""
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += extra
+    return "\n".join(lines) + "\n"
@@ -1,57 +1,167 @@
 """
-Note storage service using Supabase Storage (S3-compatible).
+Note storage service using Supabase Storage (S3-compatible) or the local filesystem.
 Location: backend/app/services/note.py
 
 Handles:
-- Create notes in Supabase Storage bucket
+- Create notes in the storage backend (see note_storage.py)
 - Update notes (with automatic versioning)
 - Retrieve notes by file_id
 - Delete notes (optional)
+- Mirror note metadata into the `notes` table for paginated listing
+- Serve hot notes from an in-memory read-through cache (see note_cache.py)
+- Optional single-object layout, one round-trip per read (see note_format.py)
+- Batch create/get/delete with bounded fan-out
+- Patch-based updates with version history as snapshot + delta chains
+- Note bodies and history compressed at rest (see note_codec.py)
+- Keep the full-text search index current (see note_search.py)
+- Per-operation and per-backend-call latency histograms (see metrics.py)
+
+NOTE_STORAGE_BACKEND selects Supabase (bucket + `notes` table, default) or
+local (sharded directory + SQLite index under NOTE_LOCAL_ROOT, no network).
+
+Backends are synchronous, so every storage/index call runs on a dedicated
+bounded thread pool (NOTE_STORAGE_WORKERS) instead of the event loop.
+All workers share the Supabase client's pooled keep-alive HTTP connections.
 """
 
+import asyncio
+import base64
+import functools
+import inspect
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any
-from supabase import create_client, Client
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Tuple, TYPE_CHECKING
 from dotenv import load_dotenv
 import json
+from app.services import metrics
+from app.services.note_cache import NoteCache, Validator
+from app.services.note_codec import NoteCodec
+from app.services.note_format import decode_note, pack_note, split_note
+from app.services.note_index import INDEX_COLUMNS, NoteIndex, create_index
+from app.services.note_search import NoteSearchIndex, create_search_index
+from app.services.note_storage import InvalidKeyError, StorageBackend, create_storage
+from app.services.note_history import (
+    VersionConflictError,
+    apply_patch,
+    diff_text,
+    is_snapshot,
+    reconstruct,
+    snapshot_version
+)
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+NOTE_OBJECT_CONTENT_TYPE = "application/octet-stream"
+
+
+def _utc(value: Optional[str]) -> datetime:
+    """Comparable timestamp: the index may return timestamptz ("...+00:00"), metadata holds naive UTC."""
+    parsed = datetime.fromisoformat(value) if value else datetime.min
+    return parsed if parsed.tzinfo is None else parsed.astimezone(timezone.utc).replace(tzinfo=None)
 
 # Load environment variables
 load_dotenv()
 
 
 class NoteService:
-    """Service for managing notes in Supabase Storage."""
+    """Service for managing notes in Supabase Storage or a local directory."""
     
     BUCKET_NAME = "notes"  # Create this bucket in Supabase dashboard
+    INDEX_TABLE = "notes"  # Metadata mirror, see schema.sql
+    INDEX_COLUMNS = INDEX_COLUMNS
+    INLINE_CODEC_CHARS = 64 * 1024  # Larger bodies are (de)compressed off the event loop
+    UPDATE_ATTEMPTS = 3  # update_note() retries when another worker took the version
     
-    def __init__(self):
-        """Initialize Supabase client."""
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        
-        if not supabase_url or not supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment")
+    def __init__(
+        self,
+        client: Optional["Client"] = None,
+        storage: Optional[StorageBackend] = None,
+        index: Optional[NoteIndex] = None,
+        search: Optional[NoteSearchIndex] = None
+    ):
+        """
+        Initialize storage and index backends. An injected Supabase client
+        selects the Supabase backends; otherwise NOTE_STORAGE_BACKEND decides.
+        """
+        if storage is None or index is None:
+            backend = "supabase" if client is not None else os.getenv("NOTE_STORAGE_BACKEND", "supabase")
+            if backend == "supabase" and client is None:
+                from supabase import create_client
+                
+                supabase_url = os.getenv("SUPABASE_URL")
+                supabase_key = os.getenv("SUPABASE_KEY")
+                
+                if not supabase_url or not supabase_key:
+                    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment")
+                
+                client = create_client(supabase_url, supabase_key)
+            storage = storage or create_storage(client, self.BUCKET_NAME, backend)
+            index = index or create_index(client, self.INDEX_TABLE, backend)
         
-        self.client: Client = create_client(supabase_url, supabase_key)
-        self._ensure_bucket_exists()
+        self.client: Optional["Client"] = client
+        self.storage = storage
+        self.index = index
+        self.cache = NoteCache(
+            max_bytes=int(os.getenv("NOTE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            revalidate_after=float(os.getenv("NOTE_CACHE_REVALIDATE_SECONDS", "5"))
+        )
+        # Bounded pool for blocking Supabase calls. Keep this at or below the
+        # httpx keep-alive pool size (20 by default) so connections are reused.
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("NOTE_STORAGE_WORKERS", "16")),
+            thread_name_prefix="note-storage"
+        )
+        # "split": {file_id}.md + {file_id}.meta.json (legacy)
+        # "single": {file_id}.note, two-file notes migrated lazily on access
+        self.storage_format = os.getenv("NOTE_STORAGE_FORMAT", "split")
+        self.batch_concurrency = int(os.getenv("NOTE_BATCH_CONCURRENCY", "16"))
+        # Full snapshot every N versions, deltas in between
+        self.snapshot_interval = int(os.getenv("NOTE_SNAPSHOT_INTERVAL", "20"))
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.codec = NoteCodec()
+        self.search = search if search is not None else create_search_index()
+        self._background: set = set()
+        # Metric stage prefixes for backend calls made through _run
+        self._components = {id(self.storage): "storage", id(self.index): "index", id(self.codec): "codec"}
+        if self.search is not None:
+            self._components[id(self.search)] = "search"
+        self.storage.ensure_ready()
+    
+    # --- Non-blocking storage primitives ---
+    async def _run(self, fn, *args, **kwargs):
+        """
+        Run a blocking client call on the storage thread pool, timed as stage
+        note.<storage|index|search|codec>.<method> (queue wait included).
+        """
+        component = self._components.get(id(getattr(fn, "__self__", None)))
+        stage = f"note.{component}.{fn.__name__}" if component else f"note.{fn.__name__}"
+        loop = asyncio.get_running_loop()
+        with metrics.span(stage):
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
     
-    def _ensure_bucket_exists(self):
-        """Create the notes bucket if it doesn't exist (with versioning enabled)."""
+    async def _upload(self, path: str, data: bytes, content_type: str):
+        """Create an object; FileExistsError if it is already there."""
+        return await self._run(self.storage.upload, path, data, content_type)
+    
+    async def _overwrite(self, path: str, data: bytes, content_type: str):
+        return await self._run(self.storage.update, path, data, content_type)
+    
+    async def _put(self, path: str, data: bytes, content_type: str):
+        """Create or replace an object in one call."""
+        return await self._run(self.storage.upload, path, data, content_type, upsert=True)
+    
+    async def _download(self, path: str) -> bytes:
+        return await self._run(self.storage.download, path)
+    
+    async def _download_or_none(self, path: str) -> Optional[bytes]:
         try:
-            # Check if bucket exists
-            buckets = self.client.storage.list_buckets()
-            bucket_names = [b.name for b in buckets]
-            
-            if self.BUCKET_NAME not in bucket_names:
-                # Create bucket with public access disabled (private by default)
-                self.client.storage.create_bucket(
-                    self.BUCKET_NAME,
-                    options={"public": False}
-                )
-                print(f"✅ Created bucket: {self.BUCKET_NAME}")
-        except Exception as e:
-            print(f"⚠️  Bucket check failed (may already exist): {e}")
+            return await self._download(path)
+        except Exception:
+            return None
     
     def _get_storage_path(self, file_id: str) -> str:
         """Generate storage path for a note."""
@@ -61,6 +171,103 @@ class NoteService:
         """Generate path for metadata JSON file."""
         return f"{file_id}.meta.json"
     
+    def _get_object_path(self, file_id: str) -> str:
+        """Generate path for a single-object note (header + body, see note_format.py)."""
+        return f"{file_id}.note"
+    
+    def _get_history_path(self, file_id: str, version: int, kind: Optional[str] = None) -> str:
+        """
+        Generate path for one link of a note's version chain. The kind defaults
+        to what the current NOTE_SNAPSHOT_INTERVAL writes.
+        """
+        kind = kind or ("snap" if is_snapshot(version, self.snapshot_interval) else "delta")
+        return f"history/{file_id}/{version:08d}.{kind}"
+    
+    async def _encode(self, text: str) -> bytes:
+        """Compress a body; large ones on the executor so the loop keeps serving."""
+        if len(text) < self.INLINE_CODEC_CHARS:
+            return self.codec.encode(text)
+        return await self._run(self.codec.encode, text)
+    
+    async def _decode(self, data: bytes) -> str:
+        if len(data) < self.INLINE_CODEC_CHARS:
+            return self.codec.decode(data)
+        return await self._run(self.codec.decode, data)
+    
+    async def _history_object(
+        self,
+        file_id: str,
+        version: int,
+        previous: Optional[str],
+        content: str,
+        ops: Optional[list] = None
+    ) -> Tuple[str, bytes, str]:
+        """(path, data, content type) recording `version` in the history chain."""
+        path = self._get_history_path(file_id, version)
+        if previous is None or is_snapshot(version, self.snapshot_interval):
+            data = await self._encode(content)
+            return path, data, self.codec.content_type(data, "text/markdown")
+        delta = ops if ops is not None else diff_text(previous, content)
+        data = await self._encode(json.dumps(delta))
+        return path, data, self.codec.content_type(data, "application/json")
+    
+    async def _history_paths(self, file_id: str) -> list[str]:
+        """Every stored history object of a note."""
+        try:
+            names = await self._run(self.storage.list, f"history/{file_id}", limit=100000)
+        except Exception:
+            return []
+        return [f"history/{file_id}/{name}" for name in names]
+    
+    async def _stored_chain(self, file_id: str, version: int) -> Optional[list[str]]:
+        """
+        History paths rebuilding `version` as actually stored: the nearest
+        snapshot at or before it and the deltas after it. Chains written under
+        another NOTE_SNAPSHOT_INTERVAL are found this way. None if incomplete.
+        """
+        stored = set(await self._history_paths(file_id))
+        chain = []
+        for v in range(version, 0, -1):
+            snap = self._get_history_path(file_id, v, "snap")
+            if snap in stored:
+                return [snap] + chain[::-1]
+            delta = self._get_history_path(file_id, v, "delta")
+            if delta not in stored:
+                return None
+            chain.append(delta)
+        return None
+    
+    async def _claim_version(self, file_id: str, version: int, history: Tuple[str, bytes, str]):
+        """
+        Write a new version's history link create-only, before the note itself.
+        It exists once per version, so this is the compare-and-swap that keeps
+        workers (whose locks are per process) from overwriting each other.
+        """
+        try:
+            await self._upload(*history)
+        except FileExistsError:
+            raise VersionConflictError(f"Version {version} of file_id {file_id} was written concurrently")
+    
+    async def _read_current(self, file_id: str) -> Dict[str, Any]:
+        """Uncached read for read-modify-write: another worker may have written since this one cached the note."""
+        if self.single_object:
+            note, _ = await self._read_single(file_id, migrate=False)
+            return note
+        return await self._read_split(file_id)
+    
+    def _note_lock(self, file_id: str) -> asyncio.Lock:
+        """Serialize read-modify-write updates of one note within this process."""
+        lock = self._locks.get(file_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[file_id] = lock
+        return lock
+    
+    @property
+    def single_object(self) -> bool:
+        return self.storage_format == "single"
+    
+    @metrics.timed("note.create")
     async def create_note(
         self,
         file_id: str,
@@ -80,28 +287,21 @@ class NoteService:
         Returns:
             Dict with note metadata including storage_path, created_at, size
         """
-        storage_path = self._get_storage_path(file_id)
+        if not file_id or "/" in file_id or file_id in (".", ".."):
+            # Every object key of a note embeds the id as one path segment
+            raise InvalidKeyError(f"Invalid note id: {file_id!r}")
+        if self.single_object:
+            storage_path = self._get_object_path(file_id)
+        else:
+            storage_path = self._get_storage_path(file_id)
         metadata_path = self._get_metadata_path(file_id)
         
-        # Check if note already exists
-        try:
-            existing = self.client.storage.from_(self.BUCKET_NAME).list(file_id)
-            if existing:
-                raise ValueError(f"Note with file_id {file_id} already exists")
-        except ValueError:
-            raise  # Re-raise ValueError (file exists)
-        except Exception:
-            pass  # File doesn't exist, proceed with creation
-        
-        # Store the markdown content
-        content_bytes = content.encode('utf-8')
-        result = self.client.storage.from_(self.BUCKET_NAME).upload(
-            path=storage_path,
-            file=content_bytes,
-            file_options={"content-type": "text/markdown"}
-        )
+        if self.single_object and await self._download_or_none(metadata_path) is not None:
+            # Reads fall back to the two-file layout, so a legacy note would be shadowed
+            raise ValueError(f"Note with file_id {file_id} already exists")
+        
+        stored = await self._encode(content)
         
-        # Store metadata as separate JSON file
         now = datetime.utcnow()
         metadata = {
             "file_id": file_id,
@@ -110,17 +310,34 @@ class NoteService:
             "storage_path": storage_path,
             "created_at": now.isoformat(),
             "updated_at": now.isoformat(),
-            "size_bytes": len(content_bytes)
+            "size_bytes": len(content.encode('utf-8')),
+            "stored_bytes": len(stored),
+            "version": 1
         }
+        history_path, history_data, history_type = await self._history_object(file_id, 1, None, content)
         
-        self.client.storage.from_(self.BUCKET_NAME).upload(
-            path=metadata_path,
-            file=json.dumps(metadata).encode('utf-8'),
-            file_options={"content-type": "application/json"}
-        )
+        # Uploads without upsert fail if the object exists, which doubles as
+        # the "note already exists" check
+        try:
+            if self.single_object:
+                # One object: metadata header + body
+                await self._upload(storage_path, pack_note(metadata, stored), NOTE_OBJECT_CONTENT_TYPE)
+            else:
+                # Markdown content and metadata JSON, uploaded concurrently
+                await asyncio.gather(
+                    self._upload(storage_path, stored, self.codec.content_type(stored, "text/markdown")),
+                    self._upload(metadata_path, json.dumps(metadata).encode('utf-8'), "application/json")
+                )
+            # Version 1 snapshot starts the history chain
+            await self._put(history_path, history_data, history_type)
+        except FileExistsError:
+            raise ValueError(f"Note with file_id {file_id} already exists")
+        
+        await asyncio.gather(self._index_upsert(metadata), self._search_update(metadata, content))
         
         return metadata
     
+    @metrics.timed("note.update")
     async def update_note(
         self,
         file_id: str,
@@ -128,7 +345,9 @@ class NoteService:
         title: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Update an existing note. Supabase Storage versioning handles history automatically.
+        Update an existing note. Content changes bump the note's version and
+        are recorded in its history chain (the delta is computed server-side).
+        A version taken concurrently by another worker is retried on top of it.
         
         Args:
             file_id: Note identifier
@@ -138,24 +357,115 @@ class NoteService:
         Returns:
             Updated metadata dict
         """
+        async with self._note_lock(file_id):
+            for attempt in range(self.UPDATE_ATTEMPTS):
+                try:
+                    return await self._write_update(file_id, content, title)
+                except VersionConflictError:
+                    if attempt == self.UPDATE_ATTEMPTS - 1:
+                        raise
+    
+    @metrics.timed("note.patch")
+    async def patch_note(
+        self,
+        file_id: str,
+        base_version: int,
+        ops: list[Dict[str, Any]],
+        title: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply a text patch (see note_history.py) made against `base_version`.
+        The patch itself is stored as the history delta.
+        
+        Args:
+            file_id: Note identifier
+            base_version: Version the client edited
+            ops: Non-overlapping {start, end, text} edits against that version
+            title: New title (optional)
+            
+        Returns:
+            Updated metadata dict
+            
+        Raises:
+            VersionConflictError: base_version is not the current version
+            ValueError: the patch does not fit the base text
+        """
+        async with self._note_lock(file_id):
+            current = await self._read_current(file_id)
+            current_version = current.get("version") or 0
+            if current_version != base_version:
+                raise VersionConflictError(
+                    f"Patch is against version {base_version}, current version is {current_version}"
+                )
+            content = apply_patch(current["content"], ops)
+            return await self._write_update(file_id, content, title, current=current, ops=ops)
+    
+    async def _write_update(
+        self,
+        file_id: str,
+        content: Optional[str],
+        title: Optional[str],
+        current: Optional[Dict[str, Any]] = None,
+        ops: Optional[list] = None
+    ) -> Dict[str, Any]:
+        """
+        Shared update path; `current` (note with content, read uncached) avoids
+        re-reading it. Raises VersionConflictError if another worker wrote the
+        next version first.
+        """
+        history = None
+        if content is not None:
+            if current is None:
+                current = await self._read_current(file_id)
+            version = (current.get("version") or 0) + 1
+            history = await self._history_object(file_id, version, current["content"], content, ops)
+            await self._claim_version(file_id, version, history)
+        
+        try:
+            if self.single_object:
+                metadata = await self._update_single(file_id, content, title, current)
+            else:
+                metadata = await self._update_split(file_id, content, title, current)
+        except BaseException:
+            if history is not None:
+                # Give the version back so the next update can take it
+                await self._run(self.storage.remove, [history[0]])
+            raise
+        
+        self.cache.invalidate(file_id)
+        await self._search_update(metadata, content)
+        
+        return metadata
+    
+    async def _update_split(
+        self,
+        file_id: str,
+        content: Optional[str],
+        title: Optional[str],
+        current: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Two-file layout: rewrite {file_id}.meta.json and, if given, {file_id}.md."""
         storage_path = self._get_storage_path(file_id)
         metadata_path = self._get_metadata_path(file_id)
         
-        # Retrieve current metadata
-        metadata = await self._get_metadata(file_id)
+        # Retrieve current metadata (already known when the body was read)
+        if current is not None:
+            metadata = {k: v for k, v in current.items() if k != "content"}
+        else:
+            metadata = await self._get_metadata(file_id)
+        
+        uploads = []
         
         # Update content if provided
         if content is not None:
-            content_bytes = content.encode('utf-8')
+            stored = await self._encode(content)
             
-            # Upload new version (overwrites, but Supabase keeps old version if versioning enabled)
-            self.client.storage.from_(self.BUCKET_NAME).update(
-                path=storage_path,
-                file=content_bytes,
-                file_options={"content-type": "text/markdown"}
-            )
+            # Upload new version alongside the metadata (its history link is already written)
+            uploads.append(self._overwrite(storage_path, stored, self.codec.content_type(stored, "text/markdown")))
             
-            metadata["size_bytes"] = len(content_bytes)
+            metadata["size_bytes"] = len(content.encode('utf-8'))
+            metadata["stored_bytes"] = len(stored)
+            metadata["version"] = (metadata.get("version") or 0) + 1
         
         # Update title if provided
         if title is not None:
@@ -164,50 +474,240 @@ class NoteService:
         # Update timestamp
         metadata["updated_at"] = datetime.utcnow().isoformat()
         
-        # Save updated metadata
-        self.client.storage.from_(self.BUCKET_NAME).update(
-            path=metadata_path,
-            file=json.dumps(metadata).encode('utf-8'),
-            file_options={"content-type": "application/json"}
-        )
+        # Save updated metadata alongside the content upload
+        uploads.append(self._overwrite(metadata_path, json.dumps(metadata).encode('utf-8'), "application/json"))
+        await asyncio.gather(*uploads)
+        
+        await self._index_upsert(metadata)
+        
+        return metadata
+    
+    async def _update_single(
+        self,
+        file_id: str,
+        content: Optional[str],
+        title: Optional[str],
+        current: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Single-object layout. Current metadata comes from the index row, so no
+        body download is needed for content updates; a title-only update
+        rewrites just the header around the stored (still encoded) body.
+        Notes still in the two-file layout are migrated on their first write.
+        """
+        object_path = self._get_object_path(file_id)
+        
+        current_content = None
+        if current is not None:
+            current_content = current["content"]
+            metadata = {k: v for k, v in current.items() if k != "content"}
+        else:
+            row = await self._index_get(file_id)
+            if row is not None and row["storage_path"] == object_path:
+                metadata = dict(row)
+            else:
+                # Legacy layout or missing index row: read what is stored
+                note, _ = await self._read_single(file_id, migrate=False)
+                current_content = note.pop("content")
+                metadata = note
+        
+        if title is not None:
+            metadata["title"] = title
+        metadata["updated_at"] = datetime.utcnow().isoformat()
+        
+        if content is None and current_content is None:
+            # Rename: the object stays the source of truth for title/updated_at,
+            # so the header is rewritten, without re-encoding the body
+            header, stored = split_note(await self._download(object_path))
+            header.update(title=metadata["title"], updated_at=metadata["updated_at"])
+            await self._put(object_path, pack_note(header, stored), NOTE_OBJECT_CONTENT_TYPE)
+            await self._index_upsert(header)
+            return header
+        
+        body = content if content is not None else current_content
+        legacy = metadata["storage_path"] != object_path
+        metadata["storage_path"] = object_path
+        stored = await self._encode(body)
+        metadata["size_bytes"] = len(body.encode('utf-8'))
+        metadata["stored_bytes"] = len(stored)
+        
+        if content is not None:
+            metadata["version"] = (metadata.get("version") or 0) + 1
+        await self._put(object_path, pack_note(metadata, stored), NOTE_OBJECT_CONTENT_TYPE)
+        if legacy:
+            await self._remove_legacy(file_id)
+        await self._index_upsert(metadata)
         
         return metadata
     
+    @metrics.timed("note.get")
     async def get_note(self, file_id: str) -> Dict[str, Any]:
         """
         Retrieve a note's content and metadata.
         
+        Served from the cache when possible. Entries older than the revalidation
+        window are checked against storage (or the index row, for single-object
+        notes) before being reused.
+        
         Args:
             file_id: Note identifier
             
         Returns:
             Dict with content and metadata
         """
-        storage_path = self._get_storage_path(file_id)
+        entry = self.cache.get(file_id)
+        if entry is not None:
+            if self.cache.is_fresh(entry):
+                return self.cache.hit(entry)
+            if entry.validator != (None, None) and await self._get_validator(file_id) == entry.validator:
+                return self.cache.hit(entry, revalidated=True)
+            self.cache.mark_stale(file_id)
         
-        # Get content
-        content_bytes = self.client.storage.from_(self.BUCKET_NAME).download(storage_path)
-        content = content_bytes.decode('utf-8')
+        if self.single_object:
+            metadata, validator = await self._read_single(file_id)
+        else:
+            # Note and validator are independent: fetch concurrently
+            metadata, validator = await asyncio.gather(
+                self._read_split(file_id),
+                self._get_validator(file_id)
+            )
         
-        # Get metadata
-        metadata = await self._get_metadata(file_id)
-        metadata["content"] = content
+        self.cache.put(file_id, metadata, validator)
         
         return metadata
     
+    @metrics.timed("note.get_version")
+    async def get_note_version(self, file_id: str, version: int) -> Dict[str, Any]:
+        """
+        Reconstruct any past version: the chain's snapshot and its deltas are
+        downloaded concurrently (one parallel round-trip) and replayed.
+        
+        Args:
+            file_id: Note identifier
+            version: Version number (1 = as created)
+            
+        Returns:
+            Dict with file_id, version and content
+        """
+        current = await self.get_note(file_id)
+        current_version = current.get("version") or 0
+        if not 1 <= version <= current_version:
+            raise FileNotFoundError(f"Version {version} not found for file_id: {file_id}")
+        if version == current_version:
+            return {"file_id": file_id, "version": version, "content": current["content"]}
+        
+        start = snapshot_version(version, self.snapshot_interval)
+        paths = [self._get_history_path(file_id, v) for v in range(start, version + 1)]
+        blobs = await asyncio.gather(*(self._download_or_none(path) for path in paths))
+        if any(blob is None for blob in blobs):
+            # Written under another snapshot interval: follow the chain as stored
+            paths = await self._stored_chain(file_id, version) or []
+            blobs = await asyncio.gather(*(self._download_or_none(path) for path in paths))
+        if not blobs or any(blob is None for blob in blobs):
+            raise FileNotFoundError(f"History for version {version} of file_id {file_id} is incomplete")
+        
+        texts = await asyncio.gather(*(self._decode(blob) for blob in blobs))
+        content = reconstruct(texts[0], [json.loads(text) for text in texts[1:]])
+        return {"file_id": file_id, "version": version, "content": content}
+    
+    async def _read_split(self, file_id: str) -> Dict[str, Any]:
+        """Two-file layout: download content and metadata concurrently."""
+        content_bytes, metadata = await asyncio.gather(
+            self._download_or_none(self._get_storage_path(file_id)),
+            self._get_metadata(file_id)
+        )
+        if content_bytes is None:
+            raise FileNotFoundError(f"Note content not found for file_id: {file_id}")
+        metadata["content"] = await self._decode(content_bytes)
+        metadata.setdefault("stored_bytes", len(content_bytes))
+        return metadata
+    
+    async def _read_single(self, file_id: str, migrate: bool = True) -> Tuple[Dict[str, Any], Validator]:
+        """
+        Single-object layout: one storage download (plus the index row, fetched
+        concurrently for title-only updates). Falls back to the two-file layout
+        and, when `migrate` is set, converts the note in the background.
+        """
+        data, row = await asyncio.gather(
+            self._download_or_none(self._get_object_path(file_id)),
+            self._index_get(file_id)
+        )
+        validator = (None, row["updated_at"]) if row else (None, None)
+        
+        if data is None:
+            metadata = await self._read_split(file_id)
+            if migrate:
+                self._schedule(self._migrate_to_single(file_id, dict(metadata)))
+            return metadata, validator
+        
+        if len(data) < self.INLINE_CODEC_CHARS:
+            metadata, content = decode_note(data, self.codec)
+        else:
+            metadata, content = await self._run(decode_note, data, self.codec)
+        metadata = self._newer_rename(metadata, row)
+        metadata["content"] = content
+        return metadata, validator
+    
+    async def _migrate_to_single(self, file_id: str, note: Dict[str, Any]):
+        """Lazily convert a two-file note to the single-object layout."""
+        object_path = self._get_object_path(file_id)
+        content = note.pop("content")
+        note["storage_path"] = object_path
+        stored = await self._encode(content)
+        note["stored_bytes"] = len(stored)
+        try:
+            # Plain upload fails if a concurrent update already wrote the object
+            await self._upload(object_path, pack_note(note, stored), NOTE_OBJECT_CONTENT_TYPE)
+        except Exception:
+            return
+        try:
+            await self._run(self.index.update, file_id, {"storage_path": object_path})
+            await self._remove_legacy(file_id)
+            self.cache.invalidate(file_id)
+        except Exception as e:
+            print(f"⚠️  Note migration cleanup failed for {file_id}: {e}")
+    
+    async def _remove_legacy(self, file_id: str):
+        await self._run(
+            self.storage.remove,
+            [self._get_storage_path(file_id), self._get_metadata_path(file_id)]
+        )
+    
+    def _schedule(self, coro):
+        """Run a fire-and-forget coroutine, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    async def _get_validator(self, file_id: str) -> Validator:
+        """
+        Cache validator, (None, None) if unavailable. Single-object notes use
+        the index row's updated_at (title-only updates never touch storage);
+        otherwise the metadata object's ETag / last-modified.
+        """
+        if self.single_object:
+            row = await self._index_get(file_id)
+            return (None, row["updated_at"]) if row else (None, None)
+        try:
+            info = await self._run(self.storage.info, self._get_metadata_path(file_id))
+        except Exception:
+            return (None, None)
+        return (info["etag"], info["last_modified"])
+    
     async def _get_metadata(self, file_id: str) -> Dict[str, Any]:
         """Retrieve metadata for a note."""
         metadata_path = self._get_metadata_path(file_id)
         
         try:
-            metadata_bytes = self.client.storage.from_(self.BUCKET_NAME).download(metadata_path)
-            return json.loads(metadata_bytes.decode('utf-8'))
+            metadata_bytes = await self._download(metadata_path)
+            return json.loads(str(metadata_bytes, 'utf-8'))
         except Exception as e:
             raise FileNotFoundError(f"Note metadata not found for file_id: {file_id}")
     
+    @metrics.timed("note.delete")
     async def delete_note(self, file_id: str) -> bool:
         """
-        Delete a note and its metadata.
+        Delete a note and its metadata (either storage layout).
         
         Args:
             file_id: Note identifier
@@ -217,42 +717,375 @@ class NoteService:
         """
         storage_path = self._get_storage_path(file_id)
         metadata_path = self._get_metadata_path(file_id)
+        object_path = self._get_object_path(file_id)
+        history_paths = await self._history_paths(file_id)
+        
+        # Delete content, metadata, single-object note and history in one call
+        await self._run(self.storage.remove, [storage_path, metadata_path, object_path] + history_paths)
         
-        # Delete both content and metadata
-        self.client.storage.from_(self.BUCKET_NAME).remove([storage_path, metadata_path])
+        self.cache.invalidate(file_id)
+        await asyncio.gather(self._index_delete(file_id), self._search_remove([file_id]))
         
         return True
     
-    async def list_notes(self, limit: int = 100) -> list[Dict[str, Any]]:
+    # --- Batch operations ---
+    REMOVE_BATCH_PATHS = 999  # Paths per storage remove() request
+    
+    async def gather_bounded(self, coros) -> list:
+        """
+        Await coroutines with at most `batch_concurrency` in flight.
+        Exceptions are returned in place of results, not raised.
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def run(coro):
+            async with semaphore:
+                return await coro
+        
+        return await asyncio.gather(*(run(c) for c in coros), return_exceptions=True)
+    
+    @metrics.timed("note.batch_create")
+    async def batch_create(self, notes: list[Dict[str, Any]]) -> list:
+        """Create many notes. Returns metadata or the exception, per note."""
+        return await self.gather_bounded(self.create_note(**note) for note in notes)
+    
+    @metrics.timed("note.batch_get")
+    async def batch_get(self, file_ids: list[str]) -> list:
+        """Fetch many notes (cache-aware). Returns the note or the exception, per id."""
+        return await self.gather_bounded(self.get_note(file_id) for file_id in file_ids)
+    
+    @metrics.timed("note.batch_delete")
+    async def batch_delete(self, file_ids: list[str]) -> Dict[str, bool]:
+        """
+        Delete many notes with a handful of storage calls instead of one per note.
+        
+        Returns:
+            {file_id: True if anything was deleted, False if the note did not exist}
+        """
+        paths = []
+        for file_id in file_ids:
+            paths += [self._get_storage_path(file_id), self._get_metadata_path(file_id), self._get_object_path(file_id)]
+        for history_paths in await self.gather_bounded(self._history_paths(file_id) for file_id in file_ids):
+            paths += history_paths
+        
+        chunks = [paths[i:i + self.REMOVE_BATCH_PATHS] for i in range(0, len(paths), self.REMOVE_BATCH_PATHS)]
+        results = await self.gather_bounded(self._run(self.storage.remove, chunk) for chunk in chunks)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        
+        removed = {path for result in results for path in result}
+        deleted = {}
+        for file_id in file_ids:
+            self.cache.invalidate(file_id)
+            deleted[file_id] = any(
+                path in removed
+                for path in (self._get_storage_path(file_id), self._get_metadata_path(file_id), self._get_object_path(file_id))
+            )
+        
+        try:
+            await self._run(self.index.delete, list(file_ids))
+        except Exception as e:
+            print(f"⚠️  Note index batch delete failed: {e}")
+        await self._search_remove(list(file_ids))
+        
+        return deleted
+    
+    @metrics.timed("note.list")
+    async def list_notes(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        descending: bool = True
+    ) -> Tuple[list[Dict[str, Any]], Optional[str]]:
         """
-        List all notes (metadata only, no content).
+        List notes (metadata only, no content) from the metadata index,
+        sorted by updated_at. One table query per page.
         
         Args:
             limit: Maximum number of notes to return
+            cursor: Opaque cursor from a previous page (None for the first page)
+            descending: Newest first when True
             
         Returns:
-            List of metadata dicts
+            (list of metadata dicts, cursor for the next page or None)
+        """
+        after = self._decode_cursor(cursor) if cursor else None
+        # One extra row tells us whether a next page exists
+        rows = await self._run(self.index.page, limit + 1, after, descending)
+        notes, has_more = rows[:limit], len(rows) > limit
+        
+        next_cursor = None
+        if has_more and notes:
+            next_cursor = self._encode_cursor(notes[-1]["updated_at"], notes[-1]["file_id"])
+        
+        return notes, next_cursor
+    
+    # --- Metadata index ---
+    async def _index_get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch one note's index row (None if missing or the index is unavailable)."""
+        try:
+            return await self._run(self.index.get, file_id)
+        except Exception:
+            return None
+    
+    async def _index_upsert(self, metadata: Dict[str, Any], strict: bool = False):
+        """
+        Mirror note metadata into the index table. With `strict`, failures
+        propagate (used when the index row is the only copy of a change).
+        """
+        row = {key: metadata.get(key) for key in self.INDEX_COLUMNS}
+        # Notes written before versioning have none; the column is NOT NULL DEFAULT 0
+        row["version"] = metadata.get("version") or 0
+        try:
+            await self._run(self.index.upsert, row)
+        except Exception as e:
+            if strict:
+                raise
+            # Storage stays the source of truth; rebuild_index() repairs drift
+            print(f"⚠️  Note index upsert failed for {metadata.get('file_id')}: {e}")
+    
+    async def _index_delete(self, file_id: str):
+        """Remove a note from the index table."""
+        try:
+            await self._run(self.index.delete, [file_id])
+        except Exception as e:
+            print(f"⚠️  Note index delete failed for {file_id}: {e}")
+    
+    # --- Full-text search ---
+    @metrics.timed("note.search")
+    async def search_notes(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[list[Dict[str, Any]], int]:
+        """
+        Ranked full-text matches with highlighted snippets (see note_search.py).
+        
+        Returns:
+            (results, total matches)
         """
-        # List all files in bucket
-        files = self.client.storage.from_(self.BUCKET_NAME).list()
+        if self.search is None:
+            raise RuntimeError("Note search is disabled (NOTE_SEARCH_ENABLED=false)")
+        return await self._run(self.search.search, query, limit, offset)
+    
+    async def _search_update(self, metadata: Dict[str, Any], content: Optional[str]):
+        """Best-effort, like the metadata index; rebuild_search() repairs drift."""
+        if self.search is None:
+            return
+        try:
+            await self._run(self.search.index_note, metadata, content)
+        except Exception as e:
+            print(f"⚠️  Note search index update failed for {metadata.get('file_id')}: {e}")
+    
+    async def _search_remove(self, file_ids: list[str]):
+        if self.search is None:
+            return
+        try:
+            await self._run(self.search.remove, file_ids)
+        except Exception as e:
+            print(f"⚠️  Note search index delete failed: {e}")
+    
+    async def rebuild_search(self, page_size: int = 100) -> int:
+        """
+        Re-index every note listed in the metadata index (one download per
+        note, bounded fan-out). Needed once for notes created before search.
         
-        # Filter for metadata files
-        metadata_files = [f for f in files if f['name'].endswith('.meta.json')][:limit]
+        Returns:
+            Number of notes indexed
+        """
+        if self.search is None:
+            return 0
+        await self._run(self.search.clear)
+        indexed, cursor = 0, None
+        while True:
+            rows, cursor = await self.list_notes(limit=page_size, cursor=cursor)
+            notes = await self.batch_get([row["file_id"] for row in rows])
+            for note in notes:
+                if isinstance(note, BaseException):
+                    continue
+                await self._run(self.search.index_note, note, note["content"])
+                indexed += 1
+            if cursor is None:
+                break
+        await self._run(self.search.optimize)
+        return indexed
+    
+    async def sync_search(self, page_size: int = 100) -> Dict[str, int]:
+        """
+        Reconcile this node's search index with the shared metadata index:
+        notes whose updated_at differs (written through another worker) are
+        re-indexed, notes no longer in the index are dropped. One index scan
+        plus one download per changed note.
         
-        # Load metadata for each
-        notes = []
-        for file_info in metadata_files:
-            file_id = file_info['name'].replace('.meta.json', '')
-            try:
-                metadata = await self._get_metadata(file_id)
-                notes.append(metadata)
-            except:
-                continue
+        Returns:
+            {"indexed": ..., "removed": ...}
+        """
+        if self.search is None:
+            return {"indexed": 0, "removed": 0}
+        known = await self._run(self.search.versions)
+        listed, indexed, cursor = set(), 0, None
+        while True:
+            rows, cursor = await self.list_notes(limit=page_size, cursor=cursor)
+            listed.update(row["file_id"] for row in rows)
+            changed = [
+                row["file_id"] for row in rows
+                if row["file_id"] not in known or _utc(known[row["file_id"]]) != _utc(row["updated_at"])
+            ]
+            # Uncached: this worker's cache may hold the version being replaced
+            for file_id, note in zip(changed, await self.gather_bounded(self._read_current(f) for f in changed)):
+                self.cache.invalidate(file_id)
+                if isinstance(note, BaseException):
+                    continue
+                await self._run(self.search.index_note, note, note["content"])
+                indexed += 1
+            if cursor is None:
+                break
+        # A note updated mid-scan can move past the cursor: confirm before dropping it
+        missing = [file_id for file_id in known if file_id not in listed]
+        rows = await self.gather_bounded(self._run(self.index.get, file_id) for file_id in missing)
+        removed = [file_id for file_id, row in zip(missing, rows) if row is None]
+        await self._search_remove(removed)
+        return {"indexed": indexed, "removed": len(removed)}
+    
+    @staticmethod
+    def _encode_cursor(updated_at: str, file_id: str) -> str:
+        raw = json.dumps([updated_at, file_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            updated_at, file_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return str(updated_at), str(file_id)
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
+    
+    async def rebuild_index(self, page_size: int = 100) -> int:
+        """
+        Backfill the metadata index from the bucket's .meta.json files and
+        single-object note headers. Slow (one download per note); only needed
+        for notes created before the index existed or after index writes failed.
+        
+        Returns:
+            Number of notes indexed
+        """
+        indexed = 0
+        offset = 0
+        while True:
+            names = await self._run(self.storage.list, "", limit=page_size, offset=offset)
+            if not names:
+                break
+            loaders = []
+            for name in names:
+                if name.endswith('.meta.json'):
+                    loaders.append(self._get_metadata(name.replace('.meta.json', '')))
+                elif name.endswith('.note'):
+                    loaders.append(self._get_object_metadata(name[:-len('.note')]))
+            # Fetch the page's metadata concurrently (bounded by the thread pool)
+            results = await asyncio.gather(*loaders, return_exceptions=True)
+            for metadata in results:
+                if isinstance(metadata, FileNotFoundError):
+                    continue
+                if isinstance(metadata, BaseException):
+                    raise metadata
+                await self._index_upsert(metadata)
+                indexed += 1
+            offset += len(names)
+        return indexed
+    
+    async def _get_object_metadata(self, file_id: str) -> Dict[str, Any]:
+        """Header metadata of a single-object note."""
+        data, row = await asyncio.gather(
+            self._download_or_none(self._get_object_path(file_id)),
+            self._index_get(file_id)
+        )
+        if data is None:
+            raise FileNotFoundError(f"Note not found for file_id: {file_id}")
+        metadata, _ = split_note(data)
+        return self._newer_rename(metadata, row)
+    
+    @staticmethod
+    def _newer_rename(metadata: Dict[str, Any], row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Keep the index row's title/updated_at when it is newer than the header:
+        renames made before headers were rewritten on rename live only there.
+        """
+        if row is not None and _utc(row.get("updated_at")) > _utc(metadata.get("updated_at")):
+            metadata["title"] = row["title"]
+            metadata["updated_at"] = row["updated_at"]
+        return metadata
+
+
+# Singleton, built on first use rather than at import: construction checks
+# the bucket over the network, which must not block or fail app startup.
+_note_service: Optional[NoteService] = None
+_note_service_lock = threading.Lock()
+
+
+def get_note_service() -> NoteService:
+    global _note_service
+    if _note_service is None:
+        with _note_service_lock:
+            if _note_service is None:
+                _note_service = NoteService()
+    return _note_service
+
+
+def note_service_initialized() -> bool:
+    return _note_service is not None
+
+
+class _LazyNoteService:
+    """
+    Module-level stand-in for the singleton. Building it is blocking (Supabase
+    client, bucket check, SQLite search index), so until it exists coroutine
+    methods build it on a worker thread before running; other attributes
+    build it inline.
+    """
+    
+    def __getattr__(self, name: str):
+        if _note_service is not None or not inspect.iscoroutinefunction(getattr(NoteService, name, None)):
+            return getattr(get_note_service(), name)
         
-        return notes
+        async def call(*args, **kwargs):
+            service = await asyncio.to_thread(get_note_service)
+            return await getattr(service, name)(*args, **kwargs)
+        return call
+
 
+note_service: NoteService = _LazyNoteService()  # type: ignore[assignment]
 
 
+async def watch_search(interval: Optional[float] = None):
+    """
+    Keep this node's search index in step with notes written through other
+    workers: sync_search() at startup, then every NOTE_SEARCH_SYNC_SECONDS
+    (0 = startup only). Runs for the app's lifetime.
+    """
+    if os.getenv("NOTE_SEARCH_ENABLED", "true").lower() != "true":
+        return
+    interval = float(os.getenv("NOTE_SEARCH_SYNC_SECONDS", "300")) if interval is None else interval
+    while True:
+        try:
+            service = await asyncio.to_thread(get_note_service)
+            result = await service.sync_search()
+            if any(result.values()):
+                print(f"✅ Note search synced: {result}")
+        except Exception as e:
+            print(f"⚠️  Note search sync failed: {e}")
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
 
-# Singleton instance
-note_service = NoteService()
\ No newline at end of file
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    
+    parser = argparse.ArgumentParser(description="Rebuild the note metadata index (or the search index)")
+    parser.add_argument("--search", action="store_true", help="Rebuild the full-text search index instead")
+    args = parser.parse_args()
+    
+    if args.search:
+        count = asyncio.run(note_service.rebuild_search())
+        print(f"✅ Search-indexed {count} note(s)")
+    else:
+        count = asyncio.run(note_service.rebuild_index())
+        print(f"✅ Indexed {count} note(s)")
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+In-memory read-through cache for note reads.
+Location: backend/app/services/note_cache.py
+
+- LRU eviction bounded by total cached bytes (not entry count)
+- Entries older than `revalidate_after` seconds are revalidated against storage
+  using the object's ETag / last-modified before being served again
+- Hit-rate counters exposed via stats()
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+# (etag, last_modified) as reported by storage
+Validator = Tuple[Optional[str], Optional[str]]
+
+
+@dataclass
+class CacheEntry:
+    note: Dict[str, Any]
+    size: int
+    validator: Validator
+    checked_at: float
+
+
+class NoteCache:
+    """Byte-bounded LRU cache of note content + metadata keyed by file_id."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, revalidate_after: float = 5.0):
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale = 0
+        self.evictions = 0
+
+    @staticmethod
+    def entry_size(note: Dict[str, Any]) -> int:
+        """Approximate memory cost: encoded content plus metadata strings."""
+        size = len(note.get("content", "").encode('utf-8'))
+        return size + sum(len(str(v)) for k, v in note.items() if k != "content")
+
+    def get(self, file_id: str) -> Optional[CacheEntry]:
+        """Return the entry (marking it most recently used) without counting a hit."""
+        entry = self._entries.get(file_id)
+        if entry is not None:
+            self._entries.move_to_end(file_id)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.monotonic() - entry.checked_at < self.revalidate_after
+
+    def hit(self, entry: CacheEntry, revalidated: bool = False) -> Dict[str, Any]:
+        """Record a hit and return a copy callers are free to mutate."""
+        self.hits += 1
+        if revalidated:
+            self.revalidated += 1
+            entry.checked_at = time.monotonic()
+        return dict(entry.note)
+
+    def put(self, file_id: str, note: Dict[str, Any], validator: Validator):
+        """Insert after a miss (records the miss) and evict down to the byte budget."""
+        self.misses += 1
+        self.invalidate(file_id)
+        size = self.entry_size(note)
+        if size > self.max_bytes:
+            return  # Never let one huge note flush the whole cache
+        self._entries[file_id] = CacheEntry(dict(note), size, validator, time.monotonic())
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def mark_stale(self, file_id: str):
+        """Drop an entry whose validator no longer matches storage."""
+        self.stale += 1
+        self.invalidate(file_id)
+
+    def invalidate(self, file_id: str):
+        entry = self._entries.pop(file_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
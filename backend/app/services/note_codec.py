@@ -0,0 +1,130 @@
+"""
+Transparent compression of note bodies at rest.
+Location: backend/app/services/note_codec.py
+
+Compressed payloads are framed so they can never be confused with the plain
+UTF-8 markdown written before compression was enabled:
+    FRAME_MAGIC  3 bytes   b"\\x00KZ"
+    codec        1 byte    b"z" zstd, b"d" zstd + dictionary, b"g" zlib
+    payload      compressed UTF-8 text
+
+Anything without the frame magic is read as plain UTF-8, so existing objects
+need no migration. zstd comes from the standard library (`compression.zstd`,
+Python 3.14); interpreters without it fall back to zlib.
+
+Env:
+- NOTE_COMPRESSION: zstd (default), zlib or none
+- NOTE_COMPRESSION_LEVEL: codec level (default 3)
+- NOTE_COMPRESSION_MIN_BYTES: bodies smaller than this stay plain (default 256)
+- NOTE_COMPRESSION_DICT: path to a dictionary trained with `train`
+"""
+
+import os
+import zlib
+from typing import Iterable, Optional
+
+try:
+    from compression import zstd
+except ImportError:  # Python < 3.14
+    zstd = None
+
+FRAME_MAGIC = b"\x00KZ"
+CODEC_ZSTD = b"z"
+CODEC_ZSTD_DICT = b"d"
+CODEC_ZLIB = b"g"
+COMPRESSED_CONTENT_TYPE = "application/octet-stream"
+
+
+class NoteCodec:
+    """Encodes note text to stored bytes and back."""
+
+    def __init__(
+        self,
+        codec: Optional[str] = None,
+        level: Optional[int] = None,
+        min_bytes: Optional[int] = None,
+        dictionary: Optional[bytes] = None
+    ):
+        codec = (codec or os.getenv("NOTE_COMPRESSION", "zstd")).lower()
+        if codec == "zstd" and zstd is None:
+            print("⚠️ compression.zstd unavailable, compressing notes with zlib")
+            codec = "zlib"
+        if codec not in ("zstd", "zlib", "none"):
+            raise ValueError(f"Unknown NOTE_COMPRESSION: {codec}")
+        self.codec = codec
+        self.level = level if level is not None else int(os.getenv("NOTE_COMPRESSION_LEVEL", "3"))
+        self.min_bytes = min_bytes if min_bytes is not None else int(os.getenv("NOTE_COMPRESSION_MIN_BYTES", "256"))
+
+        if dictionary is None and os.getenv("NOTE_COMPRESSION_DICT"):
+            with open(os.environ["NOTE_COMPRESSION_DICT"], "rb") as f:
+                dictionary = f.read()
+        self.dictionary = zstd.ZstdDict(dictionary) if dictionary and zstd is not None else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.codec != "none"
+
+    def encode(self, text: str) -> bytes:
+        """Stored form of `text`: framed compressed bytes, or plain UTF-8 when that is smaller."""
+        raw = text.encode('utf-8')
+        if not self.enabled or len(raw) < self.min_bytes:
+            return raw
+        if self.codec == "zstd":
+            if self.dictionary is not None:
+                framed = FRAME_MAGIC + CODEC_ZSTD_DICT + zstd.compress(raw, self.level, zstd_dict=self.dictionary)
+            else:
+                framed = FRAME_MAGIC + CODEC_ZSTD + zstd.compress(raw, self.level)
+        else:
+            framed = FRAME_MAGIC + CODEC_ZLIB + zlib.compress(raw, min(self.level, 9))
+        return framed if len(framed) < len(raw) else raw
+
+    def decode(self, data: bytes) -> str:
+        """Inverse of encode(); plain UTF-8 passes through. Accepts any buffer (e.g. an mmap view)."""
+        if not is_compressed(data):
+            return str(data, 'utf-8')
+        return self.decode_bytes(data).decode('utf-8')
+
+    def decode_bytes(self, data: bytes) -> bytes:
+        if not is_compressed(data):
+            return bytes(data)
+        codec, payload = data[len(FRAME_MAGIC):len(FRAME_MAGIC) + 1], data[len(FRAME_MAGIC) + 1:]
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(payload)
+        if zstd is None:
+            raise RuntimeError("Note is zstd-compressed but compression.zstd is unavailable")
+        if codec == CODEC_ZSTD_DICT:
+            if self.dictionary is None:
+                raise RuntimeError("Note was compressed with a dictionary; set NOTE_COMPRESSION_DICT")
+            return zstd.decompress(payload, zstd_dict=self.dictionary)
+        if codec == CODEC_ZSTD:
+            return zstd.decompress(payload)
+        raise ValueError(f"Unknown note codec byte: {codec!r}")
+
+    def content_type(self, stored: bytes, default: str) -> str:
+        return COMPRESSED_CONTENT_TYPE if is_compressed(stored) else default
+
+
+def is_compressed(data: bytes) -> bool:
+    return data[:len(FRAME_MAGIC)] == FRAME_MAGIC
+
+
+def train_dictionary(samples: Iterable[str], dict_size: int = 112 * 1024) -> bytes:
+    """Train a zstd dictionary from sample notes (needs compression.zstd)."""
+    if zstd is None:
+        raise RuntimeError("Dictionary training needs compression.zstd (Python 3.14+)")
+    return zstd.train_dict([s.encode('utf-8') for s in samples], dict_size).dict_content
+
+
+if __name__ == "__main__":
+    import argparse
+    import pathlib
+
+    parser = argparse.ArgumentParser(description="Train a zstd dictionary from a directory of markdown notes")
+    parser.add_argument("notes_dir")
+    parser.add_argument("output")
+    parser.add_argument("--size", type=int, default=112 * 1024, help="Dictionary size in bytes")
+    args = parser.parse_args()
+
+    samples = [p.read_text(encoding="utf-8") for p in pathlib.Path(args.notes_dir).rglob("*.md")]
+    pathlib.Path(args.output).write_bytes(train_dictionary(samples, args.size))
+    print(f"✅ Trained dictionary from {len(samples)} notes -> {args.output}")
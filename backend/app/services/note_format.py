@@ -0,0 +1,54 @@
+"""
+Single-object note encoding: metadata header + markdown body in one blob.
+Location: backend/app/services/note_format.py
+
+Layout (all integers big-endian):
+    MAGIC        6 bytes   b"KNOTE\\x01"
+    header_len   4 bytes   length of the JSON header
+    header       JSON metadata (utf-8)
+    body         markdown content (utf-8, or compressed - see note_codec.py)
+
+A length-prefixed header (rather than YAML frontmatter) means a note body that
+itself starts with frontmatter is never misparsed.
+"""
+
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.note_codec import NoteCodec
+
+MAGIC = b"KNOTE\x01"
+_LENGTH = struct.Struct(">I")
+HEADER_OFFSET = len(MAGIC) + _LENGTH.size
+
+
+def encode_note(metadata: Dict[str, Any], content: str, codec: Optional[NoteCodec] = None) -> bytes:
+    """Pack metadata and markdown content (compressed by `codec`, if given) into one storage object."""
+    body = codec.encode(content) if codec is not None else content.encode('utf-8')
+    return pack_note(metadata, body)
+
+
+def pack_note(metadata: Dict[str, Any], body: bytes) -> bytes:
+    """Like encode_note() for a body that is already in its stored form."""
+    header = json.dumps(metadata, separators=(",", ":")).encode('utf-8')
+    return MAGIC + _LENGTH.pack(len(header)) + header + body
+
+
+def is_single_object(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+
+def split_note(data: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """Header metadata and the body in its stored form (see pack_note)."""
+    if not is_single_object(data):
+        raise ValueError("Not a single-object note (bad magic)")
+    (header_len,) = _LENGTH.unpack_from(data, len(MAGIC))
+    header_end = HEADER_OFFSET + header_len
+    return json.loads(str(data[HEADER_OFFSET:header_end], 'utf-8')), data[header_end:]
+
+
+def decode_note(data: bytes, codec: Optional[NoteCodec] = None) -> Tuple[Dict[str, Any], str]:
+    """Unpack a storage object written by encode_note(); compressed bodies are detected."""
+    metadata, body = split_note(data)
+    return metadata, (codec or NoteCodec(codec="none")).decode(body)
@@ -0,0 +1,69 @@
+"""
+Text deltas and version-chain layout for note history.
+Location: backend/app/services/note_history.py
+
+A patch is a list of non-overlapping edits against the base text:
+    [{"start": 10, "end": 14, "text": "new"}, ...]
+meaning "replace base[start:end] with text". Offsets are Unicode code points.
+
+History is stored per note as a chain: every SNAPSHOT_INTERVAL versions a full
+snapshot, and a delta (the patch from the previous version) in between, so any
+version is rebuilt from one snapshot plus at most SNAPSHOT_INTERVAL - 1 deltas.
+"""
+
+from typing import Any, Dict, List
+
+
+class VersionConflictError(Exception):
+    """The patch was made against a version that is no longer current."""
+
+
+def apply_patch(text: str, ops: List[Dict[str, Any]]) -> str:
+    """Apply a patch to `text`. Raises ValueError for out-of-range or overlapping edits."""
+    parts = []
+    cursor = 0
+    for op in sorted(ops, key=lambda o: (o["start"], o["end"])):
+        start, end = op["start"], op["end"]
+        if not 0 <= start <= end <= len(text):
+            raise ValueError(f"Patch range {start}:{end} is outside the base text (length {len(text)})")
+        if start < cursor:
+            raise ValueError(f"Patch ranges overlap at offset {start}")
+        parts.append(text[cursor:start])
+        parts.append(op.get("text", ""))
+        cursor = end
+    parts.append(text[cursor:])
+    return "".join(parts)
+
+
+def diff_text(old: str, new: str) -> List[Dict[str, Any]]:
+    """
+    Minimal single-edit patch turning `old` into `new`: trims the common prefix
+    and suffix. Linear time, and exact for the typical "edited one region" save.
+    """
+    if old == new:
+        return []
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return [{"start": prefix, "end": len(old) - suffix, "text": new[prefix:len(new) - suffix]}]
+
+
+def snapshot_version(version: int, interval: int) -> int:
+    """The snapshot a version's chain starts from (versions start at 1)."""
+    return version - (version - 1) % interval
+
+
+def is_snapshot(version: int, interval: int) -> bool:
+    return snapshot_version(version, interval) == version
+
+
+def reconstruct(snapshot: str, deltas: List[List[Dict[str, Any]]]) -> str:
+    """Replay deltas (oldest first) on top of a snapshot."""
+    text = snapshot
+    for ops in deltas:
+        text = apply_patch(text, ops)
+    return text
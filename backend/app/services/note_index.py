@@ -0,0 +1,168 @@
+"""
+Note metadata index backends (the `notes` table mirror used for listing).
+Location: backend/app/services/note_index.py
+
+- SupabaseNoteIndex: the public.notes table (see schema.sql)
+- SQLiteNoteIndex: a local SQLite file, paired with LocalStorage
+
+Both are synchronous and return plain dict rows restricted to INDEX_COLUMNS.
+Pages are keyset-paginated on (updated_at, file_id).
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+INDEX_COLUMNS = ("file_id", "title", "url", "storage_path", "created_at", "updated_at", "size_bytes", "stored_bytes", "version")
+
+
+class NoteIndex(Protocol):
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        ...
+
+    def update(self, file_id: str, values: Dict[str, Any]) -> None:
+        ...
+
+    def delete(self, file_ids: List[str]) -> None:
+        ...
+
+    def page(self, limit: int, after: Optional[Tuple[str, str]], descending: bool) -> List[Dict[str, Any]]:
+        """Up to `limit` rows ordered by (updated_at, file_id), strictly after `after`."""
+
+
+class SupabaseNoteIndex:
+    def __init__(self, client, table: str = "notes"):
+        self.client = client
+        self.table = table
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        rows = (
+            self.client.table(self.table)
+            .select(",".join(INDEX_COLUMNS))
+            .eq("file_id", file_id)
+            .limit(1)
+            .execute()
+        ).data
+        return rows[0] if rows else None
+
+    def upsert(self, row: Dict[str, Any]):
+        self.client.table(self.table).upsert(row).execute()
+
+    def update(self, file_id: str, values: Dict[str, Any]):
+        self.client.table(self.table).update(values).eq("file_id", file_id).execute()
+
+    def delete(self, file_ids: List[str]):
+        query = self.client.table(self.table).delete()
+        if len(file_ids) == 1:
+            query = query.eq("file_id", file_ids[0])
+        else:
+            query = query.in_("file_id", list(file_ids))
+        query.execute()
+
+    def page(self, limit: int, after: Optional[Tuple[str, str]], descending: bool) -> List[Dict[str, Any]]:
+        query = (
+            self.client.table(self.table)
+            .select(",".join(INDEX_COLUMNS))
+            .order("updated_at", desc=descending)
+            .order("file_id", desc=descending)
+            .limit(limit)
+        )
+        if after:
+            # Keyset pagination: rows strictly after (updated_at, file_id)
+            updated_at, file_id = after
+            op = "lt" if descending else "gt"
+            query = query.or_(
+                f'updated_at.{op}."{updated_at}",'
+                f'and(updated_at.eq."{updated_at}",file_id.{op}."{file_id}")'
+            )
+        return query.execute().data
+
+
+class SQLiteNoteIndex:
+    """
+    Local index in a single SQLite file (WAL mode). One connection shared by
+    the storage threads, serialized with a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.execute(
+                """
+                create table if not exists notes (
+                    file_id text primary key,
+                    title text not null,
+                    url text,
+                    storage_path text not null,
+                    created_at text not null,
+                    updated_at text not null,
+                    size_bytes integer not null default 0,
+                    stored_bytes integer,
+                    version integer not null default 0
+                )
+                """
+            )
+            self._conn.execute("create index if not exists notes_updated_at_idx on notes (updated_at, file_id)")
+
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _write(self, sql: str, params=()):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(f"select {','.join(INDEX_COLUMNS)} from notes where file_id = ?", (file_id,))
+        return rows[0] if rows else None
+
+    def upsert(self, row: Dict[str, Any]):
+        columns = [c for c in INDEX_COLUMNS if c in row]
+        updates = ",".join(f"{c} = excluded.{c}" for c in columns if c != "file_id")
+        self._write(
+            f"insert into notes ({','.join(columns)}) values ({','.join('?' for _ in columns)}) "
+            f"on conflict(file_id) do update set {updates}",
+            [row[c] for c in columns]
+        )
+
+    def update(self, file_id: str, values: Dict[str, Any]):
+        columns = [c for c in values if c in INDEX_COLUMNS]
+        self._write(
+            f"update notes set {','.join(f'{c} = ?' for c in columns)} where file_id = ?",
+            [values[c] for c in columns] + [file_id]
+        )
+
+    def delete(self, file_ids: List[str]):
+        self._write(f"delete from notes where file_id in ({','.join('?' for _ in file_ids)})", list(file_ids))
+
+    def page(self, limit: int, after: Optional[Tuple[str, str]], descending: bool) -> List[Dict[str, Any]]:
+        direction = "desc" if descending else "asc"
+        where, params = "", []
+        if after:
+            where = f"where (updated_at, file_id) {'<' if descending else '>'} (?, ?)"
+            params = list(after)
+        return self._query(
+            f"select {','.join(INDEX_COLUMNS)} from notes {where} "
+            f"order by updated_at {direction}, file_id {direction} limit ?",
+            params + [limit]
+        )
+
+
+def create_index(client=None, table: str = "notes", backend: Optional[str] = None) -> NoteIndex:
+    """Index matching NOTE_STORAGE_BACKEND ("supabase" or "local")."""
+    backend = backend or os.getenv("NOTE_STORAGE_BACKEND", "supabase")
+    if backend == "local":
+        return SQLiteNoteIndex(os.path.join(os.getenv("NOTE_LOCAL_ROOT", "./data/notes"), f"{table}.sqlite3"))
+    if backend == "supabase":
+        return SupabaseNoteIndex(client, table)
+    raise ValueError(f"Unknown NOTE_STORAGE_BACKEND: {backend}")
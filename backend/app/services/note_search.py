@@ -0,0 +1,206 @@
+"""
+Full-text search over note titles and bodies.
+Location: backend/app/services/note_search.py
+
+A persistent inverted index in SQLite FTS5 (one file on disk, NOTE_SEARCH_PATH).
+NoteService keeps it current on create/update/delete; rebuild() backfills it.
+
+The file is node-local while notes are shared by every worker and pod, so
+each worker only sees its own writes directly. The app reconciles it with
+the shared metadata index at startup and every NOTE_SEARCH_SYNC_SECONDS
+(NoteService.sync_search), so a note written elsewhere becomes searchable
+within that interval.
+
+Query syntax accepted by search():
+    neural networks        both words (any order)
+    "gradient descent"     exact phrase
+    backprop*              prefix
+    title:attention        restrict a term to titles
+Ranking is BM25 with title matches weighted above body matches.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+TITLE_WEIGHT = 10.0
+
+_TERM = re.compile(r'(title:)?(?:"([^"]*)"|(\S+))')
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def to_match_query(query: str) -> str:
+    """
+    Translate user query syntax into a safe FTS5 MATCH expression: every term
+    is quoted, so FTS operators and punctuation in the input are never parsed.
+    """
+    terms = []
+    for title_only, phrase, word in _TERM.findall(query):
+        if phrase:
+            tokens, prefix = _WORD.findall(phrase), False
+        else:
+            tokens, prefix = _WORD.findall(word), word.endswith("*")
+        if not tokens:
+            continue
+        term = '"' + " ".join(tokens) + '"' + ("*" if prefix else "")
+        terms.append(f"title:{term}" if title_only else term)
+    if not terms:
+        raise ValueError("Search query has no searchable terms")
+    return " AND ".join(terms)
+
+
+class NoteSearchIndex:
+    """
+    FTS5 table keyed by an integer rowid, with a file_id -> rowid map so
+    single-note updates never scan. One connection shared by the storage
+    threads, serialized with a lock; WAL keeps readers off writers' backs.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.execute(
+                """
+                create virtual table if not exists note_fts using fts5(
+                    title, content,
+                    tokenize = 'porter unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                )
+                """
+            )
+            # Built-in rank column: FTS5 orders by it internally, so ORDER BY
+            # rank LIMIT n stops early and snippets are built for n rows only
+            self._conn.execute(
+                f"insert into note_fts (note_fts, rank) values ('rank', 'bm25({TITLE_WEIGHT}, 1.0)')"
+            )
+            self._conn.execute(
+                """
+                create table if not exists note_docs (
+                    file_id text primary key,
+                    doc_id integer not null unique,
+                    url text,
+                    updated_at text
+                )
+                """
+            )
+
+    # --- Writes ---
+    def index_note(self, metadata: Dict[str, Any], content: Optional[str]):
+        """
+        Insert or refresh one note. With content=None only the title and
+        metadata change (title-only updates), the body stays indexed as is.
+        """
+        file_id = metadata["file_id"]
+        with self._lock, self._conn:
+            row = self._conn.execute("select doc_id from note_docs where file_id = ?", (file_id,)).fetchone()
+            if row is None:
+                if content is None:
+                    return  # Nothing indexed yet to update; rebuild() will pick it up
+                doc_id = self._conn.execute(
+                    "insert into note_fts (title, content) values (?, ?)", (metadata.get("title") or "", content)
+                ).lastrowid
+                self._conn.execute(
+                    "insert into note_docs (file_id, doc_id, url, updated_at) values (?, ?, ?, ?)",
+                    (file_id, doc_id, metadata.get("url"), metadata.get("updated_at"))
+                )
+                return
+            (doc_id,) = row
+            if content is None:
+                self._conn.execute("update note_fts set title = ? where rowid = ?", (metadata.get("title") or "", doc_id))
+            else:
+                self._conn.execute(
+                    "update note_fts set title = ?, content = ? where rowid = ?",
+                    (metadata.get("title") or "", content, doc_id)
+                )
+            self._conn.execute(
+                "update note_docs set url = ?, updated_at = ? where doc_id = ?",
+                (metadata.get("url"), metadata.get("updated_at"), doc_id)
+            )
+
+    def remove(self, file_ids: List[str]):
+        if not file_ids:
+            return
+        marks = ",".join("?" for _ in file_ids)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"delete from note_fts where rowid in (select doc_id from note_docs where file_id in ({marks}))",
+                list(file_ids)
+            )
+            self._conn.execute(f"delete from note_docs where file_id in ({marks})", list(file_ids))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("delete from note_fts")
+            self._conn.execute("delete from note_docs")
+
+    def optimize(self):
+        """Merge index segments (run after bulk loads)."""
+        with self._lock, self._conn:
+            self._conn.execute("insert into note_fts (note_fts) values ('optimize')")
+
+    # --- Reads ---
+    def search(self, query: str, limit: int = 20, offset: int = 0, snippet_tokens: int = 24) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Ranked matches with highlighted title and body snippet.
+
+        Returns:
+            (results, total number of matching notes)
+        """
+        match = to_match_query(query)
+        with self._lock:
+            total = self._conn.execute("select count(*) from note_fts where note_fts match ?", (match,)).fetchone()[0]
+            rows = self._conn.execute(
+                """
+                select rowid, highlight(note_fts, 0, ?, ?), snippet(note_fts, 1, ?, ?, '…', ?), rank
+                from note_fts
+                where note_fts match ?
+                order by rank
+                limit ? offset ?
+                """,
+                (HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END, snippet_tokens, match, limit, offset)
+            ).fetchall()
+            docs = {
+                doc_id: (file_id, url, updated_at)
+                for doc_id, file_id, url, updated_at in self._conn.execute(
+                    f"select doc_id, file_id, url, updated_at from note_docs where doc_id in ({','.join('?' for _ in rows)})",
+                    [row[0] for row in rows]
+                )
+            }
+        results = []
+        for doc_id, title, snippet, rank in rows:
+            file_id, url, updated_at = docs[doc_id]
+            results.append({
+                "file_id": file_id,
+                "url": url,
+                "updated_at": updated_at,
+                "title": title,
+                "snippet": snippet,
+                # bm25() is lower-is-better; expose higher-is-better
+                "score": round(-rank, 4),
+            })
+        return results, total
+
+    def versions(self) -> Dict[str, Optional[str]]:
+        """{file_id: updated_at} of every indexed note."""
+        with self._lock:
+            return dict(self._conn.execute("select file_id, updated_at from note_docs").fetchall())
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("select count(*) from note_docs").fetchone()[0]
+
+
+def create_search_index() -> Optional[NoteSearchIndex]:
+    """Index at NOTE_SEARCH_PATH, or None when NOTE_SEARCH_ENABLED=false."""
+    if os.getenv("NOTE_SEARCH_ENABLED", "true").lower() != "true":
+        return None
+    return NoteSearchIndex(os.getenv("NOTE_SEARCH_PATH", "./data/search/notes.sqlite3"))
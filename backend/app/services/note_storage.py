@@ -0,0 +1,320 @@
+"""
+Object storage backends for NoteService.
+Location: backend/app/services/note_storage.py
+
+NoteService talks to a StorageBackend, so notes can live in:
+- SupabaseStorage: a Supabase Storage bucket (default)
+- LocalStorage: a directory on the local filesystem (dev boxes, CI,
+  single-node deployments, tests and benchmarks; no network needed)
+
+Backends are synchronous; NoteService runs them on its storage thread pool.
+Keys are slash-separated object paths ("n1.md", "history/n1/00000001.snap").
+Missing objects raise FileNotFoundError, create-only uploads of an existing
+key raise FileExistsError, keys a backend cannot store raise InvalidKeyError.
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Protocol, Union
+
+Blob = Union[bytes, memoryview]
+
+
+class InvalidKeyError(ValueError):
+    """The object key (e.g. a note id with path segments) cannot be stored."""
+
+
+class StorageBackend(Protocol):
+    def ensure_ready(self) -> None:
+        """Create the bucket / directory if needed (never raises)."""
+
+    def upload(self, path: str, data: bytes, content_type: str, upsert: bool = False) -> None:
+        """Write an object; without `upsert`, fail if it already exists."""
+
+    def update(self, path: str, data: bytes, content_type: str) -> None:
+        """Replace an existing object."""
+
+    def download(self, path: str) -> Blob:
+        ...
+
+    def info(self, path: str) -> Dict[str, Any]:
+        """{"etag", "last_modified", "size"} of an object."""
+
+    def remove(self, paths: List[str]) -> List[str]:
+        """Delete objects; returns the paths that existed."""
+
+    def list(self, folder: str = "", limit: int = 100, offset: int = 0) -> List[str]:
+        """Object names (not sub-folders) directly inside `folder`, sorted."""
+
+
+class SupabaseStorage:
+    """Supabase Storage bucket (S3-compatible)."""
+
+    def __init__(self, client, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def _bucket(self):
+        return self.client.storage.from_(self.bucket)
+
+    def ensure_ready(self):
+        """Create the bucket if it doesn't exist."""
+        try:
+            buckets = self.client.storage.list_buckets()
+            bucket_names = [b.name for b in buckets]
+
+            if self.bucket not in bucket_names:
+                # Create bucket with public access disabled (private by default)
+                self.client.storage.create_bucket(
+                    self.bucket,
+                    options={"public": False}
+                )
+                print(f"✅ Created bucket: {self.bucket}")
+        except Exception as e:
+            print(f"⚠️  Bucket check failed (may already exist): {e}")
+
+    def upload(self, path: str, data: bytes, content_type: str, upsert: bool = False):
+        options = {"content-type": content_type}
+        if upsert:
+            options["upsert"] = "true"
+        try:
+            self._bucket().upload(path=path, file=data, file_options=options)
+        except Exception as e:
+            if "duplicate" in str(e).lower() or "already exists" in str(e).lower():
+                raise FileExistsError(path) from e
+            raise
+
+    def update(self, path: str, data: bytes, content_type: str):
+        self._bucket().update(path=path, file=data, file_options={"content-type": content_type})
+
+    def download(self, path: str) -> bytes:
+        try:
+            return self._bucket().download(path)
+        except Exception as e:
+            if "not found" in str(e).lower() or "404" in str(e):
+                raise FileNotFoundError(path) from e
+            raise
+
+    def info(self, path: str) -> Dict[str, Any]:
+        info = self._bucket().info(path)
+        return {
+            "etag": info.get("etag") or info.get("version"),
+            "last_modified": info.get("last_modified") or info.get("updated_at"),
+            "size": info.get("size")
+        }
+
+    def remove(self, paths: List[str]) -> List[str]:
+        return [item['name'] for item in self._bucket().remove(paths) or []]
+
+    def list(self, folder: str = "", limit: int = 100, offset: int = 0) -> List[str]:
+        entries = self._bucket().list(folder or None, {"limit": limit, "offset": offset})
+        return [entry['name'] for entry in entries or []]
+
+
+class LocalStorage:
+    """
+    Filesystem backend.
+
+    Layout: objects are spread over hashed shard directories so no single
+    directory grows with the number of notes:
+        {root}/{ab}/{cd}/{key}
+    The shard comes from the key's "owner": the last folder for nested keys
+    ("history/n1/00000001.snap" -> "n1"), otherwise the name without its
+    note suffix ("n1.meta.json" -> "n1", "v1.2.md" -> "v1.2"). All objects of
+    one note share a shard. Keys that older versions placed by the name up to
+    its first dot are still found there.
+
+    Listing the top level walks every shard; a paged scan (offset > 0)
+    slices the listing taken by its first page instead of walking again.
+
+    Writes go to a temp file in the target directory and are moved into
+    place with os.replace (create-only uploads use os.link, which fails if
+    the key exists), so readers never see a partial object. Objects of at
+    least `mmap_threshold` bytes are returned as a memoryview over a
+    read-only mmap instead of being copied into memory.
+    """
+
+    def __init__(self, root: str, shard_depth: int = 2, mmap_threshold: int = 1024 * 1024, fsync: bool = True):
+        self.root = os.path.abspath(root)
+        self.shard_depth = shard_depth
+        self.mmap_threshold = mmap_threshold
+        self.fsync = fsync
+        self._top_level: List[str] = []  # Sorted top-level names from the last offset-0 listing
+
+    # --- Layout ---
+    def _shard(self, owner: str) -> str:
+        digest = hashlib.sha1(owner.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, *(digest[2 * i:2 * i + 2] for i in range(self.shard_depth)))
+
+    NOTE_SUFFIXES = (".meta.json", ".md", ".note")
+
+    @classmethod
+    def _owner(cls, name: str) -> str:
+        for suffix in cls.NOTE_SUFFIXES:
+            if name.endswith(suffix) and len(name) > len(suffix):
+                return name[:-len(suffix)]
+        return os.path.splitext(name)[0] or name
+
+    @staticmethod
+    def _parts(key: str) -> List[str]:
+        parts = [p for p in key.split("/") if p]
+        if not parts or any(p in (".", "..") for p in parts):
+            raise InvalidKeyError(f"Invalid object key: {key!r}")
+        return parts
+
+    def _path(self, key: str) -> str:
+        parts = self._parts(key)
+        owner = parts[-2] if len(parts) > 1 else self._owner(parts[-1])
+        return os.path.join(self._shard(owner), *parts)
+
+    def _locations(self, key: str) -> List[str]:
+        """Where `key` lives now, then where first-dot sharding put it (if different)."""
+        path = self._path(key)
+        parts = self._parts(key)
+        if len(parts) > 1:
+            return [path]
+        legacy = os.path.join(self._shard(parts[-1].split(".", 1)[0]), *parts)
+        return [path] if legacy == path else [path, legacy]
+
+    def _existing(self, key: str) -> str:
+        """The location holding `key`, or its current location if none does."""
+        locations = self._locations(key)
+        return next((p for p in locations if os.path.exists(p)), locations[0])
+
+    def _folder(self, folder: str) -> str:
+        parts = [p for p in folder.split("/") if p]
+        if any(p in (".", "..") for p in parts):
+            raise InvalidKeyError(f"Invalid folder: {folder!r}")
+        return os.path.join(self._shard(parts[-1]), *parts)
+
+    # --- StorageBackend ---
+    def ensure_ready(self):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+        except OSError as e:
+            print(f"⚠️  Local note storage unavailable at {self.root}: {e}")
+
+    def _write_temp(self, target: str, data: bytes) -> str:
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return tmp
+
+    def upload(self, path: str, data: bytes, content_type: str, upsert: bool = False):
+        target, *legacy = self._locations(path)
+        if not upsert and any(os.path.exists(p) for p in legacy):
+            raise FileExistsError(path)
+        tmp = self._write_temp(target, data)
+        try:
+            if upsert:
+                os.replace(tmp, target)
+                for old in legacy:
+                    if os.path.exists(old):
+                        os.unlink(old)
+                return
+            # link() refuses to overwrite: an atomic "create if absent"
+            os.link(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def update(self, path: str, data: bytes, content_type: str):
+        target = self._existing(path)
+        if not os.path.exists(target):
+            raise FileNotFoundError(path)
+        os.replace(self._write_temp(target, data), target)
+
+    def download(self, path: str) -> Blob:
+        with open(self._existing(path), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self.mmap_threshold or size == 0:
+                return f.read()
+            # The mapping outlives the descriptor; os.replace never touches
+            # the mapped inode, so concurrent writers are safe.
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def info(self, path: str) -> Dict[str, Any]:
+        stat = os.stat(self._existing(path))
+        return {
+            "etag": f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            "last_modified": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            "size": stat.st_size
+        }
+
+    def remove(self, paths: List[str]) -> List[str]:
+        removed = []
+        for path in paths:
+            for target in self._locations(path):
+                try:
+                    os.unlink(target)
+                except FileNotFoundError:
+                    continue
+                if path not in removed:
+                    removed.append(path)
+                self._prune(os.path.dirname(target))
+        return removed
+
+    def _prune(self, directory: str):
+        """Drop folders left empty (e.g. a deleted note's history)."""
+        while directory.startswith(self.root) and directory != self.root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
+
+    def list(self, folder: str = "", limit: int = 100, offset: int = 0) -> List[str]:
+        if folder.strip("/"):
+            return self._scan([self._folder(folder)])[offset:offset + limit]
+        if offset == 0:
+            # Top-level keys are spread across every shard
+            directories = [self.root]
+            for _ in range(self.shard_depth):
+                directories = [
+                    entry.path for d in directories for entry in _scandir(d) if entry.is_dir()
+                ]
+            self._top_level = self._scan(directories)
+        # Later pages of a scan slice its first page's listing: O(N) per scan, not per page
+        return self._top_level[offset:offset + limit]
+
+    @staticmethod
+    def _scan(directories: List[str]) -> List[str]:
+        return sorted(
+            entry.name
+            for d in directories for entry in _scandir(d)
+            if entry.is_file() and not entry.name.startswith(".tmp-")
+        )
+
+
+def _scandir(directory: str) -> list:
+    try:
+        return list(os.scandir(directory))
+    except FileNotFoundError:
+        return []
+
+
+def create_storage(client=None, bucket: str = "notes", backend: Optional[str] = None) -> StorageBackend:
+    """Backend selected by NOTE_STORAGE_BACKEND ("supabase" or "local")."""
+    backend = backend or os.getenv("NOTE_STORAGE_BACKEND", "supabase")
+    if backend == "local":
+        return LocalStorage(
+            os.path.join(os.getenv("NOTE_LOCAL_ROOT", "./data/notes"), bucket),
+            shard_depth=int(os.getenv("NOTE_LOCAL_SHARD_DEPTH", "2")),
+            mmap_threshold=int(os.getenv("NOTE_LOCAL_MMAP_BYTES", str(1024 * 1024))),
+            fsync=os.getenv("NOTE_LOCAL_FSYNC", "true").lower() == "true"
+        )
+    if backend == "supabase":
+        return SupabaseStorage(client, bucket)
+    raise ValueError(f"Unknown NOTE_STORAGE_BACKEND: {backend}")
@@ -0,0 +1,206 @@
+"""
+Precomputed related-file recommendations (k-nearest-neighbour graph).
+Location: backend/app/services/recommendations.py
+
+Each file is summarised by the mean of its Chunk.embedding vectors
+(L2-normalised) and the set of Concepts it MENTIONS. Two files of the same
+owner score
+
+    (1 - RECOMMEND_CONCEPT_WEIGHT) * cosine(mean vectors)
+        + RECOMMEND_CONCEPT_WEIGHT * jaccard(concepts)
+
+and every file keeps its RECOMMEND_K best neighbours. Files never link across
+users (chunks are partitioned per owner, see app/db/partitions.py); files
+with no owner yet are skipped until the partition backfill assigns one.
+
+Storage is array-backed (app/services/knn_store.py): a float32 matrix of
+vectors, int32/float32 (n, k) matrices of neighbour rows and scores, and
+concepts in CSR form, saved as a single .npz. A lookup reads one row of k
+entries, so the recommendations page never runs a vector search or a graph hop.
+
+Maintenance:
+- Incremental (after every ingest): the new file is scored against the
+  owner's other files only. Its own row is filled with the top k, and it
+  replaces the weakest neighbour of any file it beats.
+- Full rebuild (scheduled job), which also re-baselines scores drifted by
+  re-ingested files. It reads the graph a page of files at a time, so only
+  one page of chunk embeddings is in memory:
+    uv run python -m app.services.recommendations [--interval <seconds>]
+
+The rebuild job is the only writer of RECOMMEND_STORE_PATH. Each worker
+keeps its incremental updates in memory and checks the file's mtime every
+RECOMMEND_RELOAD_SECONDS; when a rebuild has replaced it, the worker loads
+it and re-applies the files it ingested after that rebuild started.
+
+Env:
+- RECOMMEND_K (10), RECOMMEND_CONCEPT_WEIGHT (0.3), RECOMMEND_RELOAD_SECONDS (30)
+- RECOMMEND_STORE_PATH (./data/recommendations/knn.npz)
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.db.clients import get_neo4j
+from app.services import metrics
+
+# NumPy (and the store) load on first use, not with the app
+if TYPE_CHECKING:
+    from app.services.knn_store import KnnStore
+
+_FILE_SUMMARY = """
+WHERE c.embedding IS NOT NULL
+WITH f, collect(c.embedding) AS embeddings
+OPTIONAL MATCH (f)-[:MENTIONS]->(k:Concept)
+RETURN f.id AS file_id, f.user_id AS user_id, embeddings, collect(DISTINCT k.name) AS concepts
+"""
+FILE_QUERY = "MATCH (f:File {id: $file_id})-[:CONTAINS]->(c:Chunk)" + _FILE_SUMMARY
+EXPORT_IDS_QUERY = "MATCH (f:File) WHERE f.id > $after RETURN f.id AS id ORDER BY id LIMIT $limit"
+EXPORT_QUERY = "MATCH (f:File)-[:CONTAINS]->(c:Chunk) WHERE f.id IN $file_ids" + _FILE_SUMMARY
+EXPORT_PAGE_FILES = 500
+
+
+def export_files(driver, page_size: int = EXPORT_PAGE_FILES) -> Iterator[Dict[str, Any]]:
+    """EXPORT_QUERY rows, one page of files (keyset on id) per query."""
+    after = ""
+    with driver.session() as session:
+        while True:
+            file_ids = [record["id"] for record in session.run(EXPORT_IDS_QUERY, after=after, limit=page_size).data()]
+            if not file_ids:
+                return
+            yield from session.run(EXPORT_QUERY, file_ids=file_ids).data()
+            after = file_ids[-1]
+
+
+class RecommendationService:
+    def __init__(self, store: Optional["KnnStore"] = None, path: Optional[str] = None):
+        self.path = path
+        self._loaded_mtime = self._mtime()
+        if store is None:
+            from app.services.knn_store import KnnStore
+            store = KnnStore.load(path, *store_config()) if path else KnnStore(*store_config())
+        self.store = store
+        # Files folded in since the store was loaded: (ingested at, upsert args)
+        self._recent: Dict[str, Tuple[float, Tuple[Any, ...]]] = {}
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime if self.path else None
+        except FileNotFoundError:
+            return None
+
+    @metrics.timed("recommend.update_file")
+    def update_file(self, file_id: str, driver=None) -> bool:
+        """Fold one freshly ingested file into the kNN graph (blocking; run off the loop)."""
+        from app.services.knn_store import mean_pool
+
+        driver = driver or get_neo4j()
+        with driver.session() as session:
+            records = session.run(FILE_QUERY, file_id=file_id).data()
+        updated = False
+        with self._lock:
+            for record in records:
+                vector = mean_pool(record["embeddings"])
+                # The mean vector stands in for the chunks when re-applied after a reload
+                args = (record["file_id"], record["user_id"], [] if vector is None else [vector], record["concepts"])
+                if self.store.upsert(*args):
+                    self._recent[record["file_id"]] = (time.time(), args)
+                    updated = True
+        return updated
+
+    def reload_if_changed(self) -> bool:
+        """Load the store file if the rebuild job replaced it (blocking; run off the loop)."""
+        from app.services.knn_store import KnnStore
+
+        mtime = self._mtime()
+        if mtime is None or mtime == self._loaded_mtime:
+            return False
+        store = KnnStore.load(self.path, self.store.k, self.store.concept_weight)
+        with self._lock:
+            # Files ingested after the rebuild read the graph are not in the file
+            self._recent = {file_id: entry for file_id, entry in self._recent.items() if entry[0] >= store.built_at}
+            for _, args in self._recent.values():
+                store.upsert(*args)
+            self.store = store
+            self._loaded_mtime = mtime
+            self.reloads += 1
+        return True
+
+    @metrics.timed("recommend.rebuild")
+    def rebuild(self, driver=None, page_size: int = EXPORT_PAGE_FILES) -> int:
+        """Rebuild from the graph and write the store file (the scheduled job; blocking)."""
+        driver = driver or get_neo4j()
+        started = time.time()
+        size = self.store.build(export_files(driver, page_size))
+        self.store.built_at = started
+        if self.path:
+            self.store.save(self.path)
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        return {"files": self.store.size, "users": len(self.store.by_user), "updates": self.store.updates, "reloads": self.reloads}
+
+
+async def watch_store(interval: Optional[float] = None):
+    """Reload the worker's store after rebuilds; runs for the app's lifetime."""
+    interval = interval or float(os.getenv("RECOMMEND_RELOAD_SECONDS", "30"))
+    while True:
+        await asyncio.sleep(interval)
+        if recommendation_service_initialized():
+            try:
+                await asyncio.to_thread(get_recommendation_service().reload_if_changed)
+            except Exception as e:
+                print(f"⚠️  Recommendation store reload failed: {e}")
+
+
+# --- Singleton ---
+_recommendation_service: Optional[RecommendationService] = None
+_recommendation_lock = threading.Lock()
+
+
+def store_config() -> Tuple[int, float]:
+    return int(os.getenv("RECOMMEND_K", "10")), float(os.getenv("RECOMMEND_CONCEPT_WEIGHT", "0.3"))
+
+
+def create_recommendation_service() -> RecommendationService:
+    return RecommendationService(path=os.getenv("RECOMMEND_STORE_PATH", "./data/recommendations/knn.npz"))
+
+
+def get_recommendation_service() -> RecommendationService:
+    global _recommendation_service
+    if _recommendation_service is None:
+        with _recommendation_lock:
+            if _recommendation_service is None:
+                _recommendation_service = create_recommendation_service()
+    return _recommendation_service
+
+
+def recommendation_service_initialized() -> bool:
+    return _recommendation_service is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the related-file kNN graph")
+    parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds (0 = run once)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    service = create_recommendation_service()
+    while True:
+        started = time.perf_counter()
+        size = service.rebuild()
+        print(f"✅ Recommendations: {size} file(s) in {time.perf_counter() - started:.2f}s -> {service.path}")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Hedging, retries and circuit breaking for external model calls.
+Location: backend/app/services/resilience.py
+
+    embed = get_resilience("embed")
+    vectors = await embed.call(
+        lambda: embeddings.client.aembed_documents(batch),
+        admit=lambda: embeddings.admit(len(batch)),
+    )
+
+One Resilience object per resource ("embed", "llm") is shared process-wide,
+so the breaker sees every caller's failures:
+- Hedging: if a call has not answered after the p95 of recent successful
+  calls (floored at MODEL_HEDGE_MIN_DELAY_MS), a duplicate is sent and the
+  first answer wins. Hedges are capped at MODEL_HEDGE_BUDGET of calls so a
+  slow provider is not hit with double traffic.
+- Retries: failed calls are retried with full-jitter exponential backoff.
+  Callers wrap the smallest unit that can be redone (one embedding batch,
+  one extraction prompt), so a failure retries that unit, not the file.
+- Circuit breaker: after MODEL_BREAKER_FAILURES consecutive failures calls
+  fail fast with CircuitOpenError (HTTP 503 + Retry-After) for
+  MODEL_BREAKER_RESET_SECONDS, then a single probe decides whether to close.
+
+Governor admission is passed separately as `admit`: it is awaited once per
+attempt, before the breaker is asked and before the hedge timer starts.
+Time spent queued in the governor therefore never triggers a hedge or
+enters the latency window, a hedge is sent without taking another governor
+slot, and a half-open probe is only claimed once it can go out at once.
+
+Governor rejections, open circuits and client errors (invalid input, 4xx
+other than 408/429) are never retried or hedged around, and client errors
+do not count as breaker failures: the provider answered.
+
+Env:
+- MODEL_RETRIES (3), MODEL_BACKOFF_BASE_MS (200), MODEL_BACKOFF_CAP_MS (5000)
+- MODEL_HEDGE_ENABLED (true), MODEL_HEDGE_MIN_DELAY_MS (250), MODEL_HEDGE_BUDGET (0.1)
+- MODEL_BREAKER_FAILURES (5), MODEL_BREAKER_RESET_SECONDS (30)
+"""
+
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.services.governor import GovernorRejected
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """The provider is considered down; retry after `retry_after` seconds."""
+
+    def __init__(self, resource: str, retry_after: float):
+        super().__init__(f"{resource} provider unavailable (circuit open); retry after {retry_after:.0f}s")
+        self.resource = resource
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+NOT_RETRYABLE = (GovernorRejected, CircuitOpenError)
+RETRYABLE_CLIENT_STATUSES = (408, 429)
+
+
+def is_client_error(error: BaseException) -> bool:
+    """Deterministic request errors: redoing the same call would fail the same way."""
+    if isinstance(error, (ValueError, TypeError)):
+        return True
+    # httpx / google-api-core style errors carry the HTTP status
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None) or getattr(error, "code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in RETRYABLE_CLIENT_STATUSES
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, resource: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.resource = resource
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+
+    def check(self):
+        """Fail fast while open, without claiming the half-open probe."""
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.resource, remaining)
+
+    def before_call(self):
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(self.resource, remaining)
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(self.resource, 1)
+            self._probing = True
+
+    def release(self):
+        """A call ended without telling us anything about the provider (e.g. rate limited)."""
+        self._probing = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                print(f"⚠️  Circuit for {self.resource} opened after {self.failures} failure(s)")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyWindow:
+    """Rolling window of recent successful call latencies."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples: deque = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Resilience:
+    def __init__(
+        self,
+        resource: str,
+        retries: int = 3,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 5.0,
+        hedge: bool = True,
+        hedge_min_delay: float = 0.25,
+        hedge_budget: float = 0.1,
+        breaker: Optional[CircuitBreaker] = None,
+        rng: Optional[random.Random] = None
+    ):
+        self.resource = resource
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_budget = hedge_budget
+        self.breaker = breaker or CircuitBreaker(resource)
+        self.latency = LatencyWindow()
+        self.rng = rng or random.Random()
+        self.calls = 0
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or over budget."""
+        if not self.hedge or self.hedged + 1 > self.hedge_budget * self.calls + 1:
+            return None
+        p95 = self.latency.quantile(0.95)
+        return max(self.hedge_min_delay, p95 if p95 is not None else 0.0)
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(cap, base * 2^attempt)]."""
+        return self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def call(self, fn: Callable[[], Awaitable[T]], admit: Optional[Callable[[], Awaitable[Any]]] = None) -> T:
+        """
+        Run `fn()` (a fresh awaitable per attempt, the raw provider call) with
+        hedging, retries and the breaker. `admit()` runs before each attempt
+        and is neither timed nor hedged.
+        """
+        for attempt in range(self.retries + 1):
+            if admit is not None:
+                # Don't queue for admission just to be refused by an open circuit
+                self.breaker.check()
+                await admit()
+            self.breaker.before_call()
+            self.calls += 1
+            started = time.perf_counter()
+            try:
+                result = await self._hedged(fn)
+            except NOT_RETRYABLE:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if is_client_error(e):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.retries or self.breaker.state == CircuitBreaker.OPEN:
+                    raise
+                self.retried += 1
+                delay = self.backoff(attempt)
+                print(f"⚠️  {self.resource} call failed ({e}); retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self.latency.observe(time.perf_counter() - started)
+            return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]]) -> T:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await fn()
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            self.hedged += 1
+            backup = asyncio.ensure_future(fn())
+            pending = {primary, backup}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+                    # Keep the primary's error if both fail; a rejected hedge is not a failure
+                    if task is primary or error is None:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.latency.quantile(0.95)
+        return {
+            "calls": self.calls,
+            "retried": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "p95_seconds": round(p95, 4) if p95 is not None else 0.0,
+            "breaker_open": int(self.breaker.state != CircuitBreaker.CLOSED),
+            "breaker_trips": self.breaker.trips,
+        }
+
+
+# --- Registry ---
+_resilience: Dict[str, Resilience] = {}
+_resilience_lock = threading.Lock()
+
+
+def create_resilience(resource: str) -> Resilience:
+    return Resilience(
+        resource,
+        retries=int(os.getenv("MODEL_RETRIES", "3")),
+        backoff_base=float(os.getenv("MODEL_BACKOFF_BASE_MS", "200")) / 1000,
+        backoff_cap=float(os.getenv("MODEL_BACKOFF_CAP_MS", "5000")) / 1000,
+        hedge=os.getenv("MODEL_HEDGE_ENABLED", "true").lower() == "true",
+        hedge_min_delay=float(os.getenv("MODEL_HEDGE_MIN_DELAY_MS", "250")) / 1000,
+        hedge_budget=float(os.getenv("MODEL_HEDGE_BUDGET", "0.1")),
+        breaker=CircuitBreaker(
+            resource,
+            failure_threshold=int(os.getenv("MODEL_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("MODEL_BREAKER_RESET_SECONDS", "30")),
+        ),
+    )
+
+
+def get_resilience(resource: str) -> Resilience:
+    """Shared wrapper for one resource ("embed" or "llm")."""
+    resilience = _resilience.get(resource)
+    if resilience is None:
+        with _resilience_lock:
+            resilience = _resilience.setdefault(resource, create_resilience(resource))
+    return resilience
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    return {resource: r.stats() for resource, r in _resilience.items()}
@@ -0,0 +1,112 @@
+"""
+User-scoped vector retrieval over ingested chunks.
+Location: backend/app/services/retrieval.py
+
+    retriever = ChunkRetriever()
+    hits = await retriever.search("user-1", "how do I run docker compose?", k=5)
+
+Chunks are partitioned by owner (app/db/partitions.py), so a query only ever
+touches the caller's data:
+- Users with up to RETRIEVAL_EXACT_SCAN_MAX chunks are scored exactly: the
+  chunk_user_id index yields just their chunks and cosine similarity is
+  computed over those. Cost scales with the user's corpus, and recall is 100%.
+- Larger corpora use the ANN index of the user's shard, filtered on user_id.
+  The candidate pool starts at k * RETRIEVAL_OVERSAMPLE and doubles (up to
+  RETRIEVAL_MAX_CANDIDATES) while the filter leaves fewer than k hits.
+
+Needs Neo4j 5.18+ for vector.similarity.cosine (docker-compose pins 5.26 LTS).
+
+The query embedding is governed at interactive priority and goes through the
+"embed" resilience wrapper; Neo4j queries run off the event loop.
+
+Env:
+- RETRIEVAL_EXACT_SCAN_MAX (20000), RETRIEVAL_OVERSAMPLE (4), RETRIEVAL_MAX_CANDIDATES (1000)
+"""
+
+import asyncio
+import os
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+from app.db.clients import get_neo4j
+from app.db.partitions import shard_for, shard_index_name
+from app.services import metrics
+from app.services.governor import INTERACTIVE, GovernedEmbeddings, get_governor
+from app.services.resilience import get_resilience
+
+EXACT_SCAN_MAX = int(os.getenv("RETRIEVAL_EXACT_SCAN_MAX", "20000"))
+OVERSAMPLE = int(os.getenv("RETRIEVAL_OVERSAMPLE", "4"))
+MAX_CANDIDATES = int(os.getenv("RETRIEVAL_MAX_CANDIDATES", "1000"))
+
+COUNT_QUERY = """
+MATCH (f:File)-[:CONTAINS]->(c:Chunk {user_id: $user_id})
+WHERE $file_ids IS NULL OR f.id IN $file_ids
+RETURN count(c) AS chunks
+"""
+
+EXACT_QUERY = """
+MATCH (f:File)-[:CONTAINS]->(c:Chunk {user_id: $user_id})
+WHERE $file_ids IS NULL OR f.id IN $file_ids
+WITH f, c, vector.similarity.cosine(c.embedding, $vector) AS score
+ORDER BY score DESC
+LIMIT $k
+RETURN c.id AS chunk_id, f.id AS file_id, c.content AS content, score
+"""
+
+ANN_QUERY = """
+CALL db.index.vector.queryNodes($index, $candidates, $vector) YIELD node AS c, score
+WHERE c.user_id = $user_id
+MATCH (f:File)-[:CONTAINS]->(c)
+WHERE $file_ids IS NULL OR f.id IN $file_ids
+RETURN c.id AS chunk_id, f.id AS file_id, c.content AS content, score
+ORDER BY score DESC
+LIMIT $k
+"""
+
+
+class ChunkRetriever:
+    def __init__(self, neo4j_driver=None, embeddings=None, governor=None):
+        """Clients default to the shared ones; pass stand-ins to run offline (tests, benchmarks)."""
+        self.neo4j_driver = neo4j_driver if neo4j_driver is not None else get_neo4j()
+        self.governor = governor if governor is not None else get_governor()
+        if embeddings is not None:
+            self.embeddings = embeddings
+
+    @cached_property
+    def embeddings(self):
+        # Same process-wide client ingestion uses (and the same lazy import)
+        from app.api.ingestion import EMBEDDING_MODEL, _shared_client
+        return _shared_client("GoogleGenerativeAIEmbeddings", model=EMBEDDING_MODEL)
+
+    @metrics.timed("retrieval.search")
+    async def search(
+        self, user_id: str, query: str, k: int = 5, file_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k chunks owned by `user_id` (optionally within `file_ids`), best first."""
+        embeddings = GovernedEmbeddings(self.embeddings, self.governor, user_id, INTERACTIVE)
+        with metrics.span("retrieval.embed_query"):
+            vector = await get_resilience("embed").call(
+                lambda: embeddings.client.aembed_query(query), admit=embeddings.admit
+            )
+        return await asyncio.to_thread(self._query, user_id, vector, k, file_ids)
+
+    def _query(self, user_id: str, vector: List[float], k: int, file_ids: Optional[List[str]]) -> List[Dict[str, Any]]:
+        params = {"user_id": user_id, "vector": vector, "k": k, "file_ids": file_ids}
+        with self.neo4j_driver.session() as session:
+            with metrics.span("retrieval.neo4j.count"):
+                record = session.run(COUNT_QUERY, **params).single()
+            chunks = record["chunks"] if record else 0
+            if chunks == 0:
+                return []
+            if chunks <= EXACT_SCAN_MAX:
+                with metrics.span("retrieval.neo4j.exact"):
+                    return [dict(r) for r in session.run(EXACT_QUERY, **params)]
+
+            index = shard_index_name(shard_for(user_id))
+            candidates = min(k * OVERSAMPLE, MAX_CANDIDATES)
+            while True:
+                with metrics.span("retrieval.neo4j.ann"):
+                    hits = [dict(r) for r in session.run(ANN_QUERY, index=index, candidates=candidates, **params)]
+                if len(hits) >= k or candidates >= MAX_CANDIDATES:
+                    return hits
+                candidates = min(candidates * 2, MAX_CANDIDATES)
@@ -0,0 +1,379 @@
+"""
+Columnar snapshot export / restore of one user's knowledge base.
+Location: backend/app/services/snapshot.py
+
+A snapshot is a directory:
+
+    manifest.json            format, user, embedding dimensions, row counts
+    files-00000.<ext>        Supabase `files` rows of the user
+    chunks-00000.<ext> ...   Chunk id/file/index/content/metadata + embedding
+    mentions-00000.<ext>     (file_id, concept) pairs -> Concept + MENTIONS
+    notes-00000.<ext>        title/url/body of the notes whose file_id is one of the user's files
+
+Each table is written in parts of SNAPSHOT_BATCH_ROWS rows, so export and
+restore stream in bounded memory. Embeddings are stored as one contiguous
+float32 (rows, dimensions) matrix per part.
+
+Formats:
+- parquet (when pyarrow is installed): embeddings are FixedSizeList<float32>
+- npz (always available): Arrow-style columns in NumPy, i.e. strings as
+  UTF-8 bytes + int64 offsets and a validity mask for nullable columns
+
+Restore writes chunks and mentions with the ingestion write statement
+(app/services/write_coalescer.py), one transaction per part, and upserts
+the `files` rows. No embedding or LLM call is made. Restoring into another
+user (--as-user) gives files, chunks and notes fresh ids, so the source
+user's data stays untouched in the same database.
+
+Notes are carried with their bodies and recreated through NoteService, so
+storage objects, the `notes` index row and the search index all exist under
+the restored id. A restored note starts a new history at version 1 (past
+versions and timestamps are not in the snapshot); restoring over an account
+whose note still exists updates it instead. Notes whose body cannot be read
+at export time are left out (with a warning).
+
+Recommendations are not in the snapshot; rebuild them after a restore with
+`python -m app.services.recommendations`.
+
+Usage:
+    uv run python -m app.services.snapshot export --user <id> --out ./snapshots/<id>
+    uv run python -m app.services.snapshot restore --path ./snapshots/<id> [--as-user <id>]
+
+Env:
+- SNAPSHOT_FORMAT: parquet or npz (default parquet when pyarrow is installed)
+- SNAPSHOT_BATCH_ROWS (2000)
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.db.clients import get_neo4j, get_supabase
+from app.db.partitions import shard_for, shard_label
+from app.db.schema import EMBEDDING_DIMENSIONS
+from app.services.note import get_note_service
+from app.services.write_coalescer import WRITE_QUERY
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: fall back to npz
+    pa = pq = None
+
+SNAPSHOT_VERSION = 2
+BATCH_ROWS = int(os.getenv("SNAPSHOT_BATCH_ROWS", "2000"))
+# Files per Neo4j query / Supabase `in` filter (ids travel in the URL)
+FILES_PER_QUERY = 100
+
+# Column types per table: str / int (both nullable) or vector (float32 matrix)
+TABLES: Dict[str, Dict[str, str]] = {
+    "files": {
+        "id": "str", "file_name": "str", "file_path": "str", "file_type": "str",
+        "file_size": "int", "status": "str", "created_at": "str",
+    },
+    "chunks": {
+        "id": "str", "file_id": "str", "chunk_index": "int", "content": "str",
+        "metadata": "str", "embedding": "vector",
+    },
+    "mentions": {"file_id": "str", "concept": "str"},
+    "notes": {"file_id": "str", "title": "str", "url": "str", "content": "str"},
+}
+
+FILE_IDS_QUERY = "MATCH (f:File {user_id: $user_id}) RETURN f.id AS id ORDER BY id"
+CHUNKS_QUERY = """
+MATCH (f:File)-[:CONTAINS]->(c:Chunk)
+WHERE f.id IN $file_ids
+RETURN c.id AS id, f.id AS file_id, c.chunk_index AS chunk_index, c.content AS content,
+       c.metadata AS metadata, c.embedding AS embedding
+ORDER BY file_id, chunk_index
+"""
+MENTIONS_QUERY = """
+MATCH (f:File)-[:MENTIONS]->(k:Concept)
+WHERE f.id IN $file_ids
+RETURN f.id AS file_id, k.name AS concept
+ORDER BY file_id, concept
+"""
+
+
+def default_format() -> str:
+    return os.getenv("SNAPSHOT_FORMAT", "parquet" if pa is not None else "npz").lower()
+
+
+# --- Column codecs ---
+def _encode_npz(types: Dict[str, str], rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    arrays: Dict[str, np.ndarray] = {}
+    for name, kind in types.items():
+        values = [row.get(name) for row in rows]
+        if kind == "vector":
+            arrays[name] = np.asarray(values, dtype=np.float32).reshape(len(rows), -1)
+            continue
+        valid = np.asarray([v is not None for v in values], dtype=bool)
+        arrays[f"{name}__valid"] = valid
+        if kind == "int":
+            arrays[name] = np.asarray([v if v is not None else 0 for v in values], dtype=np.int64)
+        else:
+            encoded = [str(v).encode("utf-8") if v is not None else b"" for v in values]
+            arrays[f"{name}__offsets"] = np.concatenate(([0], np.cumsum([len(b) for b in encoded]))).astype(np.int64)
+            arrays[f"{name}__data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return arrays
+
+
+def _decode_npz(types: Dict[str, str], data) -> Dict[str, Any]:
+    columns: Dict[str, Any] = {}
+    for name, kind in types.items():
+        if kind == "vector":
+            columns[name] = data[name]
+            continue
+        valid = data[f"{name}__valid"]
+        if kind == "int":
+            values = data[name].tolist()
+        else:
+            raw, offsets = data[f"{name}__data"].tobytes(), data[f"{name}__offsets"]
+            values = [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(valid))]
+        columns[name] = [v if ok else None for v, ok in zip(values, valid.tolist())]
+    return columns
+
+
+def _encode_arrow(types: Dict[str, str], rows: List[Dict[str, Any]]):
+    arrays, names = [], []
+    for name, kind in types.items():
+        values = [row.get(name) for row in rows]
+        if kind == "vector":
+            matrix = np.asarray(values, dtype=np.float32).reshape(len(rows), -1)
+            arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(matrix.ravel()), matrix.shape[1]))
+        else:
+            arrays.append(pa.array(values, type=pa.int64() if kind == "int" else pa.string()))
+        names.append(name)
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def _decode_arrow(types: Dict[str, str], table) -> Dict[str, Any]:
+    columns: Dict[str, Any] = {}
+    for name, kind in types.items():
+        column = table.column(name).combine_chunks()
+        if kind == "vector":
+            columns[name] = column.values.to_numpy(zero_copy_only=False).reshape(len(column), column.type.list_size)
+        else:
+            columns[name] = column.to_pylist()
+    return columns
+
+
+# --- Parts ---
+class SnapshotWriter:
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        self.path = path
+        self.format = fmt or default_format()
+        if self.format == "parquet" and pa is None:
+            raise RuntimeError("parquet snapshots need pyarrow; install it or use SNAPSHOT_FORMAT=npz")
+        if self.format not in ("parquet", "npz"):
+            raise ValueError(f"unknown snapshot format: {self.format}")
+        self.counts: Dict[str, int] = {table: 0 for table in TABLES}
+        self.parts: Dict[str, int] = {table: 0 for table in TABLES}
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, table: str, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        target = os.path.join(self.path, f"{table}-{self.parts[table]:05d}.{self.format}")
+        if self.format == "parquet":
+            pq.write_table(_encode_arrow(TABLES[table], rows), target)
+        else:
+            with open(target, "wb") as f:
+                np.savez(f, **_encode_npz(TABLES[table], rows))
+        self.parts[table] += 1
+        self.counts[table] += len(rows)
+
+    def finish(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        manifest = {**manifest, "version": SNAPSHOT_VERSION, "format": self.format, "rows": self.counts}
+        with open(os.path.join(self.path, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {manifest.get('version')}")
+    return manifest
+
+
+def read_parts(path: str, table: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield one dict of columns per part, in order."""
+    if fmt == "parquet" and pa is None:
+        raise RuntimeError("this snapshot is parquet; install pyarrow to restore it")
+    for part in sorted(glob.glob(os.path.join(path, f"{table}-*.{fmt}"))):
+        if fmt == "parquet":
+            yield _decode_arrow(TABLES[table], pq.read_table(part))
+        else:
+            with np.load(part) as data:
+                yield _decode_npz(TABLES[table], data)
+
+
+def _rows(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[n] for n in names))]
+
+
+def _read(driver, query: str, **params) -> List[Dict[str, Any]]:
+    with driver.session() as session:
+        return session.run(query, **params).data()
+
+
+def _write(driver, chunks: List[Dict[str, Any]], concepts: List[Dict[str, Any]]):
+    with driver.session() as session:
+        session.run(WRITE_QUERY, chunks=chunks, concepts=concepts).consume()
+
+
+def _select(supabase, table: str, column: str, ids: List[str]) -> List[Dict[str, Any]]:
+    return supabase.table(table).select(",".join(TABLES[table])).in_(column, ids).execute().data or []
+
+
+# --- Export ---
+async def export_user(
+    user_id: str, path: str, driver=None, supabase=None, notes=None, fmt: Optional[str] = None,
+    batch_rows: int = BATCH_ROWS
+) -> Dict[str, Any]:
+    """Write a snapshot of `user_id`; returns the manifest."""
+    driver = driver or get_neo4j()
+    supabase = supabase or get_supabase()
+    notes = notes or await asyncio.to_thread(get_note_service)
+    writer = SnapshotWriter(path, fmt)
+    dimensions = None
+    pending: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+
+    def add(table: str, rows: List[Dict[str, Any]]):
+        pending[table].extend(rows)
+        while len(pending[table]) >= batch_rows:
+            writer.write(table, pending[table][:batch_rows])
+            del pending[table][:batch_rows]
+
+    file_ids = [record["id"] for record in await asyncio.to_thread(_read, driver, FILE_IDS_QUERY, user_id=user_id)]
+    for start in range(0, len(file_ids), FILES_PER_QUERY):
+        ids = file_ids[start:start + FILES_PER_QUERY]
+        add("files", await asyncio.to_thread(_select, supabase, "files", "id", ids))
+
+        # Notes are looked up through the note service (any storage/index backend,
+        # layout or codec); files that are not notes come back as FileNotFoundError
+        for note_id, note in zip(ids, await notes.batch_get(ids)):
+            if isinstance(note, FileNotFoundError):
+                continue
+            if isinstance(note, BaseException):
+                print(f"⚠️  Note {note_id} left out of the snapshot: {note}")
+                continue
+            add("notes", [{"file_id": note_id, "title": note["title"], "url": note.get("url"), "content": note["content"]}])
+
+        for record in await asyncio.to_thread(_read, driver, CHUNKS_QUERY, file_ids=ids):
+            if record["embedding"] is None:
+                continue
+            dimensions = dimensions or len(record["embedding"])
+            add("chunks", [record])
+        add("mentions", await asyncio.to_thread(_read, driver, MENTIONS_QUERY, file_ids=ids))
+
+    for table, rows in pending.items():
+        writer.write(table, rows)
+
+    return writer.finish({
+        "user_id": user_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "embedding_dimensions": dimensions,
+    })
+
+
+# --- Restore ---
+async def restore_snapshot(
+    path: str, as_user: Optional[str] = None, driver=None, supabase=None, notes=None
+) -> Dict[str, int]:
+    """Bulk-load a snapshot (optionally as another user); returns rows restored per table."""
+    manifest = read_manifest(path)
+    fmt, user_id = manifest["format"], as_user or manifest["user_id"]
+    dimensions = manifest.get("embedding_dimensions")
+    if dimensions not in (None, EMBEDDING_DIMENSIONS):
+        raise ValueError(f"snapshot embeddings have {dimensions} dimensions, this database expects {EMBEDDING_DIMENSIONS}")
+
+    driver = driver or get_neo4j()
+    supabase = supabase or get_supabase()
+    notes = notes or await asyncio.to_thread(get_note_service)
+    # A copy into another account must not overwrite the source's nodes/rows
+    remap = user_id != manifest["user_id"]
+    file_ids: Dict[str, str] = {}
+
+    def file_id(old: str) -> str:
+        if not remap:
+            return old
+        return file_ids.setdefault(old, str(uuid.uuid4()))
+
+    restored = {table: 0 for table in TABLES}
+    for columns in read_parts(path, "files", fmt):
+        rows = [{**row, "id": file_id(row["id"]), "user_id": user_id} for row in _rows(columns)]
+        await asyncio.to_thread(lambda: supabase.table("files").upsert(rows).execute())
+        restored["files"] += len(rows)
+
+    for columns in read_parts(path, "notes", fmt):
+        rows = [{**row, "file_id": file_id(row["file_id"])} for row in _rows(columns)]
+        # create_note writes the body in this deployment's layout, the index row and the search entry
+        results = await notes.batch_create(rows)
+        for row, result in zip(rows, results):
+            if isinstance(result, ValueError) and not remap:
+                # Restoring over the same account: the note already exists
+                await notes.update_note(row["file_id"], content=row["content"], title=row["title"])
+            elif isinstance(result, BaseException):
+                raise result
+        restored["notes"] += len(rows)
+
+    label = shard_label(shard_for(user_id))
+    for columns in read_parts(path, "chunks", fmt):
+        embeddings = columns.pop("embedding")
+        rows = [{
+            "chunk_id": str(uuid.uuid4()) if remap else row["id"],
+            "file_id": file_id(row["file_id"]),
+            "user_id": user_id,
+            "shard_label": label,
+            "index": row["chunk_index"],
+            "content": row["content"],
+            "metadata": row["metadata"],
+            "embedding": embeddings[i].tolist(),
+        } for i, row in enumerate(_rows(columns))]
+        await asyncio.to_thread(_write, driver, rows, [])
+        restored["chunks"] += len(rows)
+    for columns in read_parts(path, "mentions", fmt):
+        rows = [{"file_id": file_id(row["file_id"]), "name": row["concept"]} for row in _rows(columns)]
+        await asyncio.to_thread(_write, driver, [], rows)
+        restored["mentions"] += len(rows)
+    return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or restore a user's knowledge base snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export")
+    export.add_argument("--user", required=True)
+    export.add_argument("--out", required=True)
+    export.add_argument("--format", choices=["parquet", "npz"], default=None)
+    restore = commands.add_parser("restore")
+    restore.add_argument("--path", required=True)
+    restore.add_argument("--as-user", default=None, help="Restore into another account (fresh file/chunk ids)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    started = time.perf_counter()
+    if args.command == "export":
+        manifest = asyncio.run(export_user(args.user, args.out, fmt=args.format))
+        print(f"✅ Snapshot of {args.user} -> {args.out} ({manifest['format']}): {manifest['rows']}")
+    else:
+        restored = asyncio.run(restore_snapshot(args.path, as_user=args.as_user))
+        print(f"✅ Restored {args.path}: {restored}")
+    print(f"   took {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
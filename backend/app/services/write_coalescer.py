@@ -0,0 +1,210 @@
+"""
+Group commit for ingestion writes to Neo4j.
+Location: backend/app/services/write_coalescer.py
+
+    writer = get_write_coalescer(driver)
+    await writer.write(chunks=[...], concepts=[...])
+
+Uploads no longer open a session per file. Their chunk rows and concept
+rows are queued on one coalescer per driver, which:
+- waits up to NEO4J_WRITE_MAX_DELAY_MS for more callers, or until
+  NEO4J_WRITE_MAX_ROWS rows are queued
+- writes everything queued as ONE auto-commit transaction (a single
+  statement with an UNWIND per row kind)
+- resolves every caller's future when the commit returns
+
+While one batch commits, the next one fills, so a burst of 50 small notes
+costs a handful of commits instead of 50+.
+
+If a combined batch fails, each caller's rows are retried on their own, so
+one bad row only fails its own upload.
+
+Needs Neo4j 5.26+ for dynamic labels (each chunk's shard label travels as
+data, so chunks from different users share a statement).
+
+Env:
+- NEO4J_WRITE_MAX_DELAY_MS (5), NEO4J_WRITE_MAX_ROWS (2000)
+"""
+
+import asyncio
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services import metrics
+
+WRITE_QUERY = """
+CALL {
+    UNWIND $chunks AS item
+    MERGE (f:File {id: item.file_id})
+    SET f.user_id = item.user_id
+    MERGE (c:Chunk {id: item.chunk_id})
+    SET c:$(item.shard_label),
+        c.user_id = item.user_id,
+        c.content = item.content,
+        c.chunk_index = item.index,
+        c.embedding = item.embedding,
+        c.metadata = item.metadata
+    MERGE (f)-[:CONTAINS]->(c)
+}
+CALL {
+    UNWIND $concepts AS item
+    MERGE (f:File {id: item.file_id})
+    MERGE (c:Concept {name: item.name})
+    MERGE (f)-[:MENTIONS]->(c)
+}
+"""
+
+
+@dataclass
+class _Write:
+    chunks: List[Dict[str, Any]]
+    concepts: List[Dict[str, Any]]
+    future: asyncio.Future
+    rows: int = field(init=False)
+
+    def __post_init__(self):
+        self.rows = len(self.chunks) + len(self.concepts)
+
+
+class WriteCoalescer:
+    def __init__(self, driver, max_delay: float = 0.005, max_rows: int = 2000):
+        self.driver = driver
+        self.max_delay = max_delay
+        self.max_rows = max_rows
+        self._pending: List[_Write] = []
+        self._pending_rows = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.writes = 0
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self.isolated_retries = 0
+
+    async def write(self, chunks: Iterable[Dict[str, Any]] = (), concepts: Iterable[Dict[str, Any]] = ()):
+        """Queue rows and wait until the transaction carrying them has committed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Event loop changed (tests, reloads): anything queued on the old one is gone with it
+            self._loop, self._full, self._task = loop, asyncio.Event(), None
+            self._pending, self._pending_rows = [], 0
+
+        write = _Write(list(chunks), list(concepts), loop.create_future())
+        if write.rows == 0:
+            return
+        self._pending.append(write)
+        self._pending_rows += write.rows
+        if self._pending_rows >= self.max_rows:
+            self._full.set()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        # A cancelled caller does not unsend its rows; the batch still commits
+        await asyncio.shield(write.future)
+
+    async def _run(self):
+        while self._pending:
+            if self._pending_rows < self.max_rows:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            batch, rows = [], 0
+            while self._pending and (not batch or rows + self._pending[0].rows <= self.max_rows):
+                write = self._pending.pop(0)
+                batch.append(write)
+                rows += write.rows
+            self._pending_rows -= rows
+            if self._pending_rows < self.max_rows:
+                self._full.clear()
+            await self._commit(batch)
+
+    async def _commit(self, batch: List[_Write]):
+        chunks = [row for write in batch for row in write.chunks]
+        concepts = [row for write in batch for row in write.concepts]
+        try:
+            with metrics.span("neo4j.coalesced_write"):
+                await asyncio.to_thread(self._execute, chunks, concepts)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0], e)
+                return
+            # Find the bad rows: every caller commits alone
+            print(f"⚠️  Coalesced Neo4j write of {len(batch)} uploads failed ({e}); retrying individually")
+            self.isolated_retries += 1
+            for write in batch:
+                try:
+                    await asyncio.to_thread(self._execute, write.chunks, write.concepts)
+                except Exception as single:
+                    self._resolve(write, single)
+                else:
+                    self._resolve(write)
+            return
+
+        self.batches += 1
+        self.writes += len(batch)
+        self.rows += len(chunks) + len(concepts)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for write in batch:
+            self._resolve(write)
+
+    def _execute(self, chunks: List[Dict[str, Any]], concepts: List[Dict[str, Any]]):
+        with self.driver.session() as session:
+            session.run(WRITE_QUERY, chunks=chunks, concepts=concepts).consume()
+
+    @staticmethod
+    def _resolve(write: _Write, error: Optional[BaseException] = None):
+        if write.future.done():
+            return
+        if error is None:
+            write.future.set_result(None)
+        else:
+            write.future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "rows": self.rows,
+            "writes_per_batch": round(self.writes / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "isolated_retries": self.isolated_retries,
+            "pending_rows": self._pending_rows,
+        }
+
+
+# --- Registry (one coalescer per driver) ---
+_coalescers: Dict[int, WriteCoalescer] = {}
+_coalescers_lock = threading.Lock()
+
+
+def get_write_coalescer(driver) -> WriteCoalescer:
+    # The registry holds each driver, so its id() cannot be reused
+    coalescer = _coalescers.get(id(driver))
+    if coalescer is None:
+        with _coalescers_lock:
+            coalescer = _coalescers.get(id(driver))
+            if coalescer is None:
+                coalescer = _coalescers[id(driver)] = WriteCoalescer(
+                    driver,
+                    max_delay=float(os.getenv("NEO4J_WRITE_MAX_DELAY_MS", "5")) / 1000,
+                    max_rows=int(os.getenv("NEO4J_WRITE_MAX_ROWS", "2000")),
+                )
+    return coalescer
+
+
+def coalescer_stats() -> Dict[str, Any]:
+    """Counters summed over every driver's coalescer (for /metrics)."""
+    totals: Dict[str, Any] = {}
+    for coalescer in list(_coalescers.values()):
+        for key, value in coalescer.stats().items():
+            if key == "largest_batch":
+                totals[key] = max(totals.get(key, 0), value)
+            elif key != "writes_per_batch":
+                totals[key] = totals.get(key, 0) + value
+    if totals.get("batches"):
+        totals["writes_per_batch"] = round(totals["writes"] / totals["batches"], 2)
+    return totals
@@ -0,0 +1,38 @@
+import os
+import pytest
+from unittest.mock import patch
+
+# Keep the full-text search index of every NoteService built in tests in memory
+os.environ.setdefault("NOTE_SEARCH_PATH", ":memory:")
+
+# --- Shared note fixtures ---
+@pytest.fixture
+def fake_supabase():
+    from app.tests.fakes import FakeSupabase
+
+    return FakeSupabase()
+
+@pytest.fixture
+def bucket(fake_supabase):
+    from app.services.note import NoteService
+
+    return fake_supabase.storage.from_(NoteService.BUCKET_NAME)
+
+@pytest.fixture
+def make_service(fake_supabase):
+    """
+    NoteService factory on fake_supabase: make_service("single", compression="none")
+    sets NOTE_STORAGE_FORMAT and NOTE_<KEY> for each keyword while it is built.
+    """
+    from app.services.note import NoteService
+
+    def make(storage_format: str = "split", **env):
+        overrides = {f"NOTE_{key.upper()}": str(value) for key, value in env.items()}
+        overrides["NOTE_STORAGE_FORMAT"] = storage_format
+        with patch.dict("os.environ", overrides):
+            return NoteService(client=fake_supabase)
+    return make
+
+@pytest.fixture
+def service(make_service):
+    return make_service()
@@ -0,0 +1,243 @@
+"""
+In-memory stand-ins for the Supabase client (storage buckets + tables).
+Location: backend/app/tests/fakes.py
+
+Only the call shapes used by the services are implemented.
+"""
+
+import hashlib
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FakeStorageError(Exception):
+    """Mimics storage3's StorageException (message carries the status)."""
+
+
+class FakeBucket:
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self.calls: List[str] = []
+
+    def upload(self, path: str, file: bytes, file_options: Optional[dict] = None):
+        self.calls.append("upload")
+        if path in self.objects and (file_options or {}).get("upsert") != "true":
+            raise FakeStorageError("409 Duplicate: The resource already exists")
+        self.objects[path] = bytes(file)
+        return SimpleNamespace(path=path)
+
+    def update(self, path: str, file: bytes, file_options: Optional[dict] = None):
+        self.calls.append("update")
+        if path not in self.objects:
+            raise FakeStorageError("404 Object not found")
+        self.objects[path] = bytes(file)
+        return SimpleNamespace(path=path)
+
+    def download(self, path: str, options: Optional[dict] = None, query_params: Optional[dict] = None) -> bytes:
+        self.calls.append("download")
+        if path not in self.objects:
+            raise FakeStorageError("404 Object not found")
+        return self.objects[path]
+
+    def info(self, path: str) -> Dict[str, Any]:
+        self.calls.append("info")
+        if path not in self.objects:
+            raise FakeStorageError("404 Object not found")
+        data = self.objects[path]
+        return {"name": path, "size": len(data), "etag": hashlib.md5(data).hexdigest()}
+
+    def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        self.calls.append("remove")
+        return [{"name": p} for p in paths if self.objects.pop(p, None) is not None]
+
+    def list(self, path: Optional[str] = None, options: Optional[dict] = None) -> List[Dict[str, Any]]:
+        self.calls.append("list")
+        prefix = f"{path}/" if path else ""
+        names = sorted(
+            name[len(prefix):] for name in self.objects
+            if name.startswith(prefix) and "/" not in name[len(prefix):]
+        )
+        options = options or {}
+        offset = options.get("offset", 0)
+        limit = options.get("limit", 100)
+        return [{"name": name} for name in names[offset:offset + limit]]
+
+
+class FakeStorage:
+    def __init__(self):
+        self.buckets: Dict[str, FakeBucket] = {}
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return self.buckets.setdefault(bucket, FakeBucket())
+
+    def list_buckets(self):
+        return [SimpleNamespace(name=name) for name in self.buckets]
+
+    def create_bucket(self, name: str, options: Optional[dict] = None):
+        self.buckets.setdefault(name, FakeBucket())
+
+
+def _split_top_level(expr: str) -> List[str]:
+    """Split a PostgREST logic expression on commas outside parentheses/quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    parts.append(current)
+    return parts
+
+
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+}
+
+
+def _parse_condition(term: str) -> Callable[[dict], bool]:
+    for logic, combine in (("and(", all), ("or(", any)):
+        if term.startswith(logic):
+            inner = [_parse_condition(t) for t in _split_top_level(term[len(logic):-1])]
+            return lambda row, inner=inner, combine=combine: combine(p(row) for p in inner)
+    column, op, value = term.split(".", 2)
+    value = value.strip('"')
+    return lambda row: _OPS[op](_as_str(row.get(column)), value)
+
+
+def _as_str(value):
+    return None if value is None else str(value)
+
+
+class FakeQuery:
+    def __init__(self, table: "FakeTable"):
+        self.table = table
+        self.filters: List[Callable[[dict], bool]] = []
+        self.orders: List[tuple] = []
+        self.row_limit: Optional[int] = None
+        self.action = "select"
+        self.payload: Any = None
+        self.columns: Optional[List[str]] = None
+
+    # --- Query builders ---
+    def select(self, columns: str = "*", **kwargs):
+        self.action = "select"
+        self.columns = None if columns == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.action, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", **kwargs):
+        self.action, self.payload = "upsert", rows
+        return self
+
+    def update(self, values, **kwargs):
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: _OPS["gt"](_as_str(row.get(column)), str(value)))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: _OPS["gte"](_as_str(row.get(column)), str(value)))
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: _OPS["lte"](_as_str(row.get(column)), str(value)))
+        return self
+
+    def or_(self, expr: str):
+        self.filters.append(_parse_condition(f"or({expr})"))
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.row_limit = size
+        return self
+
+    # --- Execution ---
+    def _matches(self, row: dict) -> bool:
+        return all(f(row) for f in self.filters)
+
+    def execute(self):
+        self.table.calls.append(self.action)
+        rows = self.table.rows
+        key = self.table.primary_key
+
+        if self.action in ("insert", "upsert"):
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            for row in payload:
+                existing = next((r for r in rows if r.get(key) == row.get(key)), None)
+                if existing is not None and self.action == "upsert":
+                    existing.update(row)
+                else:
+                    rows.append(dict(row))
+            return SimpleNamespace(data=payload)
+
+        matched = [r for r in rows if self._matches(r)]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.payload)
+            return SimpleNamespace(data=matched)
+        if self.action == "delete":
+            self.table.rows = [r for r in rows if not self._matches(r)]
+            return SimpleNamespace(data=matched)
+
+        for column, desc in reversed(self.orders):
+            matched.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        if self.row_limit is not None:
+            matched = matched[:self.row_limit]
+        if self.columns:
+            matched = [{c: r.get(c) for c in self.columns} for r in matched]
+        return SimpleNamespace(data=[dict(r) for r in matched])
+
+
+class FakeTable:
+    def __init__(self, primary_key: str = "id"):
+        self.rows: List[dict] = []
+        self.primary_key = primary_key
+        self.calls: List[str] = []
+
+
+class FakeSupabase:
+    """Drop-in for `supabase.Client` covering `.storage` and `.table()`."""
+
+    PRIMARY_KEYS = {"notes": "file_id"}
+
+    def __init__(self):
+        self.storage = FakeStorage()
+        self.tables: Dict[str, FakeTable] = {}
+
+    def table(self, name: str) -> FakeQuery:
+        table = self.tables.setdefault(name, FakeTable(self.PRIMARY_KEYS.get(name, "id")))
+        return FakeQuery(table)
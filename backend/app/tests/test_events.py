@@ -0,0 +1,152 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.schemas.events import ActivityEvent
+from app.services.events import EventService
+from app.tests.fakes import FakeSupabase
+
+client = TestClient(app)
+
+# --- Helpers ---
+NOW = datetime.now(timezone.utc)
+
+def event(minutes_ago=0, duration_ms=30000, topic="Graphs"):
+    return ActivityEvent(type="read", occurred_at=NOW - timedelta(minutes=minutes_ago), duration_ms=duration_ms, topic=topic)
+
+def supabase_with_rollups(daily=(), topics=()):
+    """Supabase mock whose rollup reads return the given rows."""
+    supabase = MagicMock()
+
+    def table(name):
+        query = MagicMock()
+        rows = list(daily) if name == "activity_daily" else list(topics)
+        for method in ("select", "eq", "gte", "in_", "order", "limit"):
+            getattr(query, method).return_value = query
+        query.execute.return_value.data = rows
+        return query
+
+    supabase.table.side_effect = table
+    return supabase
+
+# --- Tests ---
+@pytest.mark.asyncio
+async def test_batch_becomes_few_rollup_rows_and_one_bulk_insert():
+    supabase = MagicMock()
+    service = EventService(supabase=supabase)
+
+    result = service.record("u1", [event(i, topic=["Graphs", "Docker"][i % 2]) for i in range(10)])
+    await service.flush()
+
+    assert result == {"accepted": 10, "rejected": 0, "duplicate": False}
+    rpc_name, rollups = supabase.rpc.call_args.args
+    assert rpc_name == "apply_activity_rollups"
+    assert len(rollups["daily"]) <= 2  # Ten events, at most two UTC days
+    assert sum(row["events"] for row in rollups["daily"]) == 10
+    assert {row["topic"]: row["duration_ms"] for row in rollups["topics"]} == {"Graphs": 150000, "Docker": 150000}
+    assert supabase.table.return_value.insert.call_count == 1
+    assert service.stats()["buffered"] == 0
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_deltas_for_the_next_one():
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.side_effect = [ConnectionError("down"), MagicMock()]
+    service = EventService(supabase=supabase)
+
+    service.record("u1", [event(duration_ms=1000)])
+    await service.flush()
+    service.record("u1", [event(duration_ms=2000)])
+    await service.flush()
+
+    rollups = supabase.rpc.call_args.args[1]
+    assert rollups["daily"][0]["duration_ms"] == 3000
+    assert rollups["daily"][0]["events"] == 2
+    assert service.stats()["flush_failures"] == 1
+    assert len(supabase.table.return_value.insert.call_args.args[0]) == 2
+
+@pytest.mark.asyncio
+async def test_failed_raw_chunk_requeues_only_unwritten_events():
+    supabase = MagicMock()
+    insert = supabase.table.return_value.insert
+    insert.return_value.execute.side_effect = [MagicMock(), ConnectionError("down"), MagicMock(), MagicMock()]
+    service = EventService(supabase=supabase)
+    service.record("u1", [event(i) for i in range(5)])
+
+    with patch("app.services.events.INSERT_CHUNK_SIZE", 2):
+        assert await service.flush() == 2
+        assert service.stats()["buffered"] == 3
+        assert await service.flush() == 3
+
+    inserted = [row for call in insert.call_args_list for row in call.args[0]]
+    assert len(inserted) == 2 + 2 + 3  # The failed chunk is retried, the written one is not
+    assert len({row["occurred_at"] for row in inserted}) == 5
+    assert service.stats()["flushed_events"] == 5
+
+@pytest.mark.asyncio
+async def test_requeue_into_a_full_buffer_counts_dropped_events():
+    supabase = MagicMock()
+    service = EventService(supabase=supabase, buffer_max=4, flush_size=100)
+
+    def fail_while_more_arrive():
+        service.record("u1", [event(), event()])
+        raise ConnectionError("down")
+
+    supabase.rpc.return_value.execute.side_effect = fail_while_more_arrive
+    service.record("u1", [event(i) for i in range(3)])
+    await service.flush()
+
+    assert service.stats()["buffered"] == 4
+    assert service.stats()["dropped"] == 1
+
+@pytest.mark.asyncio
+async def test_summary_adds_unflushed_events_to_stored_rollups():
+    today = NOW.date()
+    service = EventService(supabase=supabase_with_rollups(
+        daily=[{"day": today.isoformat(), "duration_ms": 60000, "events": 2}],
+        topics=[{"topic": "Docker", "duration_ms": 60000, "events": 2}],
+    ))
+    service.record("u1", [event(duration_ms=30000, topic="Graphs")])
+    service.record("u2", [event(duration_ms=99000, topic="Other")])
+
+    summary = await service.summary("u1", days=7)
+
+    assert [d["day"] for d in summary["days"]] == [today - timedelta(days=i) for i in range(6, -1, -1)]
+    assert summary["days"][-1] == {"day": today, "seconds": 90.0, "events": 3}
+    assert [t["topic"] for t in summary["topics"]] == ["Docker", "Graphs"]
+    assert summary["total_seconds"] == 90.0
+
+@pytest.mark.asyncio
+async def test_pending_activity_ranks_topics_outside_the_stored_top_n():
+    supabase = FakeSupabase()
+    for topic, seconds in [("Docker", 100), ("Graphs", 90), ("Rust", 30), ("Go", 10)]:
+        supabase.table("activity_topics").insert({"user_id": "u1", "topic": topic, "duration_ms": seconds * 1000, "events": 1}).execute()
+    service = EventService(supabase=supabase)
+    service.record("u1", [event(duration_ms=80000, topic="Rust")])
+
+    summary = await service.summary("u1", topic_limit=2)
+
+    assert [(t["topic"], t["seconds"]) for t in summary["topics"]] == [("Rust", 110.0), ("Docker", 100.0)]
+
+def test_resent_batch_and_stale_events_are_not_counted():
+    service = EventService(supabase=MagicMock())
+
+    first = service.record("u1", [event(), event(minutes_ago=60 * 24 * 30)], batch_id="b1")
+    again = service.record("u1", [event()], batch_id="b1")
+
+    assert first == {"accepted": 1, "rejected": 1, "duplicate": False}
+    assert again["duplicate"] is True
+    assert service.stats()["received"] == 1
+
+def test_events_endpoint_accepts_batch_and_sheds_load_when_full():
+    service = EventService(supabase=MagicMock(), buffer_max=1)
+    body = {"user_id": "u1", "events": [{"type": "read", "occurred_at": NOW.isoformat(), "duration_ms": 1000}]}
+
+    with patch("app.api.events.get_event_service", return_value=service):
+        accepted = client.post("/api/events", json=body)
+        full = client.post("/api/events", json=body)
+
+    assert accepted.status_code == 202
+    assert accepted.json()["accepted"] == 1
+    assert full.status_code == 503
+    assert "retry-after" in full.headers
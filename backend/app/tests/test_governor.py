@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.governor import BACKGROUND, INTERACTIVE, Governor, GovernorRejected, TokenBucket
+
+client = TestClient(app)
+
+# --- Helpers ---
+def governor(rate=50.0, capacity=1.0, **kwargs):
+    return Governor({"llm": TokenBucket(rate, capacity)}, **kwargs)
+
+async def served_order(gov, calls):
+    """Start calls (user, priority) in order while the bucket is empty; return grant order."""
+    await gov.acquire("llm")  # Drain the single token
+    order = []
+
+    async def call(name, user, priority):
+        await gov.acquire("llm", user=user, priority=priority)
+        order.append(name)
+
+    tasks = []
+    for name, user, priority in calls:
+        tasks.append(asyncio.create_task(call(name, user, priority)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+class GatedBucket:
+    """Bucket whose take() waits on `gate` (like a Redis round trip) and answers from `waits`."""
+
+    def __init__(self, waits):
+        self.rate, self.capacity = 1.0, 1.0
+        self.waits = list(waits)
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def take(self, cost):
+        await self.gate.wait()
+        return self.waits.pop(0) if self.waits else 0.0
+
+# --- Tests ---
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_reports_wait():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+
+    assert await bucket.take(1) == 0
+    assert await bucket.take(1) == 0
+    assert 0.05 < await bucket.take(1) <= 0.1
+
+@pytest.mark.asyncio
+async def test_interactive_calls_jump_background_queue():
+    order = await served_order(governor(), [
+        ("ingest-1", "a", BACKGROUND), ("ingest-2", "a", BACKGROUND), ("chat", "b", INTERACTIVE),
+    ])
+
+    assert order == ["chat", "ingest-1", "ingest-2"]
+
+@pytest.mark.asyncio
+async def test_users_take_turns_within_a_priority():
+    order = await served_order(governor(), [
+        ("a1", "a", BACKGROUND), ("a2", "a", BACKGROUND), ("a3", "a", BACKGROUND), ("b1", "b", BACKGROUND),
+    ])
+
+    assert order == ["a1", "b1", "a2", "a3"]
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after():
+    gov = governor(rate=1.0, max_queue=1)
+    await gov.acquire("llm")
+    queued = asyncio.create_task(gov.acquire("llm", user="a"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(GovernorRejected) as rejected:
+        await gov.acquire("llm", user="b")
+    queued.cancel()
+
+    assert rejected.value.retry_after >= 1
+    assert gov.stats()["llm"]["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_during_a_yielding_take_does_not_stall_the_queue():
+    bucket = GatedBucket(waits=[1.0])  # The first direct take fails, so "a" queues
+    gov = Governor({"llm": bucket})
+    a = asyncio.create_task(gov.acquire("llm", user="a"))
+    await asyncio.sleep(0)
+    bucket.gate.clear()
+    await asyncio.sleep(0)  # Dispatcher is now inside take() for "a"
+    b = asyncio.create_task(gov.acquire("llm", user="b"))
+    await asyncio.sleep(0)
+
+    a.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await a
+    bucket.gate.set()
+
+    await asyncio.wait_for(b, timeout=1)
+    lane = gov.lanes["llm"]
+    assert lane.waiting == 0 and lane.per_user == {}
+    assert lane.task.done() and lane.task.exception() is None
+
+def test_upload_is_rejected_with_429_when_saturated():
+    saturated = MagicMock()
+    saturated.check.side_effect = GovernorRejected("embed", "queue full", 7.2)
+
+    with patch("app.api.ingestion.get_supabase"), patch("app.api.ingestion.get_neo4j"), \
+         patch("app.api.ingestion.get_governor", return_value=saturated):
+        response = client.post("/api/ingestion/upload", data={"user_id": "u1"},
+                               files={"file": ("a.md", b"# Title\nBody", "text/markdown")})
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "8"
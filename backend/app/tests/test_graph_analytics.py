@@ -0,0 +1,64 @@
+import numpy as np
+from unittest.mock import MagicMock
+from app.services.graph_analytics import (
+    build_graph,
+    compute_scores,
+    pagerank,
+    run_analytics,
+)
+
+# --- Helpers ---
+def mentions(files, concepts, community=None):
+    """Every file in `files` mentions every concept in `concepts`."""
+    return [
+        {"file_id": f, "file_community": community, "concept": c, "concept_community": community}
+        for f in files for c in concepts
+    ]
+
+def community_of(graph, scores, label, key):
+    return int(scores["community"][graph.nodes.index((label, key))])
+
+# --- Tests ---
+def test_pagerank_is_a_distribution():
+    graph = build_graph(mentions(["a", "b"], ["x", "y", "z"]))
+    ranks = pagerank(graph.node_count, graph.src, graph.dst)
+
+    assert np.isclose(ranks.sum(), 1.0)
+    # Concepts mentioned by the same files score identically
+    assert np.allclose(ranks[1:4], ranks[1])
+
+def test_full_run_separates_disconnected_clusters():
+    graph = build_graph(mentions(["a", "b"], ["x", "y"]) + mentions(["c", "d"], ["p", "q"]))
+    region, scores = compute_scores(graph, full=True)
+
+    assert region.all()
+    assert community_of(graph, scores, "File", "a") == community_of(graph, scores, "Concept", "y")
+    assert community_of(graph, scores, "File", "a") != community_of(graph, scores, "File", "c")
+
+def test_incremental_run_only_refreshes_touched_communities():
+    scored = mentions(["a", "b"], ["x", "y"], community=0) + mentions(["c", "d"], ["p", "q"], community=1)
+    new_file = [{"file_id": "e", "file_community": None, "concept": "p", "concept_community": 1}]
+    graph = build_graph(scored + new_file)
+
+    region, scores = compute_scores(graph)
+
+    refreshed = {graph.nodes[i] for i in np.flatnonzero(region)}
+    assert ("File", "e") in refreshed
+    assert ("File", "c") in refreshed
+    assert ("File", "a") not in refreshed
+    # The new file joins the community it is connected to, which keeps its id
+    assert community_of(graph, scores, "File", "e") == 1
+    assert community_of(graph, scores, "File", "a") == 0
+
+def test_run_analytics_writes_back_in_batches():
+    session = MagicMock()
+    session.run.return_value = mentions(["a"], ["x", "y"])
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value = session
+
+    summary = run_analytics(full=True, driver=driver)
+
+    assert summary["nodes"] == 3
+    assert summary["written"] == 3
+    # One export query plus one write per label
+    assert session.run.call_count == 3
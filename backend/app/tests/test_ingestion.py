@@ -92,3 +92,10 @@ async def test_process_file_empty_text(mock_chat, mock_embeddings, mock_supabase
     
     assert result["status"] == "failed"
     assert "No text found" in result["message"]
+
+def test_concept_names_come_from_json_or_cypher_answers():
+    from app.api.ingestion import _concept_names
+
+    assert _concept_names('```json\n["Docker", "Kubernetes"]\n```') == ["Docker", "Kubernetes"]
+    assert _concept_names("MERGE (c:Concept {name: 'Neo4j'}) MERGE (d:Concept {name:\"Cypher\"})") == ["Neo4j", "Cypher"]
+    assert _concept_names("MATCH (n) DETACH DELETE n") == []
@@ -0,0 +1,83 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import metrics
+from app.services.note import NoteService
+from app.tests.fakes import FakeSupabase
+
+client = TestClient(app)
+
+# --- Helpers ---
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.configure(True)
+
+def count(stage):
+    snap = metrics.STAGE_SECONDS.snapshot(stage)
+    return snap["count"] if snap else 0
+
+# --- Tests ---
+def test_histogram_buckets_are_cumulative():
+    hist = metrics.Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        hist.observe(value, "a")
+
+    snap = hist.snapshot("a")
+
+    assert snap["buckets"] == {0.1: 1, 1.0: 3, float("inf"): 4}
+    assert snap["count"] == 4 and snap["sum"] == pytest.approx(6.05)
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 4' in hist.render()
+
+def test_span_records_errors_and_noop_when_disabled():
+    with pytest.raises(KeyError):
+        with metrics.span("stage.fails"):
+            raise KeyError("x")
+    metrics.configure(False)
+    with metrics.span("stage.off"):
+        pass
+
+    assert count("stage.fails") == 1
+    assert metrics.STAGE_ERRORS.value("stage.fails", "KeyError") == 1
+    assert count("stage.off") == 0
+
+@pytest.mark.asyncio
+async def test_note_service_times_operations_and_backend_calls():
+    service = NoteService(client=FakeSupabase())
+
+    await service.create_note(file_id="n1", title="T", content="# Hi")
+    service.cache.clear()
+    await service.get_note("n1")
+
+    assert count("note.create") == 1
+    assert count("note.get") == 1
+    assert count("note.storage.upload") >= 1
+    assert count("note.index.upsert") == 1
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    client.post("/api/chat/query", json={"query": "Docker?", "mode": "execution"})
+
+    response = client.get("/metrics")
+    metrics.configure(False)
+    disabled = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE app_stage_duration_seconds histogram" in response.text
+    assert 'app_stage_duration_seconds_count{stage="chat.query"} 1' in response.text
+    assert disabled.status_code == 404
+
+def test_monotonic_stats_are_rendered_as_counters():
+    lines = metrics.render_gauges("note_cache", {"hits": 3, "entries": 2, "hit_rate": 0.5}, counters=("hits",))
+
+    assert "# TYPE note_cache_hits_total counter" in lines
+    assert "note_cache_hits_total 3" in lines
+    assert "# TYPE note_cache_entries gauge" in lines
+    assert "# TYPE note_cache_hit_rate gauge" in lines
+
+def test_metrics_endpoint_types_governor_admissions_as_counters():
+    response = client.get("/metrics")
+
+    assert "# TYPE governor_embed_admitted_total counter" in response.text
+    assert "# TYPE governor_embed_waiting gauge" in response.text
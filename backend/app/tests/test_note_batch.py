@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.note import NoteService
+
+client = TestClient(app)
+
+# --- Helpers ---
+@pytest.fixture
+def service(make_service):
+    # The endpoints read the module-level note_service
+    with patch("app.api.note.note_service", make_service()) as service:
+        yield service
+
+def payload(file_id):
+    return {"file_id": file_id, "title": f"Note {file_id}", "content": f"# {file_id}"}
+
+# --- Tests ---
+def test_batch_create_reports_per_item_status(service):
+    client.post("/api/notes", json=payload("dup"))
+
+    response = client.post("/api/notes/batch", json={"notes": [payload("a"), payload("dup"), payload("b")]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == [201, 409, 201]
+    assert data["succeeded"] == 2
+    assert data["failed"] == 1
+    assert data["results"][0]["note"]["title"] == "Note a"
+
+def test_batch_get_returns_content_and_missing(service):
+    client.post("/api/notes/batch", json={"notes": [payload("a"), payload("b")]})
+
+    response = client.post("/api/notes/batch-get", json={"file_ids": ["a", "missing", "b"]})
+
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [200, 404, 200]
+    assert results[2]["note"]["content"] == "# b"
+
+def test_batch_delete_uses_one_storage_call(service, fake_supabase):
+    client.post("/api/notes/batch", json={"notes": [payload(str(i)) for i in range(50)]})
+    bucket = fake_supabase.storage.from_(NoteService.BUCKET_NAME)
+    removes = bucket.calls.count("remove")
+
+    response = client.post("/api/notes/batch-delete", json={"file_ids": [str(i) for i in range(50)] + ["missing"]})
+
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [204] * 50 + [404]
+    assert bucket.calls.count("remove") == removes + 1
+    assert bucket.objects == {}
+    assert fake_supabase.tables["notes"].rows == []
+
+@pytest.mark.asyncio
+async def test_fan_out_is_bounded(make_service):
+    service = make_service()
+    service.batch_concurrency = 3
+    in_flight = peak = 0
+
+    async def tracked(i):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return i
+
+    results = await service.gather_bounded(tracked(i) for i in range(20))
+
+    assert results == list(range(20))
+    assert peak == 3
+
+def test_batch_size_is_capped(service):
+    response = client.post("/api/notes/batch-get", json={"file_ids": [str(i) for i in range(501)]})
+    assert response.status_code == 422
@@ -0,0 +1,66 @@
+import pytest
+from app.services.note import NoteService
+from app.services.note_cache import NoteCache
+
+# --- Helpers ---
+def bucket_calls(fake_supabase, call):
+    return fake_supabase.storage.from_(NoteService.BUCKET_NAME).calls.count(call)
+
+# --- Tests ---
+def test_lru_evicts_by_bytes():
+    cache = NoteCache(max_bytes=300, revalidate_after=60)
+    for i in range(3):
+        cache.put(f"n{i}", {"file_id": f"n{i}", "content": "x" * 100}, ("etag", None))
+
+    # n0 was least recently used and pushed the cache over budget
+    assert cache.get("n0") is None
+    assert cache.get("n2") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 300
+
+def test_oversized_entry_is_not_cached():
+    cache = NoteCache(max_bytes=10)
+    cache.put("big", {"content": "x" * 100}, (None, None))
+    assert cache.get("big") is None
+
+@pytest.mark.asyncio
+async def test_hot_reads_skip_storage(service, fake_supabase):
+    await service.create_note(file_id="n1", title="Hot", content="# Hot note")
+
+    await service.get_note("n1")
+    downloads = bucket_calls(fake_supabase, "download")
+    note = await service.get_note("n1")
+
+    assert note["content"] == "# Hot note"
+    assert bucket_calls(fake_supabase, "download") == downloads
+    assert service.cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_stale_entry_revalidates_with_etag(service, fake_supabase):
+    service.cache.revalidate_after = 0
+    await service.create_note(file_id="n1", title="Note", content="# Body")
+    await service.get_note("n1")
+    downloads = bucket_calls(fake_supabase, "download")
+
+    # Unchanged in storage: one info() call, no downloads
+    await service.get_note("n1")
+    assert bucket_calls(fake_supabase, "download") == downloads
+    assert service.cache.stats()["revalidated"] == 1
+
+    # Changed behind our back: ETag mismatch forces a refetch
+    bucket = fake_supabase.storage.from_(NoteService.BUCKET_NAME)
+    bucket.objects["n1.meta.json"] = bucket.objects["n1.meta.json"].replace(b'"Note"', b'"Edited"')
+    note = await service.get_note("n1")
+    assert note["title"] == "Edited"
+    assert service.cache.stats()["stale"] == 1
+
+@pytest.mark.asyncio
+async def test_local_writes_invalidate(service):
+    await service.create_note(file_id="n1", title="Note", content="# Old")
+    await service.get_note("n1")
+
+    await service.update_note("n1", content="# New")
+    assert (await service.get_note("n1"))["content"] == "# New"
+
+    await service.delete_note("n1")
+    assert service.cache.get("n1") is None
@@ -0,0 +1,54 @@
+import pytest
+from app.services.note_codec import NoteCodec, is_compressed, zstd
+from app.services.note_format import decode_note, encode_note
+
+ARTICLE = "# Neural Networks\n\n" + "Backpropagation computes gradients layer by layer. " * 200
+
+# --- Helpers ---
+# --- Tests ---
+@pytest.mark.parametrize("codec", ["zlib", pytest.param("zstd", marks=pytest.mark.skipif(zstd is None, reason="needs compression.zstd"))])
+def test_codec_round_trip(codec):
+    note_codec = NoteCodec(codec=codec, min_bytes=0)
+    stored = note_codec.encode(ARTICLE)
+
+    assert is_compressed(stored)
+    assert len(stored) < len(ARTICLE) / 5
+    assert note_codec.decode(stored) == ARTICLE
+
+def test_small_and_plain_bodies_pass_through():
+    note_codec = NoteCodec(codec="zlib", min_bytes=256)
+
+    assert note_codec.encode("# Short") == b"# Short"
+    # Objects written before compression are plain UTF-8
+    assert note_codec.decode("x marks the spot".encode('utf-8')) == "x marks the spot"
+
+def test_single_object_body_is_compressed():
+    note_codec = NoteCodec(codec="zlib", min_bytes=0)
+    data = encode_note({"file_id": "n1"}, ARTICLE, note_codec)
+
+    assert len(data) < len(ARTICLE)
+    assert decode_note(data) == ({"file_id": "n1"}, ARTICLE)
+
+@pytest.mark.parametrize("storage_format", ["split", "single"])
+@pytest.mark.asyncio
+async def test_service_stores_compressed_and_reads_transparently(make_service, fake_supabase, bucket, storage_format):
+    service = make_service(storage_format, compression="zlib")
+    metadata = await service.create_note(file_id="n1", title="Article", content=ARTICLE)
+
+    assert metadata["size_bytes"] == len(ARTICLE)
+    assert metadata["stored_bytes"] < metadata["size_bytes"] / 5
+    assert fake_supabase.tables["notes"].rows[0]["stored_bytes"] == metadata["stored_bytes"]
+
+    service.cache.clear()
+    assert (await service.get_note("n1"))["content"] == ARTICLE
+
+@pytest.mark.asyncio
+async def test_uncompressed_notes_stay_readable(make_service):
+    await make_service(compression="none").create_note(file_id="n1", title="Old", content=ARTICLE)
+    service = make_service(compression="zlib")
+
+    await service.update_note("n1", content=ARTICLE + "\nMore.")
+
+    service.cache.clear()
+    assert (await service.get_note("n1"))["content"] == ARTICLE + "\nMore."
+    assert (await service.get_note_version("n1", 1))["content"] == ARTICLE
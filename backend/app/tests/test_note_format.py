@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from app.services.note_format import decode_note, encode_note, is_single_object, split_note
+
+# --- Tests ---
+def test_roundtrip_keeps_body_frontmatter_intact():
+    body = "---\ntags: [ml]\n---\n# Title\n\nBody ✨"
+    data = encode_note({"file_id": "n1", "title": "T"}, body)
+
+    assert is_single_object(data)
+    metadata, content = decode_note(data)
+    assert metadata == {"file_id": "n1", "title": "T"}
+    assert content == body
+
+def test_decode_rejects_plain_markdown():
+    with pytest.raises(ValueError):
+        decode_note(b"# Just markdown")
+
+@pytest.mark.asyncio
+async def test_single_object_read_is_one_download(make_service, bucket):
+    service = make_service("single")
+    await service.create_note(file_id="n1", title="One", content="# One")
+
+    assert {p for p in bucket.objects if not p.startswith("history/")} == {"n1.note"}
+    downloads = bucket.calls.count("download")
+    note = await service.get_note("n1")
+
+    assert note["content"] == "# One"
+    assert bucket.calls.count("download") == downloads + 1
+
+@pytest.mark.asyncio
+async def test_title_only_update_rewrites_just_the_header(make_service, bucket):
+    service = make_service("single", compression="zlib")
+    await service.create_note(file_id="n1", title="Old", content="# Body " * 50)
+    _, stored = split_note(bucket.objects["n1.note"])
+    writes = bucket.calls.count("upload") + bucket.calls.count("update")
+
+    await service.update_note("n1", title="New")
+
+    assert bucket.calls.count("upload") + bucket.calls.count("update") == writes + 1
+    header, body = split_note(bucket.objects["n1.note"])
+    assert header["title"] == "New" and body == stored
+    note = await service.get_note("n1")
+    assert note["title"] == "New"
+    assert note["content"] == "# Body " * 50
+
+@pytest.mark.asyncio
+async def test_rename_survives_an_index_rebuild(make_service, fake_supabase):
+    service = make_service("single")
+    await service.create_note(file_id="n1", title="Old", content="# Body")
+    await service.update_note("n1", title="New")
+
+    assert await service.rebuild_index() == 1
+    service.cache.invalidate("n1")
+
+    assert fake_supabase.tables["notes"].rows[0]["title"] == "New"
+    assert (await service.get_note("n1"))["title"] == "New"
+
+@pytest.mark.asyncio
+async def test_rebuild_keeps_a_rename_that_only_reached_the_index(make_service, fake_supabase):
+    service = make_service("single")
+    await service.create_note(file_id="n1", title="Old", content="# Body")
+    # Renamed before headers were rewritten on rename: only the row has it
+    fake_supabase.table("notes").update({"title": "New", "updated_at": "2999-01-01T00:00:00+00:00"}).eq("file_id", "n1").execute()
+
+    await service.rebuild_index()
+    service.cache.invalidate("n1")
+
+    assert (await service.get_note("n1"))["title"] == "New"
+
+@pytest.mark.asyncio
+async def test_two_file_notes_migrate_lazily(make_service, bucket):
+    await make_service("split").create_note(file_id="n1", title="Legacy", content="# Legacy")
+    await make_service("split").create_note(file_id="n2", title="Legacy 2", content="# Legacy 2")
+    service = make_service("single")
+
+    # Read path: served from the old layout, converted in the background
+    note = await service.get_note("n1")
+    await asyncio.gather(*service._background)
+    assert note["content"] == "# Legacy"
+    assert {"n1.note"} <= set(bucket.objects)
+    assert "n1.md" not in bucket.objects
+
+    # Write path: converted as part of the update
+    await service.update_note("n2", content="# Updated")
+    assert "n2.meta.json" not in bucket.objects
+    assert (await service.get_note("n2"))["content"] == "# Updated"
+    notes, _ = await service.list_notes()
+    assert {n["storage_path"] for n in notes} == {"n1.note", "n2.note"}
+
+@pytest.mark.asyncio
+async def test_create_refuses_an_id_taken_by_a_two_file_note(make_service, bucket):
+    await make_service("split").create_note(file_id="n1", title="Legacy", content="# Legacy")
+    service = make_service("single")
+
+    with pytest.raises(ValueError, match="already exists"):
+        await service.create_note(file_id="n1", title="Shadow", content="# Shadow")
+
+    assert "n1.note" not in bucket.objects
+    assert (await service.get_note("n1"))["content"] == "# Legacy"
@@ -0,0 +1,149 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.note_history import (
+    VersionConflictError,
+    apply_patch,
+    diff_text,
+    reconstruct,
+    snapshot_version
+)
+
+client = TestClient(app)
+
+# --- Helpers ---
+INTERVAL = 3  # Short snapshot interval, so chains cross a snapshot quickly
+
+# --- Tests ---
+def test_diff_round_trips():
+    for old, new in [("", "abc"), ("abc", ""), ("hello world", "hello brave world"), ("same", "same")]:
+        assert apply_patch(old, diff_text(old, new)) == new
+
+def test_apply_patch_rejects_bad_ranges():
+    with pytest.raises(ValueError):
+        apply_patch("abc", [{"start": 2, "end": 5, "text": ""}])
+    with pytest.raises(ValueError):
+        apply_patch("abcdef", [{"start": 0, "end": 3, "text": ""}, {"start": 2, "end": 4, "text": ""}])
+
+def test_chain_layout():
+    assert [snapshot_version(v, 3) for v in range(1, 8)] == [1, 1, 1, 4, 4, 4, 7]
+    assert reconstruct("a", [[{"start": 1, "end": 1, "text": "b"}], [{"start": 0, "end": 1, "text": ""}]]) == "b"
+
+@pytest.mark.parametrize("storage_format", ["split", "single"])
+@pytest.mark.asyncio
+async def test_every_version_is_recoverable(make_service, bucket, storage_format):
+    service = make_service(storage_format, snapshot_interval=INTERVAL)
+    texts = [f"# Note\n\nrevision {i}" for i in range(1, 8)]
+    await service.create_note(file_id="n1", title="Note", content=texts[0])
+    for text in texts[1:]:
+        await service.update_note("n1", content=text)
+
+    note = await service.get_note("n1")
+    assert note["version"] == 7
+    for version, text in enumerate(texts, start=1):
+        assert (await service.get_note_version("n1", version))["content"] == text
+
+    history = sorted(p for p in bucket.objects if p.startswith("history/n1/"))
+    assert [p.rsplit(".", 1)[1] for p in history] == ["snap", "delta", "delta", "snap", "delta", "delta", "snap"]
+
+@pytest.mark.asyncio
+async def test_patch_applies_against_current_version(make_service):
+    service = make_service(snapshot_interval=INTERVAL)
+    await service.create_note(file_id="n1", title="Note", content="hello world")
+
+    metadata = await service.patch_note("n1", base_version=1, ops=[{"start": 6, "end": 11, "text": "there"}])
+    assert metadata["version"] == 2
+    assert (await service.get_note("n1"))["content"] == "hello there"
+
+    with pytest.raises(VersionConflictError):
+        await service.patch_note("n1", base_version=1, ops=[])
+
+@pytest.mark.asyncio
+async def test_history_survives_a_snapshot_interval_change(make_service):
+    texts = [f"revision {i}" for i in range(1, 10)]
+    service = make_service(snapshot_interval=INTERVAL)
+    await service.create_note(file_id="n1", title="Note", content=texts[0])
+    for text in texts[1:5]:
+        await service.update_note("n1", content=text)
+
+    service = make_service(snapshot_interval=2)
+    for text in texts[5:]:
+        await service.update_note("n1", content=text)
+
+    for version, text in enumerate(texts, start=1):
+        assert (await service.get_note_version("n1", version))["content"] == text
+
+@pytest.mark.asyncio
+async def test_patch_from_a_stale_worker_cache_conflicts(make_service):
+    worker_a, worker_b = make_service(), make_service()
+    await worker_a.create_note(file_id="n1", title="Note", content="hello world")
+    await worker_a.get_note("n1")  # Cached at version 1
+
+    await worker_b.patch_note("n1", base_version=1, ops=[{"start": 0, "end": 5, "text": "bye"}])
+
+    with pytest.raises(VersionConflictError):
+        await worker_a.patch_note("n1", base_version=1, ops=[{"start": 6, "end": 11, "text": "there"}])
+    assert (await worker_b.get_note("n1"))["content"] == "bye world"
+
+@pytest.mark.asyncio
+async def test_concurrent_writers_cannot_take_the_same_version(make_service):
+    worker_a, worker_b = make_service(snapshot_interval=INTERVAL), make_service(snapshot_interval=INTERVAL)
+    await worker_a.create_note(file_id="n1", title="Note", content="one")
+    stale = await worker_a._read_current("n1")
+    await worker_b.update_note("n1", content="two")
+
+    # Worker A read version 1 just before worker B wrote version 2
+    with pytest.raises(VersionConflictError):
+        await worker_a._write_update("n1", "three", None, current=stale)
+    # update_note re-reads and writes on top instead
+    await worker_a.update_note("n1", content="three")
+
+    assert [(await worker_a.get_note_version("n1", v))["content"] for v in (1, 2, 3)] == ["one", "two", "three"]
+
+@pytest.mark.asyncio
+async def test_title_only_update_keeps_version(make_service):
+    service = make_service(snapshot_interval=INTERVAL)
+    await service.create_note(file_id="n1", title="Old", content="# Body")
+
+    metadata = await service.update_note("n1", title="New")
+
+    assert metadata["version"] == 1
+
+@pytest.mark.asyncio
+async def test_notes_from_before_versioning_index_as_version_zero(make_service, bucket, fake_supabase):
+    # Written before version tracking: no "version" in the metadata
+    bucket.upload("n1.md", b"# Old")
+    bucket.upload("n1.meta.json", b'{"file_id": "n1", "title": "Old", "storage_path": "n1.md", "updated_at": "2025-01-01T00:00:00"}')
+    service = make_service()
+
+    assert await service.rebuild_index() == 1
+
+    assert fake_supabase.tables["notes"].rows[0]["version"] == 0
+
+@pytest.mark.asyncio
+async def test_delete_removes_history(make_service, bucket):
+    service = make_service(snapshot_interval=INTERVAL)
+    await service.create_note(file_id="n1", title="Note", content="one")
+    await service.update_note("n1", content="two")
+
+    await service.delete_note("n1")
+
+    assert bucket.objects == {}
+
+def test_patch_and_version_endpoints(make_service):
+    service = make_service(snapshot_interval=INTERVAL)
+    with patch("app.api.note.note_service", service):
+        client.post("/api/notes", json={"file_id": "n1", "title": "Note", "content": "hello world"})
+        patched = client.patch("/api/notes/n1", json={"base_version": 1, "ops": [{"start": 0, "end": 5, "text": "bye"}]})
+        conflict = client.patch("/api/notes/n1", json={"base_version": 1, "ops": []})
+        invalid = client.patch("/api/notes/n1", json={"base_version": 2, "ops": [{"start": 50, "end": 60}]})
+        first = client.get("/api/notes/n1/versions/1")
+        missing = client.get("/api/notes/n1/versions/9")
+
+    assert patched.status_code == 200
+    assert patched.json()["version_id"] == "2"
+    assert conflict.status_code == 409
+    assert invalid.status_code == 422
+    assert first.json()["content"] == "hello world"
+    assert missing.status_code == 404
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.note import NoteService
+from app.services.note_search import NoteSearchIndex, to_match_query
+from app.tests.fakes import FakeSupabase
+
+client = TestClient(app)
+
+# --- Helpers ---
+@pytest.fixture
+def service():
+    return NoteService(client=FakeSupabase(), search=NoteSearchIndex(":memory:"))
+
+async def seed(service):
+    await service.create_note(file_id="nn", title="Neural Networks", content="Weights are learned with gradient descent and backpropagation.")
+    await service.create_note(file_id="tf", title="Transformers", content="Attention layers replace recurrence. Training still uses descent on the gradient.")
+    await service.create_note(file_id="db", title="Databases", content="B-trees and write-ahead logs.")
+
+def ids(results):
+    return [r["file_id"] for r in results]
+
+# --- Tests ---
+def test_query_translation_quotes_every_term():
+    assert to_match_query('neural "gradient descent" back* title:attention') == \
+        '"neural" AND "gradient descent" AND "back"* AND title:"attention"'
+    assert to_match_query('AND OR NEAR(') == '"AND" AND "OR" AND "NEAR"'
+    with pytest.raises(ValueError):
+        to_match_query('"" ***')
+
+@pytest.mark.asyncio
+async def test_phrase_prefix_and_title_queries(service):
+    await seed(service)
+
+    phrase, total = await service.search_notes('"gradient descent"')
+    assert ids(phrase) == ["nn"] and total == 1
+
+    words, _ = await service.search_notes("gradient descent")
+    assert sorted(ids(words)) == ["nn", "tf"]
+
+    prefix, _ = await service.search_notes("backprop*")
+    assert ids(prefix) == ["nn"]
+    assert "<mark>backpropagation</mark>" in prefix[0]["snippet"]
+
+    title, _ = await service.search_notes("title:transformers")
+    assert ids(title) == ["tf"]
+    assert title[0]["title"] == "<mark>Transformers</mark>"
+
+@pytest.mark.asyncio
+async def test_index_follows_updates_and_deletes(service):
+    await seed(service)
+
+    await service.update_note("db", content="Now about gradient boosting.")
+    await service.update_note("tf", title="Attention Is All You Need")
+    await service.delete_note("nn")
+
+    assert sorted(ids((await service.search_notes("gradient"))[0])) == ["db", "tf"]
+    assert ids((await service.search_notes("trees"))[0]) == []
+    assert ids((await service.search_notes("title:attention"))[0]) == ["tf"]
+
+    await service.batch_delete(["db", "tf"])
+    assert service.search.count() == 0
+
+@pytest.mark.asyncio
+async def test_rebuild_search_reindexes_existing_notes(service):
+    await seed(service)
+    service.search.clear()
+
+    assert await service.rebuild_search(page_size=2) == 3
+    assert ids((await service.search_notes("b-trees"))[0]) == ["db"]
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_notes_written_by_other_workers():
+    shared = FakeSupabase()
+    writer = NoteService(client=shared, search=NoteSearchIndex(":memory:"))
+    reader = NoteService(client=shared, search=NoteSearchIndex(":memory:"))
+    await seed(writer)
+    await reader.create_note(file_id="own", title="Own", content="Written here")
+
+    assert await reader.sync_search() == {"indexed": 3, "removed": 0}
+    assert ids((await reader.search_notes("gradient"))[0]) == ["nn", "tf"]
+    assert await reader.sync_search() == {"indexed": 0, "removed": 0}  # Nothing changed
+
+    await writer.update_note("db", content="Now about LSM trees")
+    await writer.delete_note("tf")
+    assert await reader.sync_search() == {"indexed": 1, "removed": 1}
+    assert ids((await reader.search_notes("LSM"))[0]) == ["db"]
+    assert ids((await reader.search_notes("attention"))[0]) == []
+
+def test_search_endpoint(service):
+    asyncio.run(seed(service))
+
+    with patch("app.api.search.note_service", service):
+        response = client.get("/api/search", params={"q": "descent", "limit": 1})
+        empty = client.get("/api/search", params={"q": "***"})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["total"] == 2
+    assert len(body["results"]) == 1
+    assert empty.status_code == 400
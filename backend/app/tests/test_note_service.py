@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.note import NoteService
+
+client = TestClient(app)
+
+# --- Helpers ---
+async def create_notes(service, count):
+    for i in range(count):
+        await service.create_note(file_id=f"note-{i:03d}", title=f"Note {i}", content=f"# Note {i}")
+
+# --- Tests ---
+@pytest.mark.asyncio
+async def test_create_update_delete_keep_index_in_sync(service, fake_supabase):
+    await service.create_note(file_id="n1", title="First", content="# Hello")
+    index = fake_supabase.tables["notes"]
+    assert index.rows[0]["title"] == "First"
+
+    await service.update_note("n1", title="Renamed")
+    assert index.rows[0]["title"] == "Renamed"
+
+    await service.delete_note("n1")
+    assert index.rows == []
+
+@pytest.mark.asyncio
+async def test_list_notes_paginates_with_one_query_per_page(service, fake_supabase):
+    await create_notes(service, 5)
+    bucket = fake_supabase.storage.from_(NoteService.BUCKET_NAME)
+    downloads_before = bucket.calls.count("download")
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        notes, cursor = await service.list_notes(limit=2, cursor=cursor)
+        seen.extend(n["file_id"] for n in notes)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert sorted(seen) == [f"note-{i:03d}" for i in range(5)]
+    assert len(set(seen)) == 5
+    # Listing never touches storage
+    assert bucket.calls.count("download") == downloads_before
+
+@pytest.mark.asyncio
+async def test_list_notes_sorted_by_updated_at(service):
+    await create_notes(service, 3)
+    await service.update_note("note-000", title="Touched")
+
+    newest_first, _ = await service.list_notes(limit=10)
+    oldest_first, _ = await service.list_notes(limit=10, descending=False)
+
+    assert newest_first[0]["file_id"] == "note-000"
+    assert oldest_first[-1]["file_id"] == "note-000"
+
+@pytest.mark.asyncio
+async def test_rebuild_index_backfills_from_bucket(service, fake_supabase):
+    await create_notes(service, 3)
+    fake_supabase.tables["notes"].rows.clear()
+
+    assert await service.rebuild_index(page_size=2) == 3
+    notes, _ = await service.list_notes(limit=10)
+    assert len(notes) == 3
+
+def test_list_endpoint_returns_next_cursor_header(service):
+    asyncio.run(create_notes(service, 3))
+
+    with patch("app.api.note.note_service", service):
+        first = client.get("/api/notes", params={"limit": 2})
+        second = client.get("/api/notes", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+        invalid = client.get("/api/notes", params={"cursor": "not-a-cursor"})
+
+    assert first.status_code == 200
+    assert len(first.json()) == 2
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+    assert invalid.status_code == 400
+
+@pytest.mark.asyncio
+async def test_storage_calls_do_not_block_event_loop(service, fake_supabase):
+    await service.create_note(file_id="slow", title="Slow", content="# Slow")
+    bucket = fake_supabase.storage.from_(NoteService.BUCKET_NAME)
+    download = bucket.download
+
+    in_flight, peak = 0, 0
+    overlapping = threading.Condition()
+
+    def slow_download(*args, **kwargs):
+        nonlocal in_flight, peak
+        with overlapping:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            overlapping.notify_all()
+            # Hold until a second download is in flight (or give up after 1 s)
+            overlapping.wait_for(lambda: peak >= 2, timeout=1)
+        time.sleep(0.1)  # Blocking network call
+        with overlapping:
+            in_flight -= 1
+        return download(*args, **kwargs)
+
+    bucket.download = slow_download
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    note = await service.get_note("slow")
+    task.cancel()
+
+    assert note["content"] == "# Slow"
+    # Content and metadata downloads overlap instead of running back to back
+    assert peak == 2
+    # The loop kept serving other work while storage was busy
+    assert ticks >= 5
@@ -0,0 +1,139 @@
+import os
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import note_storage
+from app.services.note import NoteService
+from app.services.note_index import SQLiteNoteIndex
+from app.services.note_storage import LocalStorage
+
+client = TestClient(app)
+
+# --- Helpers ---
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "objects"), mmap_threshold=1024, fsync=False)
+
+def files_under(root):
+    return [os.path.join(d, f) for d, _, fs in os.walk(root) for f in fs]
+
+# --- Tests ---
+def test_create_only_upload_is_exclusive(storage):
+    storage.upload("n1.md", b"first", "text/markdown")
+
+    with pytest.raises(FileExistsError):
+        storage.upload("n1.md", b"second", "text/markdown")
+    storage.upload("n1.md", b"third", "text/markdown", upsert=True)
+
+    assert storage.download("n1.md") == b"third"
+    # No temp files left behind
+    assert not [f for f in files_under(storage.root) if ".tmp-" in f]
+
+def test_objects_of_a_note_share_a_shard(storage):
+    for key in ("n1.md", "n1.meta.json", "history/n1/00000001.snap"):
+        storage.upload(key, b"x", "text/plain")
+
+    shards = {tuple(os.path.relpath(f, storage.root).split(os.sep)[:2]) for f in files_under(storage.root)}
+    assert len(shards) == 1
+    assert storage.list("") == ["n1.md", "n1.meta.json"]
+    assert storage.list("history/n1") == ["00000001.snap"]
+
+def test_ids_with_dots_share_a_shard(storage):
+    for key in ("v1.2.md", "v1.2.meta.json", "v1.2.note", "history/v1.2/00000001.snap"):
+        storage.upload(key, b"x", "text/plain")
+
+    shards = {tuple(os.path.relpath(f, storage.root).split(os.sep)[:2]) for f in files_under(storage.root)}
+    assert len(shards) == 1
+
+def test_objects_sharded_by_first_dot_are_still_found(storage):
+    # Where "v1.2.md" was placed when the owner was the name up to its first dot
+    legacy = os.path.join(storage._shard("v1"), "v1.2.md")
+    os.makedirs(os.path.dirname(legacy))
+    with open(legacy, "wb") as f:
+        f.write(b"old")
+
+    assert storage.download("v1.2.md") == b"old"
+    with pytest.raises(FileExistsError):
+        storage.upload("v1.2.md", b"new", "text/markdown")
+    storage.update("v1.2.md", b"updated", "text/markdown")
+    assert storage.download("v1.2.md") == b"updated"
+    assert storage.remove(["v1.2.md"]) == ["v1.2.md"]
+    assert files_under(storage.root) == []
+
+def test_paged_top_level_listing_walks_the_shards_once(storage):
+    for i in range(5):
+        storage.upload(f"n{i}.md", b"x", "text/markdown")
+
+    with patch("app.services.note_storage._scandir", wraps=note_storage._scandir) as scandir:
+        pages = [storage.list("", limit=2)]
+        walk = scandir.call_count
+        pages += [storage.list("", limit=2, offset=offset) for offset in (2, 4)]
+
+    assert sum(pages, []) == [f"n{i}.md" for i in range(5)]
+    assert scandir.call_count == walk  # Later pages slice the first page's listing
+
+def test_invalid_keys_are_rejected_with_400(tmp_path):
+    env = {"NOTE_STORAGE_BACKEND": "local", "NOTE_LOCAL_ROOT": str(tmp_path), "NOTE_LOCAL_FSYNC": "false"}
+    with patch.dict("os.environ", env):
+        service = NoteService()
+
+    with patch("app.api.note.note_service", service):
+        created = client.post("/api/notes", json={"file_id": "..", "title": "T", "content": "x"})
+        batch = client.post("/api/notes/batch", json={"notes": [{"file_id": "..", "title": "T", "content": "x"}]})
+
+    assert created.status_code == 400
+    assert batch.json()["results"][0]["status"] == 400
+
+def test_large_objects_are_memory_mapped(storage):
+    storage.upload("big.md", b"a" * 4096, "text/markdown")
+
+    data = storage.download("big.md")
+
+    assert isinstance(data, memoryview)
+    assert str(data, "utf-8") == "a" * 4096
+
+def test_remove_reports_existing_paths_and_prunes(storage):
+    storage.upload("history/n1/00000001.snap", b"x", "text/markdown")
+
+    assert storage.remove(["history/n1/00000001.snap", "missing.md"]) == ["history/n1/00000001.snap"]
+    assert files_under(storage.root) == []
+    with pytest.raises(FileNotFoundError):
+        storage.download("history/n1/00000001.snap")
+
+def test_sqlite_index_keyset_pages():
+    index = SQLiteNoteIndex(":memory:")
+    for i in range(5):
+        index.upsert({"file_id": f"n{i}", "title": "T", "url": None, "storage_path": f"n{i}.md",
+                      "created_at": "2025-01-01", "updated_at": "2025-01-01", "size_bytes": 1, "stored_bytes": 1, "version": 1})
+
+    first = index.page(2, None, descending=True)
+    second = index.page(2, (first[-1]["updated_at"], first[-1]["file_id"]), descending=True)
+
+    assert [r["file_id"] for r in first + second] == ["n4", "n3", "n2", "n1"]
+
+@pytest.mark.parametrize("storage_format", ["split", "single"])
+@pytest.mark.asyncio
+async def test_service_runs_without_supabase(tmp_path, storage_format):
+    env = {"NOTE_STORAGE_BACKEND": "local", "NOTE_LOCAL_ROOT": str(tmp_path),
+           "NOTE_LOCAL_FSYNC": "false", "NOTE_STORAGE_FORMAT": storage_format}
+    with patch.dict("os.environ", env):
+        service = NoteService()
+
+    await service.create_note(file_id="n1", title="First", content="# Hello")
+    with pytest.raises(ValueError):
+        await service.create_note(file_id="n1", title="Again", content="# Hello")
+    await service.update_note("n1", content="# Hello, world")
+
+    service.cache.clear()
+    assert (await service.get_note("n1"))["content"] == "# Hello, world"
+    assert (await service.get_note_version("n1", 1))["content"] == "# Hello"
+    notes, _ = await service.list_notes()
+    assert [n["file_id"] for n in notes] == ["n1"]
+
+    service.index.delete(["n1"])
+    assert await service.rebuild_index() == 1
+
+    await service.delete_note("n1")
+    assert (await service.list_notes())[0] == []
+    assert files_under(tmp_path / "notes") == []
@@ -0,0 +1,127 @@
+import pytest
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api.ingestion import IngestionService
+from app.db import partitions
+from app.services import retrieval
+from app.services.retrieval import ChunkRetriever
+from app.tests.fakes import FakeSupabase
+
+client = TestClient(app)
+
+# --- Helpers ---
+def neo4j_with(run):
+    session = MagicMock()
+    session.run.side_effect = run
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value = session
+    return driver, session
+
+def result(rows, single=None):
+    records = MagicMock()
+    records.__iter__.return_value = iter(rows)
+    records.single.return_value = single
+    return records
+
+def retriever(run):
+    driver, session = neo4j_with(run)
+    embeddings = MagicMock()
+    embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+    return ChunkRetriever(neo4j_driver=driver, embeddings=embeddings), session
+
+# --- Tests ---
+def test_shard_is_stable_and_in_range():
+    shards = {partitions.shard_for(f"user-{i}") for i in range(200)}
+
+    assert partitions.shard_for("alice") == partitions.shard_for("alice")
+    assert shards <= set(range(partitions.CHUNK_SHARDS))
+    assert len(shards) > 1
+
+@pytest.mark.asyncio
+async def test_ingested_chunks_carry_owner_and_shard_label():
+    driver, session = neo4j_with(lambda *a, **kw: MagicMock())
+    embeddings = MagicMock()
+    embeddings.aembed_documents = AsyncMock(return_value=[[0.1] * 3])
+    llm = MagicMock()
+    llm.invoke.return_value.content = ""
+    service = IngestionService(supabase=MagicMock(), neo4j_driver=driver, embeddings=embeddings, llm=llm)
+
+    await service.process_file("alice", UploadFile(filename="a.md", file=BytesIO(b"# Title\nBody")))
+
+    rows = session.run.call_args_list[0].kwargs["chunks"]
+    assert {row["shard_label"] for row in rows} == {partitions.shard_label(partitions.shard_for("alice"))}
+    assert {row["user_id"] for row in rows} == {"alice"}
+
+@pytest.mark.asyncio
+async def test_small_corpus_is_scored_exactly_within_the_user():
+    def run(query, **params):
+        if query == retrieval.COUNT_QUERY:
+            return result([], {"chunks": 3})
+        return result([{"chunk_id": "c1", "file_id": "f1", "content": "x", "score": 0.9}])
+
+    r, session = retriever(run)
+    hits = await r.search("alice", "docker")
+
+    assert hits[0]["file_id"] == "f1"
+    queries = [c.args[0] for c in session.run.call_args_list]
+    assert queries == [retrieval.COUNT_QUERY, retrieval.EXACT_QUERY]
+    assert all(c.kwargs["user_id"] == "alice" for c in session.run.call_args_list)
+
+@pytest.mark.asyncio
+async def test_large_corpus_uses_the_users_shard_and_widens_candidates():
+    def run(query, **params):
+        if query == retrieval.COUNT_QUERY:
+            return result([], {"chunks": retrieval.EXACT_SCAN_MAX + 1})
+        # The owner filter leaves a single hit until the pool is widened
+        rows = [{"chunk_id": f"c{i}", "file_id": "f1", "content": "", "score": 1.0} for i in range(params["candidates"] // 10)]
+        return result(rows[:params["k"]])
+
+    r, session = retriever(run)
+    hits = await r.search("alice", "docker", k=5)
+
+    ann_calls = [c for c in session.run.call_args_list if c.args[0] == retrieval.ANN_QUERY]
+    assert len(hits) == 5
+    assert {c.kwargs["index"] for c in ann_calls} == {partitions.shard_index_name(partitions.shard_for("alice"))}
+    assert [c.kwargs["candidates"] for c in ann_calls] == [20, 40, 80]
+
+def test_backfill_groups_files_by_shard():
+    driver, session = neo4j_with(lambda query, **params: result([], {"updated": len(params["rows"])}))
+    owners = {f"file-{i}": f"user-{i}" for i in range(20)}
+
+    updated = partitions.backfill_owners(session, owners)
+
+    assert updated == 20
+    for call in session.run.call_args_list:
+        shards = {partitions.shard_for(row["user_id"]) for row in call.kwargs["rows"]}
+        assert len(shards) == 1
+        assert f"c:{partitions.shard_label(shards.pop())}" in call.args[0]
+
+def test_owners_are_read_page_by_page_past_the_response_cap():
+    supabase = FakeSupabase()
+    for i in range(2500):
+        supabase.table("files").insert({"id": f"file-{i:05d}", "user_id": None if i == 7 else f"user-{i % 3}"}).execute()
+
+    pages = list(partitions.load_owners(supabase, page_size=1000))
+
+    assert [len(page) for page in pages] == [999, 1000, 500]  # file-00007 has no owner
+    assert sum(len(page) for page in pages) == 2499
+    assert pages[2]["file-02499"] == "user-0"
+
+def test_chat_without_user_has_no_sources():
+    response = client.post("/api/chat/query", json={"query": "docker"})
+
+    assert response.status_code == 200
+    assert response.json()["sources"] == []
+
+def test_chat_sources_come_from_the_users_files():
+    hits = [{"file_id": "f2"}, {"file_id": "f1"}, {"file_id": "f2"}]
+    with patch("app.api.chat.ChunkRetriever") as mock_retriever:
+        mock_retriever.return_value.search = AsyncMock(return_value=hits)
+        response = client.post("/api/chat/query", json={"query": "docker", "user_id": "alice"})
+
+    assert response.status_code == 200
+    assert response.json()["sources"] == ["f2", "f1"]
+    assert mock_retriever.return_value.search.call_args.args[:2] == ("alice", "docker")
@@ -0,0 +1,155 @@
+import numpy as np
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.knn_store import KnnStore
+from app.services.recommendations import EXPORT_IDS_QUERY, EXPORT_QUERY, FILE_QUERY, RecommendationService
+
+client = TestClient(app)
+
+# --- Helpers ---
+def files(n, users=("a", "b"), seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "file_id": f"f{i}",
+        "user_id": users[i % len(users)],
+        "embeddings": rng.normal(size=(3, 16)).tolist(),
+        "concepts": [f"c{j}" for j in rng.choice(12, 3, replace=False)],
+    } for i in range(n)]
+
+def graph_driver(records):
+    """Neo4j driver stand-in answering the file, export-ids and export queries from `records`."""
+    pages = []
+
+    def run(query, **params):
+        if query == EXPORT_IDS_QUERY:
+            data = [{"id": r["file_id"]} for r in sorted(records, key=lambda r: r["file_id"]) if r["file_id"] > params["after"]][:params["limit"]]
+        elif query == EXPORT_QUERY:
+            pages.append(params["file_ids"])
+            data = [r for r in records if r["file_id"] in params["file_ids"]]
+        else:
+            data = [r for r in records if r["file_id"] == params["file_id"]]
+        return MagicMock(data=MagicMock(return_value=data))
+
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value.run.side_effect = run
+    return driver, pages
+
+def neighbor_sets(store, ids):
+    return {file_id: {other for other, _ in store.related(file_id)} for file_id in ids}
+
+# --- Tests ---
+def test_incremental_upserts_match_a_full_rebuild():
+    records = files(60)
+    incremental, full = KnnStore(k=5), KnnStore(k=5)
+
+    for r in records:
+        incremental.upsert(r["file_id"], r["user_id"], r["embeddings"], r["concepts"])
+    full.build(records)
+
+    ids = [r["file_id"] for r in records]
+    assert neighbor_sets(incremental, ids) == neighbor_sets(full, ids)
+
+def test_neighbours_never_cross_users_and_are_ranked():
+    store = KnnStore(k=5)
+    store.build(files(40))
+
+    related = store.related("f0")
+    assert len(related) == 5
+    assert all(int(file_id[1:]) % 2 == 0 for file_id, _ in related)  # Only user "a"
+    assert [score for _, score in related] == sorted((score for _, score in related), reverse=True)
+    assert store.related("missing") is None
+
+def test_files_without_owner_are_left_out():
+    records = files(6, users=("a", None))
+    store, incremental = KnnStore(k=5), KnnStore(k=5)
+
+    store.build(records)
+    assert store.size == 3
+    assert store.related("f1") is None
+    assert all(int(file_id[1:]) % 2 == 0 for file_id, _ in store.related("f0"))
+
+    assert incremental.upsert("f1", None, records[1]["embeddings"], records[1]["concepts"]) is False
+    assert incremental.upsert("f3", "", records[3]["embeddings"], records[3]["concepts"]) is False
+    assert incremental.size == 0
+
+def test_shared_concepts_raise_similarity():
+    store = KnnStore(k=2, concept_weight=0.5)
+    vector = [[1.0, 0.0]]
+    store.upsert("seed", "u", vector, ["docker", "k8s"])
+    store.upsert("same-topic", "u", vector, ["docker", "k8s"])
+    store.upsert("other-topic", "u", vector, ["poetry"])
+
+    assert store.related("seed")[0] == ("same-topic", 1.0)
+
+def test_store_round_trips_through_npz(tmp_path):
+    store = KnnStore(k=4)
+    store.build(files(30))
+    path = str(tmp_path / "knn.npz")
+
+    store.save(path)
+    loaded = KnnStore.load(path, k=4)
+    loaded.upsert("new", "a", files(1, seed=9)[0]["embeddings"], ["c1"])
+
+    assert loaded.related("f3") == store.related("f3")
+    assert loaded.size == 31
+    assert KnnStore.load(path, k=8).size == 0  # Built with another k: ignored
+
+def test_ingested_file_is_folded_in_from_neo4j():
+    record = files(1)[0]
+    session = MagicMock()
+    session.run.return_value.data.return_value = [record]
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value = session
+    service = RecommendationService(store=KnnStore(k=3))
+
+    assert service.update_file("f0", driver) is True
+    assert session.run.call_args.args[0] == FILE_QUERY
+    assert service.stats()["files"] == 1
+
+def test_recommendation_endpoints_read_the_store():
+    store = KnnStore(k=3)
+    store.build(files(12, users=("u1",)))
+    service = RecommendationService(store=store)
+
+    with patch("app.api.recommendations.get_recommendation_service", return_value=service):
+        page = client.get("/api/recommendations", params={"user_id": "u1", "seed": ["f0", "f1"], "limit": 4})
+        related = client.get("/api/recommendations/f0")
+        missing = client.get("/api/recommendations/nope")
+
+    ids = [r["file_id"] for r in page.json()["recommendations"]]
+    assert page.status_code == 200
+    assert 0 < len(ids) <= 4 and not {"f0", "f1"} & set(ids)
+    assert len(related.json()["related"]) == 3
+    assert missing.status_code == 404
+
+def test_rebuild_reads_the_graph_page_by_page(tmp_path):
+    driver, pages = graph_driver(files(10))
+    service = RecommendationService(path=str(tmp_path / "knn.npz"))
+
+    assert service.rebuild(driver, page_size=4) == 10
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert KnnStore.load(str(tmp_path / "knn.npz")).size == 10
+    assert [p.name for p in tmp_path.iterdir()] == ["knn.npz"]  # No temp file left behind
+
+def test_workers_reload_a_rebuilt_store_and_keep_later_ingests(tmp_path):
+    path = str(tmp_path / "knn.npz")
+    records = files(8) + [dict(files(1, seed=5)[0], file_id="late", user_id="a")]
+    driver, _ = graph_driver(records)
+    job, worker = RecommendationService(path=path), RecommendationService(path=path)
+
+    worker.update_file("late", driver)
+    assert not (tmp_path / "knn.npz").exists()  # Workers never write the file
+    job.rebuild(graph_driver(records[:8])[0])
+    job.store.built_at = 0.0  # As if the rebuild started reading before "late" was ingested
+    job.store.save(path)
+
+    assert worker.reload_if_changed() is True
+    assert worker.store.size == 9 and worker.store.related("late")
+    assert worker.reload_if_changed() is False
+
+    # A rebuild that started after the ingest already has the file
+    job.rebuild(graph_driver(records)[0])
+    worker.reload_if_changed()
+    assert worker.store.size == 9 and not worker._recent
@@ -0,0 +1,167 @@
+import asyncio
+import random
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from io import BytesIO
+from app.main import app
+from app.api.ingestion import IngestionService
+from app.services.governor import Governor, TokenBucket
+from app.services.resilience import CircuitBreaker, CircuitOpenError, Resilience
+
+client = TestClient(app)
+
+# --- Helpers ---
+def resilience(**kwargs):
+    options = dict(retries=3, backoff_base=0.001, backoff_cap=0.005, hedge=False, rng=random.Random(0))
+    options.update(kwargs)
+    return Resilience("embed", **options)
+
+def flaky(failures, result="ok", delay=0.0):
+    """Async callable that raises for the first `failures` calls."""
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if delay:
+            await asyncio.sleep(delay)
+        if len(calls) <= failures:
+            raise ConnectionError("503 from provider")
+        return result
+    return fn, calls
+
+# --- Tests ---
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried_with_jitter():
+    r = resilience()
+    fn, calls = flaky(2)
+
+    assert await r.call(fn) == "ok"
+    assert len(calls) == 3
+    assert r.stats()["retried"] == 2
+    assert all(0 <= r.backoff(attempt) <= 0.005 for attempt in range(10))
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_backup_wins():
+    r = resilience(hedge=True, hedge_min_delay=0.01, hedge_budget=1.0)
+    delays = iter([1.0, 0.0])
+
+    async def fn():
+        await asyncio.sleep(next(delays))
+        return "fast"
+
+    assert await asyncio.wait_for(r.call(fn), timeout=0.5) == "fast"
+    assert r.stats()["hedged"] == 1
+    assert r.stats()["hedge_wins"] == 1
+
+@pytest.mark.asyncio
+async def test_time_queued_in_the_governor_is_not_hedged_or_timed():
+    r = resilience(hedge=True, hedge_min_delay=0.01, hedge_budget=1.0)
+    governor = Governor({"embed": TokenBucket(rate=10, capacity=1)})
+    await governor.acquire("embed")  # Drain the bucket: the next admission queues ~0.1 s
+    fn, calls = flaky(0)
+
+    assert await r.call(fn, admit=lambda: governor.acquire("embed")) == "ok"
+    assert len(calls) == 1
+    assert r.stats()["hedged"] == 0
+    assert governor.stats()["embed"]["admitted"] == 2
+    assert max(r.latency.samples) < 0.01
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_closes_after_probe():
+    breaker = CircuitBreaker("embed", failure_threshold=2, reset_timeout=0.05)
+    r = resilience(retries=0, breaker=breaker)
+    fn, calls = flaky(2)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await r.call(fn)
+    with pytest.raises(CircuitOpenError):
+        await r.call(fn)
+    assert len(calls) == 2  # Open circuit never reached the provider
+
+    await asyncio.sleep(0.06)
+    assert await r.call(fn) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.trips == 1
+
+@pytest.mark.asyncio
+async def test_probe_queued_in_the_governor_does_not_hold_the_circuit():
+    breaker = CircuitBreaker("embed", failure_threshold=1, reset_timeout=0.01)
+    r = resilience(retries=0, breaker=breaker)
+    with pytest.raises(ConnectionError):
+        await r.call(flaky(1)[0])
+    await asyncio.sleep(0.02)  # Half-open: the next call may probe
+    queued = asyncio.Event()
+
+    async def slow_admit():
+        await queued.wait()
+
+    waiting = asyncio.create_task(r.call(flaky(0)[0], admit=slow_admit))
+    await asyncio.sleep(0)
+    # The first caller is still queued for admission; this one probes and closes the circuit
+    assert await r.call(flaky(0)[0], admit=AsyncMock()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    queued.set()
+    assert await waiting == "ok"
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried_or_counted_against_the_provider():
+    class BadRequest(Exception):
+        status_code = 400
+
+    breaker = CircuitBreaker("embed", failure_threshold=2)
+    r = resilience(breaker=breaker)
+    for error in (BadRequest("invalid argument"), ValueError("empty input")):
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            raise error
+
+        with pytest.raises(type(error)):
+            await r.call(fn)
+        assert len(calls) == 1
+    assert breaker.failures == 0 and breaker.state == CircuitBreaker.CLOSED
+    assert r.stats()["retried"] == 0
+
+@pytest.mark.asyncio
+async def test_ingestion_retries_only_the_failed_batch():
+    batches = []
+
+    async def embed(texts):
+        batches.append(list(texts))
+        if len(batches) == 2:
+            raise ConnectionError("503 from provider")
+        return [[0.1] * 3 for _ in texts]
+
+    embeddings = MagicMock()
+    embeddings.aembed_documents = AsyncMock(side_effect=embed)
+    llm = MagicMock()
+    llm.invoke.return_value.content = ""
+    service = IngestionService(supabase=MagicMock(), neo4j_driver=MagicMock(), embeddings=embeddings, llm=llm)
+
+    content = "\n".join(f"# Section {i}\nBody {i}" for i in range(3))
+    file = UploadFile(filename="notes.md", file=BytesIO(content.encode("utf-8")))
+    with patch("app.api.ingestion.EMBED_BATCH_SIZE", 1), patch("app.api.ingestion.EMBED_CONCURRENCY", 1), \
+         patch("app.api.ingestion.get_resilience", return_value=resilience()):
+        result = await service.process_file("u1", file)
+
+    assert result["status"] == "indexed"
+    assert result["chunk_count"] == 3
+    assert len(batches) == 4  # Three batches plus one retry of the failed one
+    assert batches[1] == batches[2]
+
+def test_open_circuit_returns_503_with_retry_after():
+    down = MagicMock()
+    down.check.side_effect = CircuitOpenError("embed", 12.5)
+
+    with patch("app.api.ingestion.get_supabase"), patch("app.api.ingestion.get_neo4j"), \
+         patch("app.api.ingestion.get_governor", return_value=down):
+        response = client.post("/api/ingestion/upload", data={"user_id": "u1"},
+                               files={"file": ("a.md", b"# Title\nBody", "text/markdown")})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "13"
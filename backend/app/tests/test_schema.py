@@ -0,0 +1,115 @@
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from app.db import schema
+from app.db.partitions import shard_index_names
+from app.main import app
+
+client = TestClient(app)
+
+# --- Helpers ---
+def healthy_index_rows():
+    rows = [
+        {"name": name, "type": "RANGE", "state": "ONLINE", "populationPercent": 100.0, "options": {}}
+        for name in schema.EXPECTED_INDEXES
+    ]
+    for row in rows:
+        if row["name"] in shard_index_names():
+            row.update({
+                "type": "VECTOR",
+                "options": {"indexConfig": {"vector.dimensions": schema.EMBEDDING_DIMENSIONS}},
+            })
+    return rows
+
+def mock_session(applied_versions, index_rows):
+    session = MagicMock()
+
+    def run(query, **params):
+        if query.startswith("MATCH (m:SchemaMigration)"):
+            return [{"version": v} for v in applied_versions]
+        if query.startswith("SHOW INDEXES"):
+            return index_rows
+        return MagicMock()
+
+    session.run.side_effect = run
+    return session
+
+# --- Tests ---
+def test_apply_migrations_skips_applied_versions():
+    session = mock_session([1], [])
+
+    applied = schema.apply_migrations(session)
+
+    assert applied == [2, 3, 4]
+    queries = [c.args[0] for c in session.run.call_args_list]
+    assert not any("file_id_unique" in q for q in queries)
+    assert any("CREATE VECTOR INDEX" in q for q in queries)
+
+def test_partition_migration_creates_one_vector_index_per_shard():
+    session = mock_session([1, 2, 3], [])
+
+    schema.apply_migrations(session)
+
+    queries = [c.args[0] for c in session.run.call_args_list]
+    shard_indexes = [q for q in queries if "CREATE VECTOR INDEX chunk_embedding_s" in q]
+    assert len(shard_indexes) == len(shard_index_names())
+    assert "FOR (c:ChunkShard00)" in shard_indexes[0]
+    assert any("chunk_user_id" in q for q in queries)
+    assert any(q.startswith("DROP INDEX chunk_embedding ") for q in queries)
+
+def test_verify_schema_reports_missing_and_wrong_dimension():
+    rows = healthy_index_rows()
+    status = schema.index_status(mock_session([], rows))
+    assert schema.verify_schema(status) == []
+
+    rows = [r for r in rows if r["name"] != "chunk_id_unique"]
+    rows[-1]["options"] = {"indexConfig": {"vector.dimensions": 1536}}
+    problems = schema.verify_schema(schema.index_status(mock_session([], rows)))
+
+    assert any("chunk_id_unique" in p for p in problems)
+    assert any("1536" in p for p in problems)
+
+def test_bootstrap_schema_never_raises():
+    driver = MagicMock()
+    driver.session.side_effect = RuntimeError("neo4j unreachable")
+
+    report = schema.bootstrap_schema(driver)
+
+    assert report["schema_version"] is None
+    assert "neo4j unreachable" in report["problems"][0]
+
+@patch("app.db.schema.get_neo4j")
+def test_health_reports_index_population(mock_neo4j):
+    session = mock_session([1, 2, 3, 4], healthy_index_rows())
+    mock_neo4j.return_value.session.return_value.__enter__.return_value = session
+
+    response = client.get("/health", params={"deep": "true"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["neo4j"]["indexes"]["chunk_embedding_s00"]["population_percent"] == 100.0
+    assert data["neo4j"]["problems"] == []
+
+@patch("app.db.schema.get_neo4j")
+def test_health_serves_cached_index_status(mock_neo4j):
+    session = mock_session([1, 2, 3, 4], healthy_index_rows())
+    mock_neo4j.return_value.session.return_value.__enter__.return_value = session
+    schema.bootstrap_schema()
+    checked_at = schema.last_status["checked_at"]
+    session.run.reset_mock()
+
+    cached = client.get("/health").json()
+    queries_for_cached = session.run.call_count
+    client.get("/health", params={"deep": "true"})
+
+    assert cached["neo4j"]["problems"] == []
+    assert cached["neo4j"]["checked_at"] == checked_at
+    assert queries_for_cached == 0
+    assert any(c.args[0].startswith("SHOW INDEXES") for c in session.run.call_args_list)
+
+def test_health_is_degraded_when_the_last_check_failed():
+    with patch.object(schema, "last_status", {"error": "neo4j unreachable", "checked_at": "t"}):
+        response = client.get("/health")
+
+    assert response.json()["status"] == "degraded"
+    assert response.json()["neo4j"]["error"] == "neo4j unreachable"
@@ -0,0 +1,166 @@
+import json
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from app.db.partitions import shard_for, shard_label
+from app.db.schema import EMBEDDING_DIMENSIONS
+from app.services import snapshot
+from app.services.note import NoteService
+from app.services.snapshot import CHUNKS_QUERY, FILE_IDS_QUERY, MENTIONS_QUERY, WRITE_QUERY
+from app.tests.fakes import FakeSupabase
+
+FORMATS = ["npz", pytest.param("parquet", marks=pytest.mark.skipif(snapshot.pa is None, reason="needs pyarrow"))]
+
+# --- Helpers ---
+def source_graph(files=3, chunks_per_file=4, seed=0):
+    rng = np.random.default_rng(seed)
+    chunks = [{
+        "id": f"c{f}-{i}",
+        "file_id": f"f{f}",
+        "chunk_index": i,
+        "content": f"chunk {i} of file {f} — ünïcode",
+        "metadata": None if i == 0 else "{'page': %d}" % i,
+        "embedding": rng.normal(size=EMBEDDING_DIMENSIONS).astype(np.float32).tolist(),
+    } for f in range(files) for i in range(chunks_per_file)]
+    mentions = [{"file_id": f"f{f}", "concept": name} for f in range(files) for name in ("docker", f"topic{f}")]
+    return [f"f{f}" for f in range(files)], chunks, mentions
+
+def reading_driver(file_ids, chunks, mentions):
+    def run(query, **params):
+        if query == FILE_IDS_QUERY:
+            data = [{"id": file_id} for file_id in file_ids]
+        elif query == CHUNKS_QUERY:
+            data = [c for c in chunks if c["file_id"] in params["file_ids"]]
+        elif query == MENTIONS_QUERY:
+            data = [m for m in mentions if m["file_id"] in params["file_ids"]]
+        return MagicMock(data=MagicMock(return_value=data))
+
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value.run.side_effect = run
+    return driver
+
+def writing_driver():
+    driver = MagicMock()
+    session = driver.session.return_value.__enter__.return_value
+    return driver, session
+
+async def source_supabase(file_ids):
+    supabase = FakeSupabase()
+    for file_id in file_ids:
+        supabase.table("files").insert({
+            "id": file_id, "user_id": "alice", "file_name": f"{file_id}.md", "file_path": f"alice/{file_id}.md",
+            "file_type": "md", "file_size": None, "status": "indexed", "created_at": "2026-01-01T00:00:00+00:00",
+        }).execute()
+    notes = NoteService(client=supabase)
+    await notes.create_note("f0", "Note", "Kubernetes rollout notes — ünïcode")
+    await notes.update_note("f0", content="Kubernetes rollout checklist — ünïcode")
+    supabase.table("files").insert({"id": "other", "user_id": "bob", "file_name": "x", "file_path": "x", "file_type": "md"}).execute()
+    return supabase, notes
+
+def written(session, key):
+    return [row for call in session.run.call_args_list for row in call.kwargs[key]]
+
+# --- Tests ---
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", FORMATS)
+async def test_snapshot_round_trips_in_batched_parts(tmp_path, fmt):
+    file_ids, chunks, mentions = source_graph()
+    source, source_notes = await source_supabase(file_ids)
+    manifest = await snapshot.export_user(
+        "alice", str(tmp_path), driver=reading_driver(file_ids, chunks, mentions),
+        supabase=source, notes=source_notes, fmt=fmt, batch_rows=5,
+    )
+
+    assert manifest["rows"] == {"files": 3, "chunks": 12, "mentions": 6, "notes": 1}
+    assert manifest["embedding_dimensions"] == EMBEDDING_DIMENSIONS
+    assert len(list(tmp_path.glob(f"chunks-*.{fmt}"))) == 3  # 5 + 5 + 2 rows
+    assert json.loads((tmp_path / "manifest.json").read_text())["format"] == fmt
+
+    driver, session = writing_driver()
+    target = FakeSupabase()
+    restored = await snapshot.restore_snapshot(str(tmp_path), driver=driver, supabase=target, notes=NoteService(client=target))
+
+    assert restored == manifest["rows"]
+    assert all(call.args[0] == WRITE_QUERY for call in session.run.call_args_list)
+    assert session.run.call_count == 3 + 2  # One transaction per part
+    rows = written(session, "chunks")
+    assert [r["chunk_id"] for r in rows] == [c["id"] for c in chunks]
+    assert {r["shard_label"] for r in rows} == {shard_label(shard_for("alice"))}
+    assert [r["metadata"] for r in rows] == [c["metadata"] for c in chunks]
+    assert rows[5]["content"] == chunks[5]["content"]
+    np.testing.assert_array_equal(np.array([r["embedding"] for r in rows], dtype=np.float32), [c["embedding"] for c in chunks])
+    assert sorted((r["file_id"], r["name"]) for r in written(session, "concepts")) == sorted((m["file_id"], m["concept"]) for m in mentions)
+
+    assert {r["id"] for r in target.tables["files"].rows} == set(file_ids)
+    assert target.tables["files"].rows[0]["file_size"] is None
+    # The latest body is carried; history restarts
+    assert target.tables["notes"].rows[0]["version"] == 1
+
+@pytest.mark.asyncio
+async def test_restore_over_the_same_account_updates_existing_notes(tmp_path):
+    file_ids, chunks, mentions = source_graph(files=1)
+    source, source_notes = await source_supabase(file_ids)
+    await snapshot.export_user("alice", str(tmp_path), driver=reading_driver(file_ids, chunks, mentions), supabase=source, notes=source_notes, fmt="npz")
+    await source_notes.update_note("f0", content="edited after the snapshot")
+
+    driver, _ = writing_driver()
+    restored = await snapshot.restore_snapshot(str(tmp_path), driver=driver, supabase=source, notes=source_notes)
+
+    assert restored["notes"] == 1
+    assert (await source_notes.get_note("f0"))["content"] == "Kubernetes rollout checklist — ünïcode"
+
+@pytest.mark.asyncio
+async def test_restore_as_another_user_gets_fresh_ids(tmp_path):
+    file_ids, chunks, mentions = source_graph(files=2)
+    source, source_notes = await source_supabase(file_ids)
+    await snapshot.export_user("alice", str(tmp_path), driver=reading_driver(file_ids, chunks, mentions), supabase=source, notes=source_notes, fmt="npz")
+
+    driver, session = writing_driver()
+    target = FakeSupabase()
+    target_notes = NoteService(client=target)
+    await snapshot.restore_snapshot(str(tmp_path), as_user="carol", driver=driver, supabase=target, notes=target_notes)
+
+    files = target.tables["files"].rows
+    new_ids = {r["id"] for r in files}
+    assert {r["user_id"] for r in files} == {"carol"} and not new_ids & set(file_ids)
+    rows = written(session, "chunks")
+    assert {r["file_id"] for r in rows} == new_ids
+    assert {r["user_id"] for r in rows} == {"carol"}
+    assert not {r["chunk_id"] for r in rows} & {c["id"] for c in chunks}
+    assert {r["file_id"] for r in written(session, "concepts")} == new_ids
+
+    # The note is readable (and searchable) under its new id
+    note_id = target.tables["notes"].rows[0]["file_id"]
+    assert note_id in new_ids
+    note = await target_notes.get_note(note_id)
+    assert (note["title"], note["content"]) == ("Note", "Kubernetes rollout checklist — ünïcode")
+    results, total = await target_notes.search_notes("checklist")
+    assert total == 1 and results[0]["file_id"] == note_id
+
+@pytest.mark.asyncio
+async def test_export_finds_notes_kept_by_the_local_backend(tmp_path):
+    file_ids, chunks, mentions = source_graph(files=2)
+    source, _ = await source_supabase(file_ids)
+    env = {"NOTE_STORAGE_BACKEND": "local", "NOTE_LOCAL_ROOT": str(tmp_path / "notes"), "NOTE_LOCAL_FSYNC": "false"}
+    with patch.dict("os.environ", env):
+        local_notes = NoteService()
+    await local_notes.create_note("f1", "Local", "kept on disk")
+
+    manifest = await snapshot.export_user("alice", str(tmp_path / "snap"), driver=reading_driver(file_ids, chunks, mentions), supabase=source, notes=local_notes, fmt="npz")
+
+    assert manifest["rows"]["notes"] == 1
+    assert next(snapshot.read_parts(str(tmp_path / "snap"), "notes", "npz"))["title"] == ["Local"]
+
+@pytest.mark.asyncio
+async def test_restore_rejects_other_embedding_dimensions(tmp_path):
+    file_ids, chunks, mentions = source_graph(files=1)
+    for chunk in chunks:
+        chunk["embedding"] = chunk["embedding"][:8]
+    source, source_notes = await source_supabase(file_ids)
+    await snapshot.export_user("alice", str(tmp_path), driver=reading_driver(file_ids, chunks, mentions), supabase=source, notes=source_notes, fmt="npz")
+
+    driver, session = writing_driver()
+    target = FakeSupabase()
+    with pytest.raises(ValueError, match="dimensions"):
+        await snapshot.restore_snapshot(str(tmp_path), driver=driver, supabase=target, notes=NoteService(client=target))
+    session.run.assert_not_called()
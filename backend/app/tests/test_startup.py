@@ -0,0 +1,54 @@
+import os
+import pytest
+import subprocess
+import sys
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+from app import main
+from app.services.note import note_service
+
+# --- Helpers ---
+PROBE = """
+import sys
+import app.main
+from app.services.note import note_service_initialized
+print([m for m in ("langchain_google_genai", "supabase", "neo4j") if m in sys.modules])
+print(note_service_initialized())
+"""
+
+# --- Tests ---
+def test_import_defers_heavy_clients():
+    # Fresh interpreter: the test process has long since imported everything
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+    loaded, initialized = result.stdout.strip().splitlines()[-2:]
+    assert loaded == "[]"
+    assert initialized == "False"
+
+def test_warmup_steps_parsing_and_failures():
+    with patch.dict("os.environ", {"APP_WARMUP": "notes, neo4j, bogus"}):
+        assert main.warmup_steps() == ["notes", "neo4j"]
+    with patch.dict("os.environ", {"APP_WARMUP": "false"}):
+        assert main.warmup_steps() == []
+
+    def boom():
+        raise RuntimeError("down")
+
+    with patch.dict(main.WARMUP_STEPS, {"neo4j": boom}):
+        assert main.warm_up(["neo4j"]) == {"neo4j": None}
+
+@pytest.mark.asyncio
+async def test_first_note_call_builds_the_service_off_the_event_loop():
+    built_on = []
+    service = MagicMock(get_note=AsyncMock(return_value={"file_id": "n1"}))
+
+    def build():
+        built_on.append(threading.current_thread())
+        return service
+
+    with patch("app.services.note._note_service", None), patch("app.services.note.get_note_service", build):
+        assert await note_service.get_note("n1") == {"file_id": "n1"}
+
+    assert built_on and built_on[0] is not threading.main_thread()
+    service.get_note.assert_awaited_once_with("n1")
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+import threading
+from unittest.mock import MagicMock
+from app.services.write_coalescer import WRITE_QUERY, WriteCoalescer
+
+# --- Helpers ---
+def recording_driver(fail_when=None, latency=0.01):
+    """Driver whose session.run records (chunks, concepts) per transaction."""
+    transactions = []
+    lock = threading.Lock()
+
+    def run(query, chunks, concepts):
+        assert query == WRITE_QUERY
+        if fail_when and fail_when(chunks, concepts):
+            raise ValueError("constraint violated")
+        threading.Event().wait(latency)
+        with lock:
+            transactions.append((chunks, concepts))
+        return MagicMock()
+
+    session = MagicMock()
+    session.run.side_effect = run
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value = session
+    return driver, transactions
+
+def chunk_rows(file_id, n=2):
+    return [{"file_id": file_id, "chunk_id": f"{file_id}-{i}"} for i in range(n)]
+
+# --- Tests ---
+@pytest.mark.asyncio
+async def test_concurrent_uploads_share_transactions():
+    driver, transactions = recording_driver()
+    writer = WriteCoalescer(driver, max_delay=0.005)
+
+    await asyncio.gather(*(writer.write(chunks=chunk_rows(f"f{i}")) for i in range(50)))
+
+    assert sum(len(chunks) for chunks, _ in transactions) == 100
+    assert len(transactions) <= 3
+    assert writer.stats()["writes"] == 50
+
+@pytest.mark.asyncio
+async def test_row_cap_splits_batches_without_splitting_a_caller():
+    driver, transactions = recording_driver(latency=0)
+    writer = WriteCoalescer(driver, max_delay=0.05, max_rows=5)
+
+    await asyncio.gather(*(writer.write(chunks=chunk_rows(f"f{i}", 2)) for i in range(6)))
+
+    assert [len(chunks) for chunks, _ in transactions] == [4, 4, 4]
+
+@pytest.mark.asyncio
+async def test_bad_rows_only_fail_their_own_caller():
+    driver, transactions = recording_driver(fail_when=lambda chunks, _: any(r["file_id"] == "bad" for r in chunks))
+    writer = WriteCoalescer(driver, max_delay=0.005)
+
+    results = await asyncio.gather(
+        writer.write(chunks=chunk_rows("good-1")),
+        writer.write(chunks=chunk_rows("bad")),
+        writer.write(concepts=[{"file_id": "good-2", "name": "Docker"}]),
+        return_exceptions=True,
+    )
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
+    assert len(transactions) == 2
+    assert writer.stats()["isolated_retries"] == 1
@@ -0,0 +1,117 @@
+"""
+Benchmark: note body compression vs. the plain UTF-8 path.
+Location: backend/benchmarks/bench_note_compression.py
+
+Measures, per note size, the stored size and encode/decode throughput of
+each codec, then a create + uncached get round trip through NoteService
+(in-memory storage) with compression on and off.
+
+Run from backend/:
+    python -m benchmarks.bench_note_compression [--rounds N]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from unittest.mock import patch
+
+from app.services.note_codec import NoteCodec, zstd, train_dictionary
+
+SIZES = [512, 4 * 1024, 64 * 1024, 1024 * 1024]
+
+_WORDS = (
+    "neural network gradient descent backpropagation attention transformer "
+    "embedding token layer weights bias activation loss optimizer batch epoch "
+    "the a of and to in is that for with as on by this it are be from"
+).split()
+
+
+def make_markdown(size: int, seed: int = 0) -> str:
+    """Article-like markdown: headings, paragraphs, lists and links."""
+    rng = random.Random(seed)
+    parts, total, section = [], 0, 0
+    while total < size:
+        if rng.random() < 0.1:
+            section += 1
+            block = f"\n## Section {section}: {rng.choice(_WORDS).title()}\n\n"
+        elif rng.random() < 0.2:
+            block = "".join(f"- {' '.join(rng.choices(_WORDS, k=6))}\n" for _ in range(3))
+        else:
+            sentence = " ".join(rng.choices(_WORDS, k=rng.randint(40, 80)))
+            block = f"{sentence.capitalize()} [ref](https://en.wikipedia.org/wiki/{rng.choice(_WORDS)}).\n\n"
+        parts.append(block)
+        total += len(block)
+    return "".join(parts)[:size]
+
+
+def timed(fn, rounds: int) -> float:
+    """Best-of-rounds seconds for one call."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def codecs():
+    yield "plain", None
+    yield "zlib", NoteCodec(codec="zlib", min_bytes=0)
+    if zstd is not None:
+        yield "zstd", NoteCodec(codec="zstd", min_bytes=0)
+        samples = [make_markdown(8 * 1024, seed) for seed in range(200, 400)]
+        yield "zstd+dict", NoteCodec(codec="zstd", min_bytes=0, dictionary=train_dictionary(samples, 32 * 1024))
+
+
+def bench_codecs(rounds: int):
+    print(f"{'codec':<10} {'size':>8} {'stored':>8} {'ratio':>6} {'enc MB/s':>9} {'dec MB/s':>9}")
+    for name, codec in codecs():
+        for size in SIZES:
+            text = make_markdown(size, seed=size)
+            logical = len(text.encode('utf-8'))
+            if codec is None:
+                stored = text.encode('utf-8')
+                encode = lambda: text.encode('utf-8')
+                decode = lambda: stored.decode('utf-8')
+            else:
+                stored = codec.encode(text)
+                encode = lambda: codec.encode(text)
+                decode = lambda: codec.decode(stored)
+            mb = logical / 1e6
+            print(
+                f"{name:<10} {logical:>8} {len(stored):>8} {logical / len(stored):>6.2f} "
+                f"{mb / timed(encode, rounds):>9.1f} {mb / timed(decode, rounds):>9.1f}"
+            )
+
+
+async def bench_service(rounds: int):
+    from app.services.note import NoteService
+    from app.tests.fakes import FakeSupabase
+
+    print(f"\n{'service':<10} {'size':>8} {'create ms':>10} {'get ms':>8} {'stored':>8}")
+    for setting in ("none", "zstd" if zstd is not None else "zlib"):
+        with patch.dict(os.environ, {"NOTE_COMPRESSION": setting}):
+            service = NoteService(client=FakeSupabase())
+        for size in SIZES:
+            text = make_markdown(size, seed=size)
+            create = get = float("inf")
+            for i in range(rounds):
+                started = time.perf_counter()
+                metadata = await service.create_note(file_id=f"{size}-{i}", title="Bench", content=text)
+                create = min(create, time.perf_counter() - started)
+                service.cache.clear()
+                started = time.perf_counter()
+                await service.get_note(f"{size}-{i}")
+                get = min(get, time.perf_counter() - started)
+            print(f"{setting:<10} {size:>8} {create * 1e3:>10.3f} {get * 1e3:>8.3f} {metadata['stored_bytes']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    bench_codecs(args.rounds)
+    asyncio.run(bench_service(args.rounds))
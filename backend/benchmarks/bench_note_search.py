@@ -0,0 +1,89 @@
+"""
+Benchmark: full-text search latency on a large synthetic corpus.
+Location: backend/benchmarks/bench_note_search.py
+
+Indexes N article-like notes into an on-disk FTS index, then times word,
+phrase, prefix and title queries (median and p95 over repeated runs).
+
+Run from backend/:
+    python -m benchmarks.bench_note_search [--notes 20000] [--rounds 50]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.services.note_search import NoteSearchIndex
+
+QUERIES = [
+    "gradient",
+    "gradient descent",
+    '"gradient descent"',
+    "backprop*",
+    "title:attention",
+    "transformer attention embedding",
+]
+
+
+TOPIC_WORDS = "gradient descent backpropagation attention transformer embedding layer optimizer".split()
+
+
+def make_vocabulary(size: int = 50000, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [''.join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(size)]
+
+
+def make_note(rng: random.Random, vocabulary: list[str], cum_weights: list[float], words: int = 700) -> tuple[str, str]:
+    """Zipf-distributed words, with topic words sprinkled into some notes."""
+    body = rng.choices(vocabulary, cum_weights=cum_weights, k=words)
+    for word in rng.sample(TOPIC_WORDS, k=rng.randint(0, 2)):
+        for _ in range(rng.randint(1, 4)):
+            body.insert(rng.randrange(len(body)), word)
+    if rng.random() < 0.02:
+        body.insert(rng.randrange(len(body)), "gradient descent")
+    title = " ".join(rng.choices(vocabulary[:2000], k=5) + rng.sample(TOPIC_WORDS, k=rng.randint(0, 1)))
+    return title, " ".join(body)
+
+
+def build(index: NoteSearchIndex, notes: int) -> float:
+    rng = random.Random(1)
+    vocabulary = make_vocabulary()
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    corpus = [make_note(rng, vocabulary, cum_weights) for _ in range(notes)]
+    started = time.perf_counter()
+    for i, (title, content) in enumerate(corpus):
+        index.index_note({"file_id": f"note-{i:06d}", "title": title}, content)
+    index.optimize()
+    return time.perf_counter() - started
+
+
+def bench(index: NoteSearchIndex, rounds: int):
+    print(f"{'query':<34} {'hits':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            _, total = index.search(query, limit=20)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{query:<34} {total:>7} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = NoteSearchIndex(os.path.join(tmp, "search.sqlite3"))
+        elapsed = build(index, args.notes)
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        print(f"Indexed {args.notes} notes in {elapsed:.1f}s ({size / 1e6:.1f} MB on disk)\n")
+        bench(index, args.rounds)
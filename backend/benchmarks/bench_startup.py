@@ -0,0 +1,85 @@
+"""
+Benchmark: cold-start cost of the API process.
+Location: backend/benchmarks/bench_startup.py
+
+Imports app.main in a fresh interpreter with `-X importtime` and reports the
+slowest top-level packages, the total import time, and the time until the
+first /health response. Each run is a new process, so nothing is cached.
+
+Run from backend/:
+    python -m benchmarks.bench_startup [--runs 5] [--top 12] [--warmup all]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+FIRST_RESPONSE = """
+import time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    client.get("/health")
+print(imported - started, time.perf_counter() - started)
+"""
+
+
+def import_profile() -> dict:
+    """
+    Import microseconds per top-level package: a package's cumulative time is
+    counted where it is entered from a different package, so langchain pulled
+    in by app.api.ingestion is charged to langchain, not app.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True, env=os.environ.copy()
+    )
+    totals = defaultdict(int)
+    # -X importtime prints children before parents; reversed, parents come first
+    stack = []
+    for _, cumulative_us, indent, module in reversed(_LINE.findall(result.stderr)):
+        package = module.split(".")[0]
+        while stack and stack[-1][0] >= len(indent):
+            stack.pop()
+        if not stack or stack[-1][1] != package:
+            totals[package] += int(cumulative_us)
+        stack.append((len(indent), package))
+    return totals
+
+
+def first_response(warmup: str) -> tuple[float, float]:
+    env = dict(os.environ, APP_WARMUP=warmup, NEO4J_SCHEMA_BOOTSTRAP="false")
+    result = subprocess.run([sys.executable, "-c", FIRST_RESPONSE], capture_output=True, text=True, check=True, env=env)
+    imported, ready = result.stdout.strip().splitlines()[-1].split()
+    return float(imported), float(ready)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--warmup", default="false", help="APP_WARMUP value for the first-response runs")
+    args = parser.parse_args()
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:1")
+    os.environ.setdefault("SUPABASE_KEY", "x")
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    modules = {m for p in profiles for m in p}
+    medians = {m: statistics.median(p.get(m, 0) for p in profiles) for m in modules}
+    print(f"{'package':<28} {'import ms':>10}")
+    for module, us in sorted(medians.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{module:<28} {us / 1000:>10.1f}")
+
+    runs = [first_response(args.warmup) for _ in range(args.runs)]
+    labels = ("import app.main", f"first /health (APP_WARMUP={args.warmup})")
+    print()
+    for i, label in enumerate(labels):
+        print(f"{label:<36} {statistics.median(r[i] for r in runs) * 1000:>8.0f} ms")
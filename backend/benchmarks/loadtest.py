@@ -0,0 +1,386 @@
+"""
+Load test: mixed concurrent traffic against app.main:app with offline stand-ins.
+Location: backend/benchmarks/loadtest.py
+
+Drives uploads, note CRUD, list, search, chat and graph-context calls at a
+fixed concurrency (closed loop) or a fixed arrival rate (open loop, latency
+measured from the scheduled start so queueing is not hidden), and reports per
+endpoint: throughput, p50/p95/p99 latency, status codes, and the event-loop
+lag observed while that endpoint's requests were in flight. Blocking calls
+inside async handlers show up as lag on every endpoint sharing the loop.
+
+In-process (ASGI transport, one event loop for app and load generator):
+    python -m benchmarks.loadtest run --duration 20 --concurrency 32 --profile lan
+    python -m benchmarks.loadtest run --governed ...   # model calls under the GOVERNOR_* rate limits
+
+Over localhost against a real uvicorn worker:
+    python -m benchmarks.loadtest serve --port 8001 --profile lan
+    python -m benchmarks.loadtest run --url http://127.0.0.1:8001 --rate 200
+
+Results are also written as JSON (benchmarks/results/loadtest-<time>.json).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmarks.bench_note_compression import make_markdown
+from benchmarks.standins import install, latency_profile
+from benchmarks.suite import RESULTS_DIR, git_revision, summarize
+
+ENDPOINT_HEADER = "x-loadtest-endpoint"
+STATS_PATH = "/__loadtest/stats"
+
+DEFAULT_MIX = "upload=2,note_create=8,note_get=30,note_update=8,note_patch=4,note_list=15,search=11,chat=12,graph=10"
+
+
+# --- Server side: event-loop lag attributed to in-flight endpoints ---
+class LoopLagMonitor:
+    """
+    Sleeps `interval` in a loop; any overshoot is time the loop spent unable
+    to run ready callbacks. Each sample is charged to every endpoint with a
+    request in flight at that moment.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.inflight: Counter = Counter()
+        self.samples: List[float] = []
+        self.by_endpoint: Dict[str, List[float]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples.append(lag)
+            for endpoint, count in self.inflight.items():
+                if count:
+                    self.by_endpoint[endpoint].append(lag)
+
+    def report(self) -> Dict[str, Any]:
+        def lag_stats(values):
+            values = sorted(values)
+            if not values:
+                return {"n": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+            stats = summarize(values)
+            return {"n": stats["n"], "p50_ms": stats["p50_ms"], "p99_ms": stats["p99_ms"], "max_ms": round(values[-1] * 1000, 3)}
+
+        return {"overall": lag_stats(self.samples), "endpoints": {k: lag_stats(v) for k, v in self.by_endpoint.items()}}
+
+    def reset(self):
+        self.samples.clear()
+        self.by_endpoint.clear()
+
+
+class LoadTestMiddleware:
+    """ASGI wrapper: tracks in-flight requests per endpoint tag and serves the lag report."""
+
+    def __init__(self, app, monitor: LoopLagMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.monitor.start()
+        if scope["path"] == STATS_PATH:
+            body = json.dumps(self.monitor.report()).encode()
+            if scope["method"] == "DELETE":
+                self.monitor.reset()
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        headers = dict(scope.get("headers") or [])
+        endpoint = headers.get(ENDPOINT_HEADER.encode(), scope["path"].encode()).decode()
+        self.monitor.inflight[endpoint] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.inflight[endpoint] -= 1
+
+
+def build_app(profile: str, governed: bool = False):
+    """app.main:app on stand-ins, wrapped for lag tracking."""
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:1")
+    os.environ.setdefault("SUPABASE_KEY", "offline")
+    os.environ["NEO4J_SCHEMA_BOOTSTRAP"] = "false"
+    os.environ.setdefault("NOTE_SEARCH_PATH", ":memory:")
+    from app.api import ingestion
+    from app.main import app
+
+    install(latency_profile(profile), governed=governed)
+    ingestion.preload()  # Keep the one-off LangChain import out of the first upload's latency
+    monitor = LoopLagMonitor()
+    return LoadTestMiddleware(app, monitor), monitor
+
+
+# --- Client side: traffic mix ---
+class Traffic:
+    """The operations of the mix plus the client-side note state they share."""
+
+    TOPICS = ["docker", "vector databases", "embeddings", "graph algorithms", "attention", "gradient descent"]
+
+    def __init__(self, client, rng: random.Random, note_bytes: int, doc_bytes: int):
+        self.client = client
+        self.rng = rng
+        self.note_bytes = note_bytes
+        self.doc_bytes = doc_bytes
+        self.versions: Dict[str, int] = {}
+        self.bodies = [make_markdown(note_bytes, seed=i) for i in range(32)]
+        self.docs = [make_markdown(doc_bytes, seed=100 + i) for i in range(8)]
+
+    def _note(self) -> Optional[str]:
+        return self.rng.choice(list(self.versions)) if self.versions else None
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs):
+        headers = {ENDPOINT_HEADER: endpoint}
+        return await self.client.request(method, url, headers=headers, **kwargs)
+
+    async def upload(self):
+        files = {"file": ("load.md", self.rng.choice(self.docs).encode(), "text/markdown")}
+        return await self.request("upload", "POST", "/api/ingestion/upload", data={"user_id": "load"}, files=files)
+
+    async def note_create(self):
+        file_id = str(uuid.uuid4())
+        body = {"file_id": file_id, "title": f"Load note {file_id[:8]}", "content": self.rng.choice(self.bodies)}
+        response = await self.request("note_create", "POST", "/api/notes", json=body)
+        if response.status_code == 201:
+            self.versions[file_id] = 1
+        return response
+
+    async def note_get(self):
+        return await self.request("note_get", "GET", f"/api/notes/{self._note() or 'missing'}")
+
+    async def note_update(self):
+        file_id = self._note() or "missing"
+        content = self.rng.choice(self.bodies) + f"\n\nEdit {self.rng.random()}\n"
+        response = await self.request("note_update", "PUT", f"/api/notes/{file_id}", json={"content": content})
+        if response.status_code == 200:
+            self.versions[file_id] = int(response.json().get("version_id") or 0)
+        return response
+
+    async def note_patch(self):
+        file_id = self._note() or "missing"
+        body = {"base_version": self.versions.get(file_id, 1), "ops": [{"start": 0, "end": 0, "text": "Patched. "}]}
+        response = await self.request("note_patch", "PATCH", f"/api/notes/{file_id}", json=body)
+        if response.status_code == 200:
+            self.versions[file_id] = int(response.json().get("version_id") or 0)
+        return response
+
+    async def note_list(self):
+        return await self.request("note_list", "GET", "/api/notes", params={"limit": 50})
+
+    async def search(self):
+        return await self.request("search", "GET", "/api/search", params={"q": self.rng.choice(self.TOPICS)})
+
+    async def chat(self):
+        body = {"query": f"How do {self.rng.choice(self.TOPICS)} work?", "mode": "execution"}
+        return await self.request("chat", "POST", "/api/chat/query", json=body)
+
+    async def graph(self):
+        return await self.request("graph", "GET", f"/api/graph/context/{self.rng.choice(self.TOPICS)}")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if not hasattr(Traffic, name.strip()):
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def call(self, traffic: Traffic, op: str, scheduled: Optional[float] = None):
+        started = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            response = await getattr(traffic, op)()
+            status = str(response.status_code)
+        except Exception as e:
+            status = type(e).__name__
+        self.latencies[op].append(time.perf_counter() - started)
+        self.statuses[op][status] += 1
+
+
+async def closed_loop(traffic: Traffic, recorder: Recorder, ops, weights, concurrency: int, deadline: float):
+    async def user():
+        while time.perf_counter() < deadline:
+            await recorder.call(traffic, traffic.rng.choices(ops, weights)[0])
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(traffic: Traffic, recorder: Recorder, ops, weights, rate: float, deadline: float):
+    """Poisson arrivals at `rate`/s regardless of how fast responses come back."""
+    tasks = set()
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        scheduled += traffic.rng.expovariate(rate)
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(recorder.call(traffic, traffic.rng.choices(ops, weights)[0], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+
+    monitor = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60, limits=httpx.Limits(max_connections=args.concurrency * 2))
+    else:
+        app, monitor = build_app(args.profile, args.governed)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+
+    weights = parse_mix(args.mix)
+    ops, op_weights = list(weights), list(weights.values())
+    async with client:
+        traffic = Traffic(client, random.Random(args.seed), args.note_bytes, args.doc_bytes)
+        for _ in range(args.seed_notes):
+            await traffic.note_create()
+        if monitor is not None:
+            monitor.start()
+            monitor.reset()
+        else:
+            await client.delete(STATS_PATH)
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        if args.rate:
+            await open_loop(traffic, recorder, ops, op_weights, args.rate, deadline)
+        else:
+            await closed_loop(traffic, recorder, ops, op_weights, args.concurrency, deadline)
+        elapsed = time.perf_counter() - started
+
+        if monitor is not None:
+            lag = monitor.report()
+            await monitor.stop()
+        else:
+            lag = (await client.get(STATS_PATH)).json()
+
+    endpoints = {}
+    for op in ops:
+        samples = recorder.latencies.get(op, [])
+        errors = sum(n for s, n in recorder.statuses[op].items() if not s.isdigit() or s.startswith("5"))
+        endpoints[op] = {
+            "requests": len(samples),
+            "throughput_per_s": round(len(samples) / elapsed, 2),
+            "errors": errors,
+            "statuses": dict(recorder.statuses[op]),
+            "latency": summarize(samples),
+            "loop_lag": lag["endpoints"].get(op, {}),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "meta": {
+            "suite": "loadtest",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "target": args.url or "in-process",
+            "profile": args.profile,
+            "mode": f"open loop {args.rate}/s" if args.rate else f"closed loop x{args.concurrency}",
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "command")},
+        },
+        "results": {
+            "duration_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_per_s": round(total / elapsed, 2),
+            "loop_lag": lag["overall"],
+            "endpoints": endpoints,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    results = report["results"]
+    print(f"\n{report['meta']['mode']}, {results['duration_s']}s, {results['requests']} requests, "
+          f"{results['throughput_per_s']} req/s")
+    lag = results["loop_lag"]
+    print(f"event-loop lag: p50 {lag['p50_ms']} ms, p99 {lag['p99_ms']} ms, max {lag['max_ms']} ms\n")
+    print(f"{'endpoint':<12} {'req/s':>8} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'lag p99':>9} {'lag max':>9}")
+    for op, e in results["endpoints"].items():
+        print(f"{op:<12} {e['throughput_per_s']:>8.1f} {e['errors']:>5} {e['latency']['p50_ms']:>9.1f} "
+              f"{e['latency']['p95_ms']:>9.1f} {e['latency']['p99_ms']:>9.1f} "
+              f"{e['loop_lag'].get('p99_ms', 0):>9.1f} {e['loop_lag'].get('max_ms', 0):>9.1f}")
+
+
+def serve(args):
+    import uvicorn
+
+    app, _ = build_app(args.profile, args.governed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run app.main:app on stand-ins under uvicorn")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8001)
+    serve_parser.add_argument("--profile", choices=["zero", "lan", "wan"], default="lan")
+    serve_parser.add_argument("--governed", action="store_true", help="Apply the GOVERNOR_* rate limits to model calls")
+
+    run_parser = commands.add_parser("run", help="Generate load and report")
+    run_parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    run_parser.add_argument("--profile", choices=["zero", "lan", "wan"], default="lan", help="Stand-in latency (in-process only)")
+    run_parser.add_argument("--governed", action="store_true", help="Apply the GOVERNOR_* rate limits (in-process only)")
+    run_parser.add_argument("--duration", type=float, default=20.0)
+    run_parser.add_argument("--concurrency", type=int, default=32, help="Virtual users (closed loop)")
+    run_parser.add_argument("--rate", type=float, help="Requests per second (open loop) instead of --concurrency")
+    run_parser.add_argument("--mix", default=DEFAULT_MIX, help="op=weight,... (ops: " + DEFAULT_MIX.replace("=", " ") + ")")
+    run_parser.add_argument("--seed-notes", type=int, default=50)
+    run_parser.add_argument("--note-bytes", type=int, default=4 * 1024)
+    run_parser.add_argument("--doc-bytes", type=int, default=8 * 1024)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="Results path (default benchmarks/results/loadtest-<time>.json)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args)
+        return 0
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    output = args.output or os.path.join(RESULTS_DIR, f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
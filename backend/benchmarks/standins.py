@@ -0,0 +1,226 @@
+"""
+In-process stand-ins for the external services, with injectable latency.
+Location: backend/benchmarks/standins.py
+
+Lets the benchmark suite (and load tests) exercise the real service code fully
+offline and deterministically:
+- LatencySupabase: app.tests.fakes.FakeSupabase whose storage and table calls
+  sleep for a fixed time, like a network round trip
+- FakeNeo4jDriver: records Cypher runs and the rows they carry
+- DeterministicEmbeddings: hash-seeded unit vectors, same text -> same vector
+- FakeLLM: canned Cypher for graph extraction
+- unlimited_governor(): a rate governor that never queues, so results
+  measure the code rather than the GOVERNOR_* limits (opt back in with
+  --governed on the suite and load test)
+Latencies are seconds; blocking calls use time.sleep (they run on worker
+threads or block the caller exactly as the real clients would), async calls
+use asyncio.sleep.
+"""
+
+import asyncio
+import hashlib
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.tests.fakes import FakeBucket, FakeQuery, FakeStorage, FakeSupabase
+
+# Tokens per second / burst of the benchmark governor
+UNLIMITED = 1e12
+
+
+class _SlowBucket(FakeBucket):
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def upload(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().upload(*args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().update(*args, **kwargs)
+
+    def download(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().download(*args, **kwargs)
+
+    def info(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().info(*args, **kwargs)
+
+    def remove(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().remove(*args, **kwargs)
+
+    def list(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().list(*args, **kwargs)
+
+
+class _SlowStorage(FakeStorage):
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return self.buckets.setdefault(bucket, _SlowBucket(self.latency))
+
+    def create_bucket(self, name: str, options: dict = None):
+        self.buckets.setdefault(name, _SlowBucket(self.latency))
+
+
+class _SlowQuery(FakeQuery):
+    def __init__(self, table, latency: float):
+        super().__init__(table)
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return super().execute()
+
+
+class LatencySupabase(FakeSupabase):
+    """FakeSupabase with a fixed delay per storage call and per executed query."""
+
+    def __init__(self, storage_latency: float = 0.0, table_latency: float = 0.0):
+        super().__init__()
+        self.storage = _SlowStorage(storage_latency)
+        self.table_latency = table_latency
+
+    def table(self, name: str) -> FakeQuery:
+        query = super().table(name)
+        return _SlowQuery(query.table, self.table_latency)
+
+
+class FakeNeo4jSession:
+    def __init__(self, driver: "FakeNeo4jDriver"):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, cypher: str, **params):
+        rows = sum(len(params.get(key) or ()) for key in ("batch", "chunks", "concepts")) or 1
+        time.sleep(self.driver.latency + self.driver.row_latency * rows)
+        self.driver.runs.append((cypher, rows))
+        return SimpleNamespace(data=lambda: [], single=lambda: None, consume=lambda: None)
+
+
+class FakeNeo4jDriver:
+    """Accepts any Cypher; `runs` keeps (cypher, rows) per call."""
+
+    def __init__(self, latency: float = 0.0, row_latency: float = 0.0):
+        self.latency = latency
+        self.row_latency = row_latency
+        self.runs: List[tuple] = []
+
+    def session(self, **kwargs) -> FakeNeo4jSession:
+        return FakeNeo4jSession(self)
+
+    def verify_connectivity(self):
+        return None
+
+    @property
+    def rows_written(self) -> int:
+        return sum(rows for _, rows in self.runs)
+
+
+def _vector(text: str, dimensions: int) -> List[float]:
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class DeterministicEmbeddings:
+    """Embeddings API stand-in: fixed latency per request plus per input text."""
+
+    def __init__(self, dimensions: int = 768, latency: float = 0.0, per_text_latency: float = 0.0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency + self.per_text_latency * len(texts))
+        return [_vector(t, self.dimensions) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency + self.per_text_latency * len(texts))
+        return [_vector(t, self.dimensions) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeLLM:
+    """Chat model stand-in returning one MERGE statement per call."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, prompt: Any) -> SimpleNamespace:
+        self.calls += 1
+        time.sleep(self.latency)
+        return SimpleNamespace(content=f"```cypher\nMERGE (c:Concept {{name: 'Concept {self.calls}'}})\n```")
+
+    async def ainvoke(self, prompt: Any) -> SimpleNamespace:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(content=f"MERGE (c:Concept {{name: 'Concept {self.calls}'}})")
+
+
+def unlimited_governor():
+    """Governor whose buckets never run dry (admission still goes through the real code path)."""
+    from app.services.governor import Governor, TokenBucket
+
+    return Governor({name: TokenBucket(rate=UNLIMITED, capacity=UNLIMITED) for name in ("llm", "embed")})
+
+
+def latency_profile(name: str) -> Dict[str, float]:
+    """Named latency presets: 'zero' measures pure code paths, 'lan' and 'wan' add round trips."""
+    return {
+        "zero": dict(storage=0.0, table=0.0, neo4j=0.0, embed=0.0, embed_per_text=0.0, llm=0.0),
+        "lan": dict(storage=0.002, table=0.002, neo4j=0.002, embed=0.05, embed_per_text=0.001, llm=0.2),
+        "wan": dict(storage=0.03, table=0.03, neo4j=0.01, embed=0.15, embed_per_text=0.002, llm=0.8),
+    }[name]
+
+
+def install(latency: Dict[str, float], governed: bool = False) -> Dict[str, Any]:
+    """
+    Point the whole app at stand-ins: the shared Supabase/Neo4j clients, the
+    LangChain model classes used by ingestion, and the note service singleton.
+    The governor singleton is replaced by unlimited_governor() unless
+    `governed` (then GOVERNOR_* env applies). For load tests against
+    app.main:app; returns the installed objects.
+    """
+    from app.api import ingestion
+    from app.db import clients
+    from app.services import governor, note
+    from app.services.note_search import NoteSearchIndex
+
+    supabase = LatencySupabase(latency["storage"], latency["table"])
+    neo4j = FakeNeo4jDriver(latency=latency["neo4j"])
+    embeddings = DeterministicEmbeddings(latency=latency["embed"], per_text_latency=latency["embed_per_text"])
+    llm = FakeLLM(latency=latency["llm"])
+
+    clients._supabase = supabase
+    clients._neo4j_driver = neo4j
+    ingestion.GoogleGenerativeAIEmbeddings = lambda **kwargs: embeddings
+    ingestion.ChatGoogleGenerativeAI = lambda **kwargs: llm
+    note._note_service = note.NoteService(client=supabase, search=NoteSearchIndex(":memory:"))
+    if not governed:
+        governor._governor = unlimited_governor()
+    return {"supabase": supabase, "neo4j": neo4j, "embeddings": embeddings, "llm": llm, "notes": note._note_service}
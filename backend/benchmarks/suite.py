@@ -0,0 +1,334 @@
+"""
+Benchmark suite: ingestion, note CRUD, list scaling and chat, fully offline.
+Location: backend/benchmarks/suite.py
+
+Runs the real service code against the in-process stand-ins in standins.py
+(fake Supabase storage and tables, recording Neo4j driver, deterministic
+embedder, canned LLM) with a latency profile injected into every external
+call, and writes the results as JSON so runs can be compared:
+
+    python -m benchmarks.suite                      # writes benchmarks/results/suite-<time>.json
+    python -m benchmarks.suite --profile lan --quick
+    python -m benchmarks.suite --governed           # ingestion under the GOVERNOR_* rate limits
+    python -m benchmarks.suite --compare benchmarks/results/suite-A.json [--fail-over 25]
+
+Metrics ending in _ms are lower-is-better, metrics ending in _per_s higher-is-better.
+--compare gates on medians, means and throughputs (tail percentiles of a short
+run are too noisy) above NOISE_FLOOR_MS, flagging changes beyond --fail-over
+percent (exit status 1). Compare runs made with the same profile and machine.
+
+Chat: the scenario sends no user_id, so /api/chat/query skips vector
+retrieval; it times the endpoint end to end plus full-text note search.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from benchmarks.bench_note_compression import make_markdown
+from benchmarks.standins import (
+    DeterministicEmbeddings,
+    FakeLLM,
+    FakeNeo4jDriver,
+    LatencySupabase,
+    latency_profile,
+    unlimited_governor,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+NOISE_FLOOR_MS = 0.05
+GATED_SUFFIXES = ("p50_ms", "mean_ms", "_per_s")
+
+
+# --- Statistics ---
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    values = sorted(seconds)
+    return {
+        "n": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+async def timed(coro_fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = await coro_fn(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def stage_means(prefix: str) -> Dict[str, float]:
+    """Mean ms per metrics stage recorded during a scenario."""
+    from app.services import metrics
+
+    means = {}
+    for (stage,) in metrics.STAGE_SECONDS.label_sets():
+        if not stage.startswith(prefix):
+            continue
+        snap = metrics.STAGE_SECONDS.snapshot(stage)
+        means[f"{stage}.mean_ms"] = round(snap["sum"] / snap["count"] * 1000, 3)
+    return means
+
+
+# --- Scenarios ---
+def _upload(text: str, name: str):
+    from io import BytesIO
+    from fastapi import UploadFile
+
+    return UploadFile(filename=name, file=BytesIO(text.encode("utf-8")))
+
+
+async def bench_ingestion(latency: Dict[str, float], docs: int, doc_bytes: int, governed: bool = False) -> Dict[str, Any]:
+    from app.api.ingestion import IngestionService
+    from app.services import metrics
+
+    metrics.reset()
+    neo4j = FakeNeo4jDriver(latency=latency["neo4j"])
+    service = IngestionService(
+        supabase=LatencySupabase(latency["storage"], latency["table"]),
+        neo4j_driver=neo4j,
+        embeddings=DeterministicEmbeddings(latency=latency["embed"], per_text_latency=latency["embed_per_text"]),
+        llm=FakeLLM(latency=latency["llm"]),
+        # Unlimited unless the rate governor itself is what is being measured
+        governor=None if governed else unlimited_governor(),
+    )
+    corpus = [make_markdown(doc_bytes, seed=i) for i in range(docs)]
+    # Untimed first upload: pays the one-off lazy LangChain imports
+    await service.process_file("bench-user", _upload(corpus[0], "warmup.md"))
+    metrics.reset()
+    neo4j.runs.clear()
+
+    timings, chunks = [], 0
+    started = time.perf_counter()
+    for i, text in enumerate(corpus):
+        elapsed, result = await timed(service.process_file, "bench-user", _upload(text, f"doc-{i}.md"))
+        timings.append(elapsed)
+        chunks += result["chunk_count"]
+    wall = time.perf_counter() - started
+
+    return {
+        "docs": docs,
+        "chunks": chunks,
+        "docs_per_s": round(docs / wall, 2),
+        "chunks_per_s": round(chunks / wall, 1),
+        "neo4j_rows_written": neo4j.rows_written,
+        "per_doc": summarize(timings),
+        "stages": stage_means("ingest."),
+    }
+
+
+async def bench_note_crud(latency: Dict[str, float], notes: int, note_bytes: int) -> Dict[str, Any]:
+    from app.services import metrics
+    from app.services.note import NoteService
+    from app.services.note_search import NoteSearchIndex
+
+    metrics.reset()
+    service = NoteService(client=LatencySupabase(latency["storage"], latency["table"]), search=NoteSearchIndex(":memory:"))
+    bodies = [make_markdown(note_bytes, seed=i) for i in range(notes)]
+    ids = [f"bench-{i:05d}" for i in range(notes)]
+    results: Dict[str, List[float]] = {k: [] for k in ("create", "get_uncached", "get_cached", "update", "patch", "delete")}
+
+    for file_id, body in zip(ids, bodies):
+        results["create"].append((await timed(service.create_note, file_id=file_id, title=file_id, content=body))[0])
+    service.cache.clear()
+    for file_id in ids:
+        results["get_uncached"].append((await timed(service.get_note, file_id))[0])
+    for file_id in ids:
+        results["get_cached"].append((await timed(service.get_note, file_id))[0])
+    for file_id, body in zip(ids, bodies):
+        results["update"].append((await timed(service.update_note, file_id, content=body + "\n\nEdited.\n"))[0])
+    for file_id in ids:
+        ops = [{"start": 0, "end": 0, "text": "Patched. "}]
+        results["patch"].append((await timed(service.patch_note, file_id, 2, ops))[0])
+
+    search = []
+    for query in ("gradient descent", '"neural network"', "attention*", "title:bench"):
+        for _ in range(max(1, notes // 20)):
+            search.append((await timed(service.search_notes, query))[0])
+
+    for file_id in ids:
+        results["delete"].append((await timed(service.delete_note, file_id))[0])
+
+    summary = {op: summarize(samples) for op, samples in results.items()}
+    summary["search"] = summarize(search)
+    summary["stages"] = stage_means("note.")
+    return summary
+
+
+async def bench_list_scaling(latency: Dict[str, float], sizes: List[int], page_size: int) -> Dict[str, Any]:
+    """First-page and deep-page latency of list_notes against an index of N rows (SQLite index, fake bucket)."""
+    from app.services.note import NoteService
+    from app.services.note_index import SQLiteNoteIndex
+    from app.services.note_search import NoteSearchIndex
+    from app.services.note_storage import SupabaseStorage
+
+    scaling = {}
+    for size in sizes:
+        client = LatencySupabase(latency["storage"], latency["table"])
+        index = SQLiteNoteIndex(":memory:")
+        service = NoteService(storage=SupabaseStorage(client, NoteService.BUCKET_NAME), index=index, search=NoteSearchIndex(":memory:"))
+        for i in range(size):
+            stamp = f"2025-01-01T00:00:00.{i:06d}"
+            index.upsert({
+                "file_id": f"n{i:06d}", "title": f"Note {i}", "url": None, "storage_path": f"n{i:06d}.md",
+                "created_at": stamp, "updated_at": stamp, "size_bytes": 100, "stored_bytes": 100, "version": 1,
+            })
+
+        first = [(await timed(service.list_notes, page_size))[0] for _ in range(20)]
+        cursor, pages, walk_started = None, 0, time.perf_counter()
+        deep = []
+        while True:
+            elapsed, (_, cursor) = await timed(service.list_notes, page_size, cursor)
+            pages += 1
+            if pages > size // page_size // 2:
+                deep.append(elapsed)
+            if cursor is None:
+                break
+        scaling[str(size)] = {
+            "first_page": summarize(first),
+            "deep_page": summarize(deep),
+            "full_walk_ms": round((time.perf_counter() - walk_started) * 1000, 1),
+            "pages": pages,
+        }
+    return scaling
+
+
+async def bench_chat(requests: int) -> Dict[str, Any]:
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    timings = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(requests):
+            payload = {"query": f"What is concept {i}?", "mode": "execution"}
+            elapsed, response = await timed(client.post, "/api/chat/query", json=payload)
+            response.raise_for_status()
+            timings.append(elapsed)
+    return {"query": summarize(timings)}
+
+
+# --- Results ---
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any], fail_over: float) -> List[str]:
+    """Print metric deltas; return the metrics that regressed by more than fail_over percent."""
+    before, after = flatten(previous["results"]), flatten(current["results"])
+    regressions = []
+    print(f"\n{'metric':<58} {'before':>10} {'after':>10} {'change':>8}")
+    for name in sorted(before.keys() & after.keys()):
+        if not name.endswith(GATED_SUFFIXES) or not before[name]:
+            continue
+        if name.endswith("_ms") and max(before[name], after[name]) < NOISE_FLOOR_MS:
+            continue
+        change = (after[name] - before[name]) / before[name] * 100
+        worse = change > fail_over if name.endswith("_ms") else change < -fail_over
+        flag = "  <-- regression" if worse else ""
+        if worse:
+            regressions.append(name)
+        print(f"{name:<58} {before[name]:>10.3f} {after[name]:>10.3f} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+async def run(args) -> Dict[str, Any]:
+    latency = latency_profile(args.profile)
+    scale = 0.2 if args.quick else 1.0
+    results = {}
+
+    print(f"Ingestion ({args.profile})...")
+    results["ingestion"] = await bench_ingestion(latency, max(2, int(args.docs * scale)), args.doc_bytes, args.governed)
+    print("Note CRUD...")
+    results["note_crud"] = await bench_note_crud(latency, max(5, int(args.notes * scale)), args.note_bytes)
+    print("List scaling...")
+    sizes = [size for size in args.list_sizes if not args.quick or size <= 2000]
+    results["list_notes"] = await bench_list_scaling(latency, sizes, args.page_size)
+    print("Chat...")
+    results["chat"] = await bench_chat(max(20, int(args.chat_requests * scale)))
+
+    return {
+        "meta": {
+            "suite": "backend",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profile": args.profile,
+            "latency": latency,
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=["zero", "lan", "wan"], default="zero", help="Injected service latency")
+    parser.add_argument("--quick", action="store_true", help="About a fifth of the work, for smoke runs")
+    parser.add_argument("--governed", action="store_true", help="Apply the GOVERNOR_* rate limits to model calls")
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--doc-bytes", type=int, default=8 * 1024)
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--note-bytes", type=int, default=4 * 1024)
+    parser.add_argument("--list-sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--chat-requests", type=int, default=200)
+    parser.add_argument("--output", help="Results path (default benchmarks/results/suite-<time>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    parser.add_argument("--fail-over", type=float, default=25.0, help="Regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("NOTE_SEARCH_PATH", ":memory:")
+    report = asyncio.run(run(args))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    for name, value in flatten(report["results"]).items():
+        if name.endswith("p50_ms") or name.endswith("_per_s"):
+            print(f"{name:<58} {value:>10.3f}")
+    print(f"\n✅ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.fail_over)
+        if regressions:
+            print(f"⚠️  {len(regressions)} metric(s) regressed by more than {args.fail_over}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
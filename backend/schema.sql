@@ -60,4 +60,80 @@ create table if not exists public.user_progress (
     knowledge_score int default 0 check (knowledge_score >= 0 and knowledge_score <= 100),
     last_updated timestamp with time zone default timezone('utc'::text, now()),
     unique (user_id, topic_name) -- A user only needs one entry per topic
-);
\ No newline at end of file
+);
+-- 8. Notes Index (metadata mirror of the 'notes' storage bucket)
+-- Written by NoteService on create/update/delete so listing is one query per page.
+create table if not exists public.notes (
+    file_id text primary key, -- Same id as the {file_id}.md object in storage
+    title text not null,
+    url text,
+    storage_path text not null,
+    size_bytes int not null default 0,
+    created_at timestamp with time zone not null,
+    updated_at timestamp with time zone not null,
+    version int not null default 0, -- 0 = written before version tracking
+    stored_bytes int -- Size at rest after compression
+);
+
+-- Tables created before version tracking / compression
+alter table public.notes add column if not exists version int not null default 0;
+alter table public.notes add column if not exists stored_bytes int;
+
+-- Keyset pagination order for GET /api/notes
+create index if not exists notes_updated_at_idx on public.notes (updated_at desc, file_id desc);
+
+-- 9. Reading Activity (POST /api/events)
+-- Raw events are bulk-inserted by the in-memory flusher; dashboards only read
+-- the rollups below. user_id is text so the flusher never fails on a foreign key.
+create table if not exists public.activity_events (
+    id bigserial primary key,
+    user_id text not null,
+    type text not null, -- 'read', 'focus', 'highlight', ...
+    topic text,
+    file_id text,
+    duration_ms int not null default 0,
+    occurred_at timestamp with time zone not null,
+    received_at timestamp with time zone default timezone('utc'::text, now())
+);
+create index if not exists activity_events_user_time_idx on public.activity_events (user_id, occurred_at desc);
+
+-- Reading time per user per UTC day (time-spent sidebar)
+create table if not exists public.activity_daily (
+    user_id text not null,
+    day date not null,
+    duration_ms bigint not null default 0,
+    events int not null default 0,
+    primary key (user_id, day)
+);
+
+-- Reading time per user per topic (insights)
+create table if not exists public.activity_topics (
+    user_id text not null,
+    topic text not null,
+    duration_ms bigint not null default 0,
+    events int not null default 0,
+    last_seen timestamp with time zone,
+    primary key (user_id, topic)
+);
+create index if not exists activity_topics_user_time_idx on public.activity_topics (user_id, duration_ms desc);
+
+-- Additive upsert of one flush's deltas (a plain upsert would overwrite totals)
+create or replace function public.apply_activity_rollups(daily jsonb, topics jsonb)
+returns void
+language sql
+as $$
+    insert into public.activity_daily as a (user_id, day, duration_ms, events)
+    select r.user_id, r.day, r.duration_ms, r.events
+    from jsonb_to_recordset(daily) as r(user_id text, day date, duration_ms bigint, events int)
+    on conflict (user_id, day) do update
+        set duration_ms = a.duration_ms + excluded.duration_ms,
+            events = a.events + excluded.events;
+
+    insert into public.activity_topics as t (user_id, topic, duration_ms, events, last_seen)
+    select r.user_id, r.topic, r.duration_ms, r.events, r.last_seen
+    from jsonb_to_recordset(topics) as r(user_id text, topic text, duration_ms bigint, events int, last_seen timestamptz)
+    on conflict (user_id, topic) do update
+        set duration_ms = t.duration_ms + excluded.duration_ms,
+            events = t.events + excluded.events,
+            last_seen = greatest(t.last_seen, excluded.last_seen);
+$$;
@@ -9,7 +9,7 @@ cat <<EOF > infrastructure/docker-compose.yml
 services:
   # --- Knowledge Graph ---
   neo4j:
-    image: neo4j:5.15.0
+    image: neo4j:5.26.0
     container_name: mvp_neo4j
     ports:
       - "7474:7474" # HTTP Studio